@@ -0,0 +1,6 @@
+"""
+Exemplos de LLM-as-a-Judge.
+
+Os módulos se importam pelo pacote `examples`; execute-os a partir da raiz do
+repositório como módulos, ex: `python -m examples.llm_judge_implementation`.
+"""
@@ -0,0 +1,445 @@
+"""
+Análise vetorizada da qualidade do LLM Judge.
+
+Este módulo converte os resultados de `evaluate_response` (`score`, `correctness`,
+`relevance`, ...) em colunas NumPy e calcula correlação com avaliação humana
+(Pearson/Spearman), taxa de concordância com tolerância, médias e disparidades por
+categoria e intervalos de confiança por bootstrap, sem laços Python por item. Segue as
+seções `benchmarks.human_correlation` e `benchmarks.bias_detection` do
+`judge_configs.yaml`.
+"""
+
+import math
+import statistics
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SCORE_FIELDS = ("score", "correctness", "relevance", "completeness", "clarity", "safety")
+
+# Elementos por bloco de reamostragem (limita a memória do bootstrap)
+_BOOTSTRAP_BLOCK_ELEMENTS = 4_000_000
+
+
+@dataclass
+class ScoreColumns:
+    """Resultados em formato colunar: um array float64 por campo (NaN = ausente)"""
+    scores: Dict[str, np.ndarray]
+    category_codes: np.ndarray
+    category_names: List[str]
+    human: Optional[np.ndarray] = None
+    size: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.size = len(self.category_codes)
+
+    @classmethod
+    def from_evaluations(
+        cls,
+        evaluations: Iterable[Dict[str, Any]],
+        categories: Optional[Iterable[Optional[str]]] = None,
+        human_scores: Optional[Iterable[Optional[float]]] = None,
+        fields: Sequence[str] = SCORE_FIELDS
+    ) -> "ScoreColumns":
+        """
+        Converte avaliações (dicts) em colunas.
+
+        Args:
+            evaluations: Saídas de `evaluate_response`; avaliações com erro viram NaN
+            categories: Categoria de cada item (padrão: "unknown")
+            human_scores: Score humano de cada item (None = sem anotação)
+            fields: Campos numéricos extraídos
+        """
+        rows = list(evaluations)
+        columns = {
+            name: np.array(
+                [_number(row.get(name)) if "error" not in row else math.nan for row in rows],
+                dtype=np.float64
+            )
+            for name in fields
+        }
+        labels = list(categories) if categories is not None else ["unknown"] * len(rows)
+        names, codes = np.unique(
+            np.array([label or "unknown" for label in labels], dtype=object).astype(str),
+            return_inverse=True
+        )
+        human = None
+        if human_scores is not None:
+            human = np.array([_number(value) for value in human_scores], dtype=np.float64)
+        return cls(columns, codes.astype(np.intp), [str(name) for name in names], human)
+
+    @classmethod
+    def from_table(
+        cls,
+        table: Any,
+        categories: Optional[Sequence[str]] = None,
+        human_scores: Optional[Sequence[float]] = None,
+        fields: Sequence[str] = SCORE_FIELDS
+    ) -> "ScoreColumns":
+        """Lê as colunas de um `judge_results.ResultTable` sem converter linha a linha"""
+        errors = np.frombuffer(table.errors, dtype=np.uint8).astype(bool)
+        scores = {}
+        for name in fields:
+            values = np.frombuffer(table.column(name), dtype=np.float32).astype(np.float64)
+            values[errors] = math.nan
+            scores[name] = values
+        return cls.from_arrays(scores, categories, human_scores)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        scores: Dict[str, Sequence[float]],
+        categories: Optional[Sequence[str]] = None,
+        human_scores: Optional[Sequence[float]] = None
+    ) -> "ScoreColumns":
+        """Monta as colunas a partir de arrays já prontos (ex: colunas de um DataFrame)"""
+        columns = {name: np.asarray(values, dtype=np.float64) for name, values in scores.items()}
+        size = len(next(iter(columns.values()))) if columns else 0
+        if categories is None:
+            names, codes = np.array(["unknown"]), np.zeros(size, dtype=np.intp)
+        else:
+            names, codes = np.unique(np.asarray(categories).astype(str), return_inverse=True)
+        human = np.asarray(human_scores, dtype=np.float64) if human_scores is not None else None
+        return cls(columns, codes.astype(np.intp), [str(name) for name in names], human)
+
+
+def _number(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else math.nan
+
+
+def _paired(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Mantém apenas os pares sem NaN"""
+    mask = ~(np.isnan(x) | np.isnan(y))
+    return x[mask], y[mask]
+
+
+def pearson(x: np.ndarray, y: np.ndarray) -> float:
+    """Correlação de Pearson (NaN se houver menos de 2 pares ou variância zero)"""
+    x, y = _paired(x, y)
+    if len(x) < 2:
+        return math.nan
+    xc = x - x.mean()
+    yc = y - y.mean()
+    denominator = math.sqrt(float(xc @ xc) * float(yc @ yc))
+    return float(xc @ yc) / denominator if denominator else math.nan
+
+
+def rankdata(values: np.ndarray) -> np.ndarray:
+    """Postos com média nos empates (como `scipy.stats.rankdata`)"""
+    order = np.argsort(values, kind="mergesort")
+    ordered = values[order]
+    # Início de cada grupo de valores iguais
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    ends = np.r_[starts[1:], len(values)]
+    average = (starts + ends - 1) / 2.0 + 1.0
+    ranks = np.empty(len(values), dtype=np.float64)
+    ranks[order] = np.repeat(average, ends - starts)
+    return ranks
+
+
+def spearman(x: np.ndarray, y: np.ndarray) -> float:
+    """Correlação de Spearman (Pearson dos postos)"""
+    x, y = _paired(x, y)
+    if len(x) < 2:
+        return math.nan
+    return pearson(rankdata(x), rankdata(y))
+
+
+def correlation_p_value(r: float, n: int) -> float:
+    """p-valor bilateral aproximado (transformação de Fisher) para uma correlação"""
+    if math.isnan(r) or n < 4:
+        return math.nan
+    if abs(r) >= 1.0:
+        return 0.0
+    z = math.atanh(r) * math.sqrt(n - 3)
+    return 2.0 * (1.0 - statistics.NormalDist().cdf(abs(z)))
+
+
+def agreement_rate(x: np.ndarray, y: np.ndarray, tolerance: float = 0.2) -> float:
+    """Fração dos pares com |x - y| < tolerance"""
+    x, y = _paired(x, y)
+    return float(np.mean(np.abs(x - y) < tolerance)) if len(x) else math.nan
+
+
+def category_means(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_categories: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Médias e contagens por categoria via `bincount` (NaN ignorado)"""
+    mask = ~np.isnan(values)
+    counts = np.bincount(codes[mask], minlength=n_categories)
+    sums = np.bincount(codes[mask], weights=values[mask], minlength=n_categories)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    return means, counts
+
+
+def resampled_sums(
+    features: np.ndarray,
+    n_resamples: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Somas de cada coluna de `features` (n, m) em `n_resamples` reamostras bootstrap.
+
+    Scores de judges e anotações humanas são discretos: as linhas repetidas são agrupadas
+    e cada reamostra vira uma multinomial sobre as linhas únicas, seguida de um produto
+    matricial. Sem repetição suficiente, sorteia índices em blocos de memória limitada.
+
+    Returns:
+        Array (n_resamples, m)
+    """
+    size = len(features)
+    unique, frequencies = np.unique(features, axis=0, return_counts=True)
+    results = []
+    if len(unique) <= size // 8:
+        probabilities = frequencies / size
+        rows_per_block = max(1, _BOOTSTRAP_BLOCK_ELEMENTS // len(unique))
+        for start in range(0, n_resamples, rows_per_block):
+            rows = min(rows_per_block, n_resamples - start)
+            counts = rng.multinomial(size, probabilities, size=rows)
+            results.append(counts @ unique)
+    else:
+        rows_per_block = max(1, _BOOTSTRAP_BLOCK_ELEMENTS // size)
+        for start in range(0, n_resamples, rows_per_block):
+            rows = min(rows_per_block, n_resamples - start)
+            indices = rng.integers(0, size, size=(rows, size))
+            if features.shape[1] == 1:
+                # Uma coluna: somar os valores sorteados é mais barato que contar
+                results.append(np.take(features[:, 0], indices).sum(axis=1)[:, None])
+                continue
+            # Contagem de cada item por reamostra com um único bincount (índice deslocado por linha)
+            shifted = (indices + np.arange(rows)[:, None] * size).ravel()
+            counts = np.bincount(shifted, minlength=rows * size).reshape(rows, size)
+            results.append(counts @ features)
+    return np.concatenate(results)
+
+
+def _pearson_from_sums(sums: np.ndarray, size: int) -> np.ndarray:
+    """Pearson por reamostra a partir de (Σx, Σy, Σxx, Σyy, Σxy)"""
+    sx, sy, sxx, syy, sxy = sums.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sxy - sx * sy / size) / np.sqrt(
+            (sxx - sx * sx / size) * (syy - sy * sy / size)
+        )
+
+
+def _interval(samples: np.ndarray, confidence: float) -> Tuple[float, float]:
+    samples = samples[~np.isnan(samples)]
+    if not len(samples):
+        return math.nan, math.nan
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.quantile(samples, [alpha, 1.0 - alpha])
+    return float(low), float(high)
+
+
+def bootstrap_ci(
+    x: np.ndarray,
+    y: Optional[np.ndarray] = None,
+    statistic: str = "pearson",
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    tolerance: float = 0.2,
+    seed: Optional[int] = 42
+) -> Tuple[float, float]:
+    """
+    Intervalo de confiança por bootstrap percentil, sem laço por reamostra.
+
+    Args:
+        x: Scores do judge
+        y: Scores de referência (obrigatório para "pearson", "spearman" e "agreement")
+        statistic: "pearson", "spearman", "agreement" ou "mean" (só `x`)
+        n_resamples: Número de reamostras
+        confidence: Nível de confiança (ex: 0.95)
+        tolerance: Tolerância da concordância
+        seed: Semente (None = não reprodutível)
+
+    Returns:
+        (limite inferior, limite superior)
+    """
+    rng = np.random.default_rng(seed)
+    if statistic == "mean":
+        x = x[~np.isnan(x)]
+        if len(x) < 2:
+            return math.nan, math.nan
+        return _interval(resampled_sums(x[:, None], n_resamples, rng)[:, 0] / len(x), confidence)
+
+    if y is None:
+        raise ValueError(f"A estatística '{statistic}' exige y")
+    x, y = _paired(x, y)
+    size = len(x)
+    if size < 2:
+        return math.nan, math.nan
+
+    if statistic == "agreement":
+        hits = (np.abs(x - y) < tolerance).astype(np.float64)
+        return _interval(resampled_sums(hits[:, None], n_resamples, rng)[:, 0] / size, confidence)
+
+    if statistic == "spearman":
+        # Aproximação usual: Pearson dos postos originais em cada reamostra
+        x, y = rankdata(x), rankdata(y)
+    elif statistic != "pearson":
+        raise ValueError(f"Estatística desconhecida: {statistic}")
+    # Centraliza antes das somas de quadrados para evitar cancelamento numérico
+    x = x - x.mean()
+    y = y - y.mean()
+    features = np.column_stack([x, y, x * x, y * y, x * y])
+    return _interval(_pearson_from_sums(resampled_sums(features, n_resamples, rng), size), confidence)
+
+
+def category_disparity_ci(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_categories: int,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: Optional[int] = 42
+) -> List[Tuple[float, float]]:
+    """
+    Intervalos por bootstrap da disparidade (média da categoria - média das médias).
+
+    Bootstrap estratificado: cada categoria é reamostrada com o seu próprio tamanho
+    (agrupada pelos códigos inteiros, sem matriz indicadora), e as médias de cada
+    reamostra formam a disparidade.
+    """
+    rng = np.random.default_rng(seed)
+    mask = ~np.isnan(values)
+    values, codes = values[mask], codes[mask]
+    if len(values) < 2:
+        return [(math.nan, math.nan)] * n_categories
+
+    counts = np.bincount(codes, minlength=n_categories)
+    grouped = values[np.argsort(codes, kind="stable")]
+    bounds = np.r_[0, np.cumsum(counts)]
+    means = np.full((n_resamples, n_categories), math.nan)
+    for index in np.flatnonzero(counts):
+        group = grouped[bounds[index]:bounds[index + 1]]
+        means[:, index] = resampled_sums(group[:, None], n_resamples, rng)[:, 0] / len(group)
+    with np.errstate(invalid="ignore"):
+        disparities = means - np.nanmean(means, axis=1, keepdims=True)
+    return [_interval(disparities[:, index], confidence) for index in range(n_categories)]
+
+
+def _clean(value: float) -> Optional[float]:
+    """NaN vira None para o relatório ser JSON válido"""
+    return None if value is None or math.isnan(value) else float(value)
+
+
+def measure_human_correlation(
+    columns: ScoreColumns,
+    tolerance: float = 0.2,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    min_correlation: Optional[float] = None,
+    seed: Optional[int] = 42
+) -> Dict[str, Any]:
+    """
+    Correlação e concordância de cada campo de score com a avaliação humana.
+
+    Returns:
+        Por campo: pearson_correlation, pearson_p_value, spearman_correlation,
+        spearman_p_value, agreement_rate e intervalos `*_ci`
+    """
+    if columns.human is None:
+        raise ValueError("ScoreColumns sem human_scores")
+
+    report: Dict[str, Any] = {}
+    for name, values in columns.scores.items():
+        judge_scores, human_scores = _paired(values, columns.human)
+        n = len(judge_scores)
+        if n < 2:
+            continue
+        pearson_r = pearson(judge_scores, human_scores)
+        spearman_r = spearman(judge_scores, human_scores)
+        entry = {
+            "n": n,
+            "pearson_correlation": _clean(pearson_r),
+            "pearson_p_value": _clean(correlation_p_value(pearson_r, n)),
+            "pearson_ci": [_clean(v) for v in bootstrap_ci(
+                judge_scores, human_scores, "pearson", n_resamples, confidence, seed=seed
+            )],
+            "spearman_correlation": _clean(spearman_r),
+            "spearman_p_value": _clean(correlation_p_value(spearman_r, n)),
+            "spearman_ci": [_clean(v) for v in bootstrap_ci(
+                judge_scores, human_scores, "spearman", n_resamples, confidence, seed=seed
+            )],
+            "agreement_rate": _clean(agreement_rate(judge_scores, human_scores, tolerance)),
+            "agreement_ci": [_clean(v) for v in bootstrap_ci(
+                judge_scores, human_scores, "agreement", n_resamples, confidence, tolerance, seed
+            )]
+        }
+        if min_correlation is not None:
+            entry["meets_min_correlation"] = bool(pearson_r >= min_correlation)
+        report[name] = entry
+    return report
+
+
+def measure_bias(
+    columns: ScoreColumns,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: Optional[int] = 42
+) -> Dict[str, Any]:
+    """
+    Médias e disparidades por categoria para cada campo de score.
+
+    Returns:
+        Por campo: category_means, category_counts, overall_mean (média das médias),
+        disparities, disparity_ci e max_disparity
+    """
+    n_categories = len(columns.category_names)
+    report: Dict[str, Any] = {}
+    for name, values in columns.scores.items():
+        means, counts = category_means(values, columns.category_codes, n_categories)
+        if not counts.any():
+            continue
+        overall = float(np.nanmean(means))
+        disparities = means - overall
+        intervals = category_disparity_ci(
+            values, columns.category_codes, n_categories, n_resamples, confidence, seed
+        )
+        names = columns.category_names
+        report[name] = {
+            "category_means": {names[i]: _clean(means[i]) for i in range(n_categories)},
+            "category_counts": {names[i]: int(counts[i]) for i in range(n_categories)},
+            "overall_mean": overall,
+            "disparities": {names[i]: _clean(disparities[i]) for i in range(n_categories)},
+            "disparity_ci": {
+                names[i]: [_clean(v) for v in intervals[i]] for i in range(n_categories)
+            },
+            "max_disparity": _clean(float(np.nanmax(np.abs(disparities))))
+        }
+    return report
+
+
+def audit_report(columns: ScoreColumns, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Relatório completo de auditoria do judge.
+
+    Args:
+        columns: Resultados em formato colunar
+        config: `judge_configs.yaml` carregado (usa `benchmarks.analytics` e
+            `benchmarks.human_correlation.min_correlation`)
+    """
+    benchmarks = (config or {}).get("benchmarks", {})
+    analytics = benchmarks.get("analytics", {})
+    options = {
+        "n_resamples": analytics.get("bootstrap_resamples", 1000),
+        "confidence": analytics.get("confidence", 0.95),
+        "seed": analytics.get("seed", 42)
+    }
+    report: Dict[str, Any] = {
+        "items": columns.size,
+        "categories": columns.category_names,
+        "bias": measure_bias(columns, **options)
+    }
+    if columns.human is not None:
+        report["human_correlation"] = measure_human_correlation(
+            columns,
+            tolerance=analytics.get("agreement_tolerance", 0.2),
+            min_correlation=benchmarks.get("human_correlation", {}).get("min_correlation"),
+            **options
+        )
+    return report
@@ -0,0 +1,418 @@
+"""
+Micro-benchmarks offline do LLM Judge.
+
+Este módulo mede o overhead do judge sem chamar nenhum modelo: um `StubRunner`
+determinístico devolve respostas pré-definidas (JSON limpo, JSON em prosa, malformado)
+com latência configurável. Os resultados são gravados em JSON para comparação entre
+versões. O tempo de import do núcleo (parse/prompts) é medido em subprocessos limpos e
+pode ser usado como guarda contra regressões de inicialização.
+
+Uso:
+    python -m examples.judge_benchmarks --output bench_results.json
+    python -m examples.judge_benchmarks --baseline bench_results.json
+    python -m examples.judge_benchmarks --max-import-seconds 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from examples.judge_metrics import JudgeInstrumentation
+from examples.judge_prompts_templates import JudgePromptTemplates
+from examples.llm_judge_implementation import LLMJudge
+
+CLEAN_JSON = json.dumps({
+    "score": 0.82,
+    "correctness": 0.9,
+    "relevance": 0.85,
+    "completeness": 0.7,
+    "clarity": 0.8,
+    "safety": 1.0,
+    "justification": "A resposta cobre os pontos principais com pequenas omissões.",
+    "strengths": ["Correta", "Objetiva"],
+    "weaknesses": ["Pouco detalhada"],
+    "recommendations": ["Adicionar exemplos"]
+}, ensure_ascii=False)
+
+PROSE_WRAPPED = (
+    "Claro! Segue a avaliação solicitada, considerando os critérios {correctness, relevance}:\n\n"
+    f"```json\n{CLEAN_JSON}\n```\n\n"
+    "Observação: a pontuação considera a escala de 0 a 1."
+)
+
+MALFORMED = (
+    "Não consegui seguir o formato pedido. A resposta parece razoável, "
+    "mas faltam detalhes {score: alto?} e exemplos práticos."
+) * 4
+
+OUTPUTS = {
+    "clean": CLEAN_JSON,
+    "prose_wrapped": PROSE_WRAPPED,
+    "malformed": MALFORMED
+}
+
+
+class StubResponse:
+    """Resposta mínima no formato esperado pelo judge (`.content`)"""
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class StubAgent:
+    """Agente falso; só o nome do modelo é usado pelo judge"""
+
+    def __init__(self, model: str = "stub-judge"):
+        self.name = "stub_judge"
+        self.model = model
+
+
+def stub_session() -> Dict[str, Any]:
+    """Sessão falsa: o `StubRunner` ignora a sessão, então o ADK não é necessário"""
+    return {}
+
+
+class StubRunner:
+    """Runner determinístico com latência configurável"""
+
+    def __init__(
+        self,
+        outputs: Optional[List[str]] = None,
+        latency_seconds: float = 0.0,
+        jitter_seconds: float = 0.0,
+        seed: int = 42
+    ):
+        """
+        Inicializa o runner.
+
+        Args:
+            outputs: Respostas devolvidas em ciclo (padrão: JSON limpo)
+            latency_seconds: Latência base simulada por chamada
+            jitter_seconds: Variação máxima (uniforme) somada à latência
+            seed: Semente para jitter reprodutível
+        """
+        self.outputs = outputs or [CLEAN_JSON]
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.calls = 0
+        self.slept_seconds = 0.0  # Latência simulada efetivamente dormida (medida)
+        self._random = random.Random(seed)
+
+    async def run(self, agent: Any, session: Any, user_content: str) -> StubResponse:
+        output = self.outputs[self.calls % len(self.outputs)]
+        self.calls += 1
+        delay = self.latency_seconds
+        if self.jitter_seconds:
+            delay += self._random.uniform(0, self.jitter_seconds)
+        if delay:
+            started = time.perf_counter()
+            await asyncio.sleep(delay)
+            self.slept_seconds += time.perf_counter() - started
+        return StubResponse(output)
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    """Estatísticas em microssegundos por operação"""
+    ordered = sorted(samples)
+    return {
+        "mean_us": statistics.fmean(ordered) * 1e6,
+        "min_us": ordered[0] * 1e6,
+        "p50_us": ordered[len(ordered) // 2] * 1e6,
+        "p95_us": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1e6
+    }
+
+
+def bench(fn: Callable[[], Any], number: int = 200, repeat: int = 7) -> Dict[str, float]:
+    """Executa `fn` `number` vezes por rodada e resume o tempo por chamada"""
+    fn()  # aquecimento
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    return _summarize(samples)
+
+
+def _sample_inputs() -> Dict[str, Any]:
+    long_answer = "Python é uma linguagem de programação de alto nível. " * 40
+    return {
+        "user_query": "O que é Python e para que é usado?",
+        "agent_response": long_answer,
+        "expected_response": "Python é uma linguagem interpretada de alto nível, usada em web, dados e automação.",
+        "context": {"user_id": "u-123", "channel": "web", "documents": ["doc-1", "doc-2"]},
+        "trajectory": ["search", "retrieve", "rerank", "generate"],
+        "actual_trajectory": ["search", "retrieve", "generate", "validate"],
+        "history": [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": f"Mensagem {i} " * 10}
+            for i in range(20)
+        ],
+        "code": "def factorial(n):\n    return 1 if n <= 1 else n * factorial(n - 1)\n" * 10,
+        "sources": [
+            {"id": f"doc-{i}", "content": f"Conteúdo da fonte {i}. " * 30}
+            for i in range(5)
+        ],
+        "responses": [
+            {"label": f"Modelo {i}", "response": long_answer}
+            for i in range(4)
+        ]
+    }
+
+
+def run_prompt_benchmarks(judge: LLMJudge, number: int) -> Dict[str, Any]:
+    data = _sample_inputs()
+    templates = JudgePromptTemplates
+    cases = {
+        "llm_judge._build_trajectory_prompt": lambda: judge._build_trajectory_prompt(
+            data["trajectory"], data["actual_trajectory"], data["context"]
+        ),
+        "llm_judge._build_response_prompt": lambda: judge._build_response_prompt(
+            data["user_query"], data["agent_response"], data["expected_response"], data["context"]
+        ),
+        "templates.trajectory_evaluation": lambda: templates.trajectory_evaluation(
+            data["trajectory"], data["actual_trajectory"], data["context"]
+        ),
+        "templates.response_quality": lambda: templates.response_quality(
+            data["user_query"], data["agent_response"], data["expected_response"], data["context"]
+        ),
+        "templates.comparative_evaluation": lambda: templates.comparative_evaluation(
+            data["user_query"], data["responses"], data["context"]
+        ),
+        "templates.conversational_quality": lambda: templates.conversational_quality(
+            data["history"], data["agent_response"], data["context"]
+        ),
+        "templates.code_quality": lambda: templates.code_quality(
+            data["user_query"], data["code"], "python", data["context"]
+        ),
+        "templates.rag_quality": lambda: templates.rag_quality(
+            data["user_query"], data["agent_response"], data["sources"], data["context"]
+        )
+    }
+    return {name: bench(fn, number) for name, fn in cases.items()}
+
+
+def run_parse_benchmarks(judge: LLMJudge, number: int) -> Dict[str, Any]:
+    import logging
+    # O fallback de texto malformado loga um warning por chamada; silencia durante a medição
+    logger = logging.getLogger("examples.llm_judge_implementation")
+    previous = logger.level
+    logger.setLevel(logging.ERROR)
+    try:
+        return {
+            f"llm_judge._parse_response[{name}]": bench(lambda text=text: judge._parse_response(text), number)
+            for name, text in OUTPUTS.items()
+        }
+    finally:
+        logger.setLevel(previous)
+
+
+async def _end_to_end(
+    kind: str,
+    items: int,
+    concurrency: int,
+    latency_seconds: float
+) -> Dict[str, float]:
+    runner = StubRunner(latency_seconds=latency_seconds, jitter_seconds=latency_seconds / 2)
+    instrumentation = JudgeInstrumentation()
+    judge = LLMJudge(StubAgent(), runner, session_factory=stub_session, instrumentation=instrumentation)
+    data = _sample_inputs()
+
+    if kind == "response":
+        case = {
+            "user_query": data["user_query"],
+            "agent_response": data["agent_response"],
+            "expected_response": data["expected_response"],
+            "context": data["context"]
+        }
+        method = judge.evaluate_many
+        phase = "evaluate_response"
+    elif kind == "trajectory":
+        case = {
+            "expected_trajectory": data["trajectory"],
+            "actual_trajectory": data["actual_trajectory"],
+            "context": data["context"]
+        }
+        method = judge.evaluate_trajectories_many
+        phase = "evaluate_trajectory"
+    else:
+        case = {"user_query": data["user_query"], "responses": data["responses"]}
+        method = judge.compare_many
+        phase = "compare_responses"
+
+    started = time.perf_counter()
+    await method((dict(case) for _ in range(items)), max_concurrency=concurrency)
+    elapsed = time.perf_counter() - started
+    # Tempo medido de cada chamada evaluate_*/compare_* menos o sono real do stub
+    per_call = instrumentation.snapshot()["phases"][phase]
+    return {
+        "items": items,
+        "concurrency": concurrency,
+        "stub_latency_s": latency_seconds,
+        "elapsed_s": elapsed,
+        "throughput_per_s": items / elapsed if elapsed else 0.0,
+        "call_us_per_item": per_call["mean"] * 1e6,
+        "stub_sleep_us_per_item": runner.slept_seconds / items * 1e6,
+        "overhead_us_per_item": max(per_call["sum"] - runner.slept_seconds, 0.0) / items * 1e6
+    }
+
+
+# Módulos que devem carregar sem os SDKs (importados só no primeiro uso)
+IMPORT_TARGETS = (
+    "examples.judge_prompts_templates",
+    "examples.llm_judge_implementation"
+)
+LAZY_MODULES = ("google.adk", "langfuse", "numpy")  # numpy: só analytics e near_duplicate
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "eager": [name for name in {lazy!r} if name in sys.modules]
+}}))
+"""
+
+
+def measure_import(module: str, repeat: int = 5) -> Dict[str, Any]:
+    """Tempo de import de `module` em interpretadores novos (sem cache de módulos)"""
+    samples = []
+    eager: List[str] = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE.format(module=module, lazy=LAZY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        probe = json.loads(completed.stdout.strip().splitlines()[-1])
+        samples.append(probe["seconds"])
+        eager = probe["eager"]
+    ordered = sorted(samples)
+    return {
+        "min_s": ordered[0],
+        "p50_s": ordered[len(ordered) // 2],
+        "max_s": ordered[-1],
+        "eager_sdk_modules": eager
+    }
+
+
+def run_import_benchmarks(repeat: int = 5) -> Dict[str, Any]:
+    return {module: measure_import(module, repeat) for module in IMPORT_TARGETS}
+
+
+def check_import_guard(results: Dict[str, Any], max_seconds: float) -> List[str]:
+    """Falhas da guarda de inicialização: import lento ou SDK carregado no import"""
+    failures = []
+    for module, stats in results.items():
+        if stats["p50_s"] > max_seconds:
+            failures.append(f"{module}: import levou {stats['p50_s']:.3f}s (limite {max_seconds:.3f}s)")
+        if stats["eager_sdk_modules"]:
+            failures.append(f"{module}: carrega {', '.join(stats['eager_sdk_modules'])} no import")
+    return failures
+
+
+def run_end_to_end_benchmarks(
+    items: int,
+    concurrency_levels: List[int],
+    latency_seconds: float
+) -> Dict[str, Any]:
+    results = {}
+    for kind in ("response", "trajectory", "comparison"):
+        for concurrency in concurrency_levels:
+            results[f"evaluate[{kind}]@c{concurrency}"] = asyncio.run(
+                _end_to_end(kind, items, concurrency, latency_seconds)
+            )
+    return results
+
+
+def run_all(
+    number: int = 200,
+    items: int = 200,
+    concurrency_levels: Optional[List[int]] = None,
+    latency_seconds: float = 0.005
+) -> Dict[str, Any]:
+    """Executa todos os benchmarks e retorna um dicionário serializável"""
+    judge = LLMJudge(StubAgent(), StubRunner(), session_factory=stub_session)
+    concurrency_levels = concurrency_levels or [1, 8, 32, 128]
+    return {
+        "metadata": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "number": number,
+            "items": items,
+            "stub_latency_s": latency_seconds
+        },
+        "imports": run_import_benchmarks(),
+        "prompts": run_prompt_benchmarks(judge, number),
+        "parsing": run_parse_benchmarks(judge, number),
+        "end_to_end": run_end_to_end_benchmarks(items, concurrency_levels, latency_seconds)
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Compara micro-benchmarks (mean_us) com uma execução anterior"""
+    lines = []
+    for section in ("prompts", "parsing"):
+        for name, stats in current.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous:
+                continue
+            ratio = stats["mean_us"] / previous["mean_us"] if previous["mean_us"] else float("inf")
+            lines.append(
+                f"{name:55s} {previous['mean_us']:10.1f}us -> {stats['mean_us']:10.1f}us  x{ratio:.2f}"
+            )
+    for module, stats in current.get("imports", {}).items():
+        previous = baseline.get("imports", {}).get(module)
+        if previous:
+            lines.append(
+                f"import {module:48s} {previous['p50_s'] * 1e3:10.1f}ms -> {stats['p50_s'] * 1e3:10.1f}ms"
+            )
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks offline do LLM Judge")
+    parser.add_argument("--output", default="bench_results.json", help="Arquivo JSON de saída")
+    parser.add_argument("--baseline", help="Resultado anterior para comparação")
+    parser.add_argument("--number", type=int, default=200, help="Chamadas por rodada")
+    parser.add_argument("--items", type=int, default=200, help="Itens nos testes ponta a ponta")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--latency", type=float, default=0.005, help="Latência simulada (s)")
+    parser.add_argument(
+        "--max-import-seconds",
+        type=float,
+        help="Só a guarda de import: falha se o núcleo demorar mais ou carregar os SDKs"
+    )
+    args = parser.parse_args(argv)
+
+    if args.max_import_seconds is not None:
+        failures = check_import_guard(run_import_benchmarks(), args.max_import_seconds)
+        print("\n".join(failures) or "Guarda de import OK")
+        return 1 if failures else 0
+
+    results = run_all(args.number, args.items, args.concurrency, args.latency)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(results, baseline)))
+
+    return 0
+
+
+# Execute a partir da raiz do repositório: python -m examples.judge_benchmarks
+if __name__ == "__main__":
+    sys.exit(main())
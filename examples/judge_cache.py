@@ -0,0 +1,378 @@
+"""
+Cache de avaliações para LLM Judge.
+
+Este módulo fornece um cache endereçado por conteúdo (hash do prompt completo,
+modelo do judge e critérios) com uma camada em memória (LRU) e uma camada
+persistente opcional em SQLite, ambas respeitando TTL e limite de tamanho.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    prompt: str,
+    model_name: str,
+    criteria: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Gera a chave de cache de uma avaliação.
+
+    Args:
+        prompt: Prompt completo enviado ao judge
+        model_name: Nome do modelo do judge
+        criteria: Critérios de avaliação utilizados
+
+    Returns:
+        Hash SHA-256 (hex) que identifica a avaliação
+    """
+    payload = json.dumps(
+        {
+            "prompt": prompt,
+            "model": model_name,
+            "criteria": criteria or {}
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Contadores de uso do cache"""
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+class CacheTier(ABC):
+    """Interface de uma camada de cache (valores já serializados em JSON)"""
+
+    name = "tier"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryCacheTier(CacheTier):
+    """Camada em memória com política LRU e TTL"""
+
+    name = "memory"
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = 3600,
+        stats: Optional[CacheStats] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = stats or CacheStats()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                self.stats.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, created_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (value, created_at if created_at is not None else time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheTier(CacheTier):
+    """Camada persistente em SQLite com TTL e limite de entradas (LRU por último acesso)
+
+    Acertos não escrevem no disco: o último acesso fica pendente em memória e é gravado
+    em lote (a cada `access_flush_size` acertos, antes de despejar entradas e ao fechar).
+    """
+
+    name = "disk"
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 100000,
+        ttl_seconds: Optional[float] = 3600,
+        stats: Optional[CacheStats] = None,
+        access_flush_size: int = 256
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = stats or CacheStats()
+        self.access_flush_size = access_flush_size
+        self._pending_access: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS evaluations (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_evaluations_last_access ON evaluations(last_access)"
+        )
+        self._conn.commit()
+
+    def get_with_timestamp(self, key: str) -> Optional[tuple]:
+        """Retorna (valor, created_at) ou None se ausente/expirado"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM evaluations WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM evaluations WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats.expirations += 1
+                return None
+            self._pending_access[key] = now
+            if len(self._pending_access) >= self.access_flush_size:
+                self._flush_access()
+                self._conn.commit()
+            return value, created_at
+
+    def _flush_access(self) -> None:
+        """Grava os últimos acessos pendentes (chamado com o lock e antes de um commit)"""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE evaluations SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.get_with_timestamp(key)
+        return entry[0] if entry else None
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._pending_access.pop(key, None)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO evaluations (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                # LRU precisa dos acessos recentes antes de escolher quem sai
+                self._flush_access()
+                self._conn.execute(
+                    "DELETE FROM evaluations WHERE key IN ("
+                    "SELECT key FROM evaluations ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.stats.evictions += overflow
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Remove entradas expiradas e retorna quantas foram removidas"""
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM evaluations WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+            self.stats.expirations += cursor.rowcount
+            return cursor.rowcount
+
+    def flush(self) -> None:
+        """Grava imediatamente os últimos acessos pendentes"""
+        with self._lock:
+            self._flush_access()
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending_access.clear()
+            self._conn.execute("DELETE FROM evaluations")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_access()
+            self._conn.commit()
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+
+class EvaluationCache:
+    """Cache de avaliações em duas camadas (memória LRU + disco opcional)"""
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = 3600,
+        max_entries: int = 10000,
+        persistent_path: Optional[str] = None,
+        max_persistent_entries: int = 100000,
+        enabled: bool = True
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            ttl_seconds: Tempo de vida das entradas (None para não expirar)
+            max_entries: Limite de entradas da camada em memória
+            persistent_path: Caminho do arquivo SQLite (None desabilita o disco)
+            max_persistent_entries: Limite de entradas da camada em disco
+            enabled: Permite desligar o cache sem remover a integração
+        """
+        self.enabled = enabled
+        self.stats = CacheStats()
+        self.memory = MemoryCacheTier(max_entries, ttl_seconds, self.stats)
+        self.disk: Optional[SQLiteCacheTier] = None
+        if persistent_path:
+            self.disk = SQLiteCacheTier(
+                persistent_path,
+                max_persistent_entries,
+                ttl_seconds,
+                self.stats
+            )
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Dict[str, Any],
+        persistent_path: Optional[str] = None
+    ) -> "EvaluationCache":
+        """
+        Cria o cache a partir do `judge_configs.yaml` já carregado.
+
+        Args:
+            config: Configuração completa ou apenas a seção `cost_optimization.caching`
+            persistent_path: Sobrescreve o caminho do SQLite configurado
+        """
+        caching = config.get("cost_optimization", {}).get("caching", config)
+        return cls(
+            ttl_seconds=caching.get("ttl_seconds", 3600),
+            max_entries=caching.get("max_entries", 10000),
+            persistent_path=persistent_path or caching.get("persistent_path"),
+            max_persistent_entries=caching.get("max_persistent_entries", 100000),
+            enabled=caching.get("enabled", True)
+        )
+
+    @property
+    def tiers(self) -> List[CacheTier]:
+        return [tier for tier in (self.memory, self.disk) if tier is not None]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retorna uma cópia da avaliação armazenada ou None"""
+        if not self.enabled:
+            return None
+
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats.hits += 1
+            self.stats.memory_hits += 1
+            return json.loads(value)
+
+        if self.disk is not None:
+            entry = self.disk.get_with_timestamp(key)
+            if entry is not None:
+                value, created_at = entry
+                # Promove para a memória mantendo o instante original (TTL consistente)
+                self.memory.set(key, value, created_at=created_at)
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                return json.loads(value)
+
+        self.stats.misses += 1
+        return None
+
+    def set(self, key: str, evaluation: Dict[str, Any]) -> None:
+        """Armazena uma avaliação em todas as camadas"""
+        if not self.enabled:
+            return
+
+        try:
+            value = json.dumps(evaluation, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Avaliação não serializável, ignorando cache: {e}")
+            return
+
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
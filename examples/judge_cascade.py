@@ -0,0 +1,202 @@
+"""
+Avaliação hierárquica (cascata) com LLM Judge.
+
+Este módulo fornece o `CascadeJudge`, que encadeia dois ou mais `LLMJudge` (ex: os
+tiers `primary` e `critical` do `judge_configs.yaml`): o judge rápido avalia primeiro
+e o próximo tier só é acionado quando o resultado é incerto (score próximo do
+threshold) ou quando a resposta não pôde ser interpretada.
+"""
+
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Deque
+
+from examples.llm_judge_implementation import LLMJudge
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(percentile / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+@dataclass
+class TierStats:
+    """Estatísticas de um tier da cascata"""
+    name: str
+    relative_cost: float = 1.0
+    calls: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=10000))
+
+    def record(self, latency: float, error: bool) -> None:
+        self.calls += 1
+        self.errors += int(error)
+        self.total_latency += latency
+        self.latencies.append(latency)
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.calls if self.calls else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "relative_cost": self.relative_cost,
+            "mean_latency": self.mean_latency,
+            "p50_latency": _percentile(latencies, 50),
+            "p95_latency": _percentile(latencies, 95)
+        }
+
+
+class CascadeJudge:
+    """Judge em cascata: tiers rápidos primeiro, escalando só em caso de incerteza"""
+
+    def __init__(
+        self,
+        judges: List[LLMJudge],
+        threshold: float = 0.7,
+        uncertainty_band: float = 0.1,
+        tier_names: Optional[List[str]] = None,
+        tier_costs: Optional[List[float]] = None
+    ):
+        """
+        Inicializa a cascata.
+
+        Args:
+            judges: Judges do mais rápido/barato ao mais preciso/caro (mínimo 2)
+            threshold: Score de decisão (`fast_model_threshold`)
+            uncertainty_band: Distância ao threshold que ainda é considerada incerta
+            tier_names: Nomes dos tiers (ex: ["primary", "critical"])
+            tier_costs: Custo relativo de uma chamada em cada tier
+        """
+        if len(judges) < 2:
+            raise ValueError("CascadeJudge precisa de pelo menos 2 judges")
+
+        tier_names = tier_names or [f"tier_{i}" for i in range(len(judges))]
+        tier_costs = tier_costs or [1.0] * len(judges)
+        if not len(judges) == len(tier_names) == len(tier_costs):
+            raise ValueError("judges, tier_names e tier_costs devem ter o mesmo tamanho")
+
+        self.judges = judges
+        self.threshold = threshold
+        self.uncertainty_band = uncertainty_band
+        self.tiers = [
+            TierStats(name=name, relative_cost=cost)
+            for name, cost in zip(tier_names, tier_costs)
+        ]
+        self.requests = 0
+        self.escalations = 0
+        self.total_latency = 0.0
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Dict[str, Any],
+        judges: Dict[str, LLMJudge],
+        tiers: Optional[List[str]] = None
+    ) -> "CascadeJudge":
+        """
+        Cria a cascata a partir do `judge_configs.yaml` já carregado.
+
+        Args:
+            config: Configuração completa
+            judges: Judges por nome de modelo (chaves de `models`, ex: "primary")
+            tiers: Ordem dos tiers (padrão: ["primary", "critical"])
+        """
+        tiers = tiers or ["primary", "critical"]
+        hierarchical = config.get("cost_optimization", {}).get("hierarchical_evaluation", {})
+        models = config.get("models", {})
+        return cls(
+            judges=[judges[name] for name in tiers],
+            threshold=hierarchical.get("fast_model_threshold", 0.7),
+            uncertainty_band=hierarchical.get("uncertainty_band", 0.1),
+            tier_names=tiers,
+            tier_costs=[models.get(name, {}).get("relative_cost", 1.0) for name in tiers]
+        )
+
+    async def evaluate_response(self, **kwargs: Any) -> Dict[str, Any]:
+        """Avalia resposta em cascata (mesmos argumentos de `LLMJudge.evaluate_response`)"""
+        return await self._cascade("evaluate_response", kwargs)
+
+    async def evaluate_trajectory(self, **kwargs: Any) -> Dict[str, Any]:
+        """Avalia trajetória em cascata (mesmos argumentos de `LLMJudge.evaluate_trajectory`)"""
+        return await self._cascade("evaluate_trajectory", kwargs)
+
+    async def compare_responses(self, **kwargs: Any) -> Dict[str, Any]:
+        """Compara respostas em cascata (mesmos argumentos de `LLMJudge.compare_responses`)"""
+        return await self._cascade("compare_responses", kwargs)
+
+    async def _cascade(self, method: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        self.requests += 1
+        started = time.perf_counter()
+        evaluation: Dict[str, Any] = {}
+
+        for level, (judge, tier) in enumerate(zip(self.judges, self.tiers)):
+            tier_started = time.perf_counter()
+            evaluation = await getattr(judge, method)(**kwargs)
+            tier.record(time.perf_counter() - tier_started, bool(evaluation.get("error")))
+
+            evaluation["cascade_tier"] = tier.name
+            is_last = level == len(self.judges) - 1
+            if is_last or not self._is_uncertain(evaluation):
+                break
+
+            self.escalations += 1
+            logger.debug(f"Escalando avaliação de {tier.name} para {self.tiers[level + 1].name}")
+
+        self.total_latency += time.perf_counter() - started
+        return evaluation
+
+    def _is_uncertain(self, evaluation: Dict[str, Any]) -> bool:
+        """Resultado precisa de um tier mais preciso?"""
+        if evaluation.get("error"):
+            return True
+
+        scores = evaluation.get("scores")
+        if isinstance(scores, list) and "winner" in evaluation:
+            # Comparação: incerta se as duas melhores respostas estão próximas
+            numeric = sorted(
+                (score for score in scores if isinstance(score, (int, float))),
+                reverse=True
+            )
+            if len(numeric) < 2:
+                return True
+            return numeric[0] - numeric[1] <= self.uncertainty_band
+
+        score = evaluation.get("score")
+        if not isinstance(score, (int, float)) or isinstance(score, bool):
+            return True
+        return abs(score - self.threshold) <= self.uncertainty_band
+
+    def stats(self) -> Dict[str, Any]:
+        """Taxa de escalonamento, latência por tier e economia estimada"""
+        last = self.tiers[-1]
+        baseline_cost = self.requests * last.relative_cost
+        actual_cost = sum(tier.calls * tier.relative_cost for tier in self.tiers)
+
+        stats: Dict[str, Any] = {
+            "requests": self.requests,
+            "escalations": self.escalations,
+            "escalation_rate": self.escalations / self.requests if self.requests else 0.0,
+            "mean_latency": self.total_latency / self.requests if self.requests else 0.0,
+            "tiers": [tier.to_dict() for tier in self.tiers],
+            # Comparado a enviar tudo direto para o último tier
+            "estimated_cost_savings": 1 - actual_cost / baseline_cost if baseline_cost else 0.0,
+            "estimated_latency_savings_seconds": None
+        }
+        if last.calls:
+            stats["estimated_latency_savings_seconds"] = (
+                self.requests * last.mean_latency - self.total_latency
+            )
+        return stats
@@ -0,0 +1,246 @@
+"""
+Medição adaptativa de consistência do LLM Judge.
+
+Este módulo fornece o `ConsistencyEngine`, que repete a avaliação de cada caso com
+`LLMJudge.evaluate_response` (repetições em paralelo) e para de amostrar um caso assim
+que um limite de confiança sequencial para a variância mostra que ela está claramente
+abaixo ou acima de `max_variance` (seção `benchmarks.consistency` do `judge_configs.yaml`).
+A maioria dos casos estáveis é decidida com apenas duas execuções.
+"""
+
+import asyncio
+import copy
+import logging
+import math
+import statistics
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Tuple
+
+from examples.llm_judge_implementation import LLMJudge
+
+logger = logging.getLogger(__name__)
+
+_RESPONSE_FIELDS = ("user_query", "agent_response", "expected_response", "context")
+
+STABLE = "stable"
+UNSTABLE = "unstable"
+INCONCLUSIVE = "inconclusive"
+
+
+def chi2_quantile(probability: float, df: int) -> float:
+    """
+    Quantil da qui-quadrado sem SciPy.
+
+    Exato para 1 e 2 graus de liberdade (os casos com poucas execuções, que decidem a
+    parada antecipada) e aproximação de Wilson-Hilferty a partir de 3.
+    """
+    if not 0.0 < probability < 1.0:
+        raise ValueError("probability deve estar em (0, 1)")
+    if df == 1:
+        return statistics.NormalDist().inv_cdf((1.0 + probability) / 2.0) ** 2
+    if df == 2:
+        return -2.0 * math.log(1.0 - probability)
+    z = statistics.NormalDist().inv_cdf(probability)
+    term = 2.0 / (9.0 * df)
+    return df * max(1.0 - term + z * math.sqrt(term), 0.0) ** 3
+
+
+def variance_bounds(scores: List[float], confidence: float) -> Tuple[float, float]:
+    """
+    Limites unilaterais (inferior, superior) para a variância, via qui-quadrado.
+
+    Args:
+        scores: Scores do caso (mínimo 2)
+        confidence: Confiança de cada limite (ex: 0.9)
+    """
+    df = len(scores) - 1
+    sum_squares = statistics.variance(scores) * df
+    lower = sum_squares / chi2_quantile(confidence, df)
+    upper = sum_squares / chi2_quantile(1.0 - confidence, df)
+    return lower, upper
+
+
+@dataclass
+class CaseConsistency:
+    """Resultado de consistência de um caso"""
+    case_id: str
+    scores: List[float] = field(default_factory=list)
+    runs: int = 0
+    errors: int = 0
+    status: str = INCONCLUSIVE
+    variance_lower: float = 0.0
+    variance_upper: float = math.inf
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.scores) if self.scores else 0.0
+
+    @property
+    def variance(self) -> float:
+        # Variância populacional, como em `measure_judge_consistency` (np.var)
+        return statistics.pvariance(self.scores) if len(self.scores) > 1 else 0.0
+
+    @property
+    def coefficient_of_variation(self) -> float:
+        mean = self.mean
+        return math.sqrt(self.variance) / mean if mean > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "case_id": self.case_id,
+            "scores": self.scores,
+            "runs": self.runs,
+            "errors": self.errors,
+            "status": self.status,
+            "mean": self.mean,
+            "variance": self.variance,
+            "coefficient_of_variation": self.coefficient_of_variation,
+            "variance_lower": self.variance_lower,
+            "variance_upper": self.variance_upper if math.isfinite(self.variance_upper) else None
+        }
+
+
+class ConsistencyEngine:
+    """Repete avaliações em paralelo com parada antecipada por caso"""
+
+    def __init__(
+        self,
+        judge: LLMJudge,
+        max_variance: float = 0.1,
+        max_runs: int = 3,
+        min_runs: int = 2,
+        confidence: float = 0.9,
+        max_concurrency: int = 10
+    ):
+        """
+        Inicializa o motor de consistência.
+
+        Args:
+            judge: Judge avaliado (cache e atalhos sem modelo são ignorados nas repetições)
+            max_variance: Variância máxima aceitável por caso
+            max_runs: Execuções máximas por caso (`num_runs`)
+            min_runs: Execuções iniciais, disparadas em paralelo (mínimo 2)
+            confidence: Confiança dos limites que decidem a parada antecipada
+            max_concurrency: Chamadas simultâneas ao judge (somando todos os casos)
+        """
+        if min_runs < 2:
+            raise ValueError("min_runs deve ser >= 2")
+        # Repetições servidas sem chamar o modelo (cache, near-duplicates, atalho léxico,
+        # pré-score de trajetória) devolveriam sempre o mesmo resultado (variância zero)
+        self.judge = copy.copy(judge)
+        self.judge.cache = None
+        self.judge.near_duplicate_index = None
+        self.judge.response_prefilter = None
+        self.judge.trajectory_prescorer = None
+        self.max_variance = max_variance
+        self.max_runs = max(max_runs, min_runs)
+        self.min_runs = min_runs
+        self.confidence = confidence
+        self.max_concurrency = max_concurrency
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], judge: LLMJudge) -> "ConsistencyEngine":
+        """Cria o motor a partir da seção `benchmarks.consistency`"""
+        consistency = config.get("benchmarks", {}).get("consistency", config)
+        return cls(
+            judge,
+            max_variance=consistency.get("max_variance", 0.1),
+            max_runs=consistency.get("num_runs", 3),
+            min_runs=consistency.get("min_runs", 2),
+            confidence=consistency.get("confidence", 0.9),
+            max_concurrency=consistency.get("max_concurrency", 10)
+        )
+
+    async def measure(self, cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Mede a consistência do judge em uma lista de casos.
+
+        Args:
+            cases: Casos com `user_query`, `agent_response` e, opcionalmente,
+                `expected_response`, `context` e `id`
+
+        Returns:
+            {"cases": [...], "summary": {...}} com os casos na ordem de entrada
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(
+            self._measure_case(str(case.get("id", index)), case, semaphore)
+            for index, case in enumerate(cases)
+        ))
+        return {
+            "cases": [result.to_dict() for result in results],
+            "summary": self._summarize(results)
+        }
+
+    async def _measure_case(
+        self,
+        case_id: str,
+        case: Dict[str, Any],
+        semaphore: asyncio.Semaphore
+    ) -> CaseConsistency:
+        result = CaseConsistency(case_id)
+        kwargs = {key: case[key] for key in _RESPONSE_FIELDS if key in case}
+
+        batch = self.min_runs
+        while batch > 0:
+            evaluations = await asyncio.gather(*(
+                self._evaluate(kwargs, semaphore) for _ in range(batch)
+            ))
+            for evaluation in evaluations:
+                result.runs += 1
+                score = evaluation.get("score")
+                if "error" in evaluation or not isinstance(score, (int, float)):
+                    result.errors += 1
+                else:
+                    result.scores.append(float(score))
+
+            if self._decide(result):
+                break
+            batch = min(1, self.max_runs - result.runs)
+        return result
+
+    async def _evaluate(
+        self,
+        kwargs: Dict[str, Any],
+        semaphore: asyncio.Semaphore
+    ) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await self.judge.evaluate_response(**kwargs)
+            except Exception as e:
+                logger.error(f"Erro na repetição de consistência: {e}")
+                return self.judge._error_evaluation(str(e))
+
+    def _decide(self, result: CaseConsistency) -> bool:
+        """Atualiza limites e status; True quando o caso já está decidido"""
+        if len(result.scores) < 2:
+            return False
+        result.variance_lower, result.variance_upper = variance_bounds(result.scores, self.confidence)
+        if result.variance_upper <= self.max_variance:
+            result.status = STABLE
+            return True
+        if result.variance_lower > self.max_variance:
+            result.status = UNSTABLE
+            return True
+        # Sem decisão até `max_runs`: o caso fica INCONCLUSIVE
+        return False
+
+    def _summarize(self, results: List[CaseConsistency]) -> Dict[str, Any]:
+        measured = [result for result in results if len(result.scores) > 1]
+        runs = sum(result.runs for result in results)
+        budget = self.max_runs * len(results)
+        average_cv = statistics.fmean(r.coefficient_of_variation for r in measured) if measured else 0.0
+        return {
+            "total_cases": len(results),
+            "stable": sum(1 for r in results if r.status == STABLE),
+            "unstable": sum(1 for r in results if r.status == UNSTABLE),
+            "inconclusive": sum(1 for r in results if r.status == INCONCLUSIVE),
+            "unstable_cases": [r.case_id for r in results if r.status == UNSTABLE],
+            "total_runs": runs,
+            "errors": sum(r.errors for r in results),
+            "runs_saved": budget - runs,
+            "call_savings_rate": 1 - runs / budget if budget else 0.0,
+            "average_variance": statistics.fmean(r.variance for r in measured) if measured else 0.0,
+            "average_coefficient_of_variation": average_cv,
+            "consistency_score": 1 - min(average_cv, 1.0)
+        }
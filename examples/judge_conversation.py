@@ -0,0 +1,286 @@
+"""
+Avaliação incremental de conversas longas.
+
+`conversational_quality` renderiza o histórico inteiro em cada prompt: avaliar todos os
+turnos de uma conversa de N turnos custa O(N²) tokens de entrada. O
+`IncrementalConversationEvaluator` mantém, por conversa, um estado compactado: um resumo
+dos turnos antigos (gerado pelo modelo e atualizado só a cada `summary_interval` turnos)
+mais os turnos recentes. Cada turno é avaliado com o mesmo template `conversational`
+(mesmos critérios, escala e saída) sobre esse estado, então custo e latência por turno
+ficam aproximadamente constantes. Enquanto a conversa cabe na janela, o prompt é
+idêntico ao da avaliação com o histórico completo. Turnos já resumidos saem do estado, e
+o prompt fica limitado a `window_turns + summary_interval` turnos: se os turnos pendentes
+passam disso com uma atualização do resumo em andamento, o turno espera por ela.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+
+from examples.judge_prompt_budget import estimate_tokens
+from examples.judge_prompts_templates import JudgePromptTemplates, compile_template
+
+if TYPE_CHECKING:
+    from examples.llm_judge_implementation import LLMJudge
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ConversationState:
+    """Estado compactado de uma conversa"""
+    turns: List[Dict[str, str]] = field(default_factory=list)  # Só os ainda não resumidos
+    summary: str = ""
+    summarized: int = 0  # Turnos (desde o início) já incorporados ao resumo
+    dropped: int = 0  # Turnos descartados sem resumo depois de atualizações que falharam
+    summary_updates: int = 0
+    refresh: Optional["asyncio.Task"] = None  # Atualização do resumo em andamento
+    refresh_turns: int = 0  # Primeiros turnos de `turns` cobertos pela atualização
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def total_turns(self) -> int:
+        return self.summarized + self.dropped + len(self.turns)
+
+
+class IncrementalConversationEvaluator:
+    """Avalia cada turno de uma conversa sobre resumo + turnos recentes"""
+
+    def __init__(
+        self,
+        judge: "LLMJudge",
+        window_turns: int = 6,
+        summary_interval: int = 8,
+        summary_max_words: int = 150,
+        background_refresh: bool = True,
+        max_conversations: int = 1000
+    ):
+        """
+        Inicializa o avaliador.
+
+        Args:
+            judge: Judge usado nas avaliações e nos resumos (cache, rate limit, retry)
+            window_turns: Turnos recentes sempre enviados na íntegra
+            summary_interval: Turnos acumulados fora da janela antes de atualizar o resumo;
+                o prompt carrega no máximo `window_turns + summary_interval` turnos
+            summary_max_words: Tamanho máximo do resumo
+            background_refresh: Atualiza o resumo em paralelo aos turnos seguintes (que
+                usam o estado anterior, ainda completo) em vez de bloquear o turno atual;
+                um turno só espera a atualização se o prompt passaria do limite
+            max_conversations: Conversas mantidas em memória (as menos recentes saem)
+        """
+        if window_turns < 1 or summary_interval < 1:
+            raise ValueError("window_turns e summary_interval devem ser >= 1")
+        self.judge = judge
+        self.window_turns = window_turns
+        self.summary_interval = summary_interval
+        self.summary_max_words = summary_max_words
+        self.max_prompt_turns = window_turns + summary_interval
+        self.background_refresh = background_refresh
+        self.max_conversations = max_conversations
+        self._states: "OrderedDict[str, ConversationState]" = OrderedDict()
+
+    @classmethod
+    def from_config(cls, judge: "LLMJudge", config: Dict[str, Any]) -> "IncrementalConversationEvaluator":
+        """Cria o avaliador a partir de `evaluation_types.conversational.incremental`"""
+        options = config.get("evaluation_types", {}).get("conversational", {}).get("incremental", config)
+        return cls(
+            judge,
+            window_turns=options.get("window_turns", 6),
+            summary_interval=options.get("summary_interval", 8),
+            summary_max_words=options.get("summary_max_words", 150),
+            background_refresh=options.get("background_refresh", True),
+            max_conversations=options.get("max_conversations", 1000)
+        )
+
+    def state(self, conversation_id: str) -> ConversationState:
+        """Estado da conversa (criado no primeiro turno)"""
+        state = self._states.get(conversation_id)
+        if state is None:
+            state = self._states[conversation_id] = ConversationState()
+            while len(self._states) > self.max_conversations:
+                _, evicted = self._states.popitem(last=False)
+                self._cancel(evicted)
+        else:
+            self._states.move_to_end(conversation_id)
+        return state
+
+    def close(self, conversation_id: str) -> None:
+        """Descarta o estado de uma conversa encerrada"""
+        state = self._states.pop(conversation_id, None)
+        if state is not None:
+            self._cancel(state)
+
+    async def evaluate_turn(
+        self,
+        conversation_id: str,
+        user_message: Optional[str],
+        agent_response: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Avalia a resposta do agente a um novo turno e a incorpora ao estado.
+
+        Args:
+            conversation_id: Identificador da conversa
+            user_message: Mensagem do usuário respondida neste turno (None se não houver)
+            agent_response: Resposta do agente
+            context: Contexto adicional
+
+        Returns:
+            Avaliação no esquema de `conversational`, com `conversation` (turno, turnos
+            resumidos, descartados e cortados do prompt, turnos e tokens enviados)
+        """
+        state = self.state(conversation_id)
+        async with state.lock:
+            return await self._evaluate_turn(conversation_id, state, user_message, agent_response, context)
+
+    async def evaluate_conversation(
+        self,
+        conversation_id: str,
+        turns: List[Dict[str, str]],
+        context: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Avalia, em ordem, cada resposta do agente de uma conversa registrada.
+
+        Args:
+            conversation_id: Identificador da conversa
+            turns: Turnos (`role`, `content`); respostas do agente têm role "assistant"
+            context: Contexto adicional
+
+        Returns:
+            Uma avaliação por resposta do agente
+        """
+        evaluations = []
+        state = self.state(conversation_id)
+        async with state.lock:
+            for turn in turns:
+                if turn.get("role") != "assistant":
+                    state.turns.append({"role": turn.get("role", "user"), "content": turn.get("content", "")})
+                    continue
+                evaluations.append(await self._evaluate_turn(
+                    conversation_id, state, None, turn.get("content", ""), context
+                ))
+        return evaluations
+
+    async def _evaluate_turn(
+        self,
+        conversation_id: str,
+        state: ConversationState,
+        user_message: Optional[str],
+        agent_response: str,
+        context: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        judge = self.judge
+        started = judge._clock()
+        self._apply_refresh(state)
+        if user_message is not None:
+            state.turns.append({"role": "user", "content": user_message})
+
+        if len(state.turns) > self.max_prompt_turns and state.refresh is not None:
+            # Cortar agora perderia turnos que ainda não estão no resumo: espera a
+            # atualização em andamento
+            judge._count("conversation_summary_wait")
+            await asyncio.wait({state.refresh})
+            self._apply_refresh(state)
+        trimmed = max(len(state.turns) - self.max_prompt_turns, 0)
+        recent = state.turns[trimmed:]
+        if trimmed:
+            judge._count("conversation_turns_trimmed")
+        report = judge._compaction_report("conversational")
+        prompt = JudgePromptTemplates.conversational_quality(
+            recent,
+            agent_response,
+            context,
+            token_budget=judge.prompt_budgets.get("conversational"),
+            report=report,
+            output_profile=judge.output_profile,
+            summary=state.summary or None
+        )
+        judge._observe("prompt_build", started)
+
+        try:
+            evaluation = judge._attach_compaction(
+                await judge._run_judge(prompt, schema=judge._output_schema("conversational")),
+                report
+            )
+        except Exception as e:
+            logger.error(f"Erro ao avaliar turno da conversa {conversation_id}: {e}", exc_info=True)
+            evaluation = judge._error_evaluation(str(e))
+
+        evaluation["conversation"] = {
+            "conversation_id": conversation_id,
+            "turn": state.total_turns,
+            "summarized_turns": state.summarized,
+            "dropped_turns": state.dropped,
+            "trimmed_turns": trimmed,
+            "prompt_turns": len(recent),
+            "prompt_tokens": estimate_tokens(prompt)
+        }
+        state.turns.append({"role": "assistant", "content": agent_response})
+        await self._schedule_refresh(state)
+        judge._observe("evaluate_conversation_turn", started)
+        return evaluation
+
+    async def _schedule_refresh(self, state: ConversationState) -> None:
+        """Atualiza o resumo quando `summary_interval` turnos saíram da janela"""
+        if state.refresh is not None:
+            return
+        covered = len(state.turns) - self.window_turns
+        if covered < self.summary_interval:
+            return
+        prompt = JudgePromptTemplates.conversation_summary(
+            state.summary,
+            state.turns[:covered],
+            self.summary_max_words
+        )
+        state.refresh_turns = covered
+        state.refresh = asyncio.ensure_future(self._summarize(prompt))
+        if not self.background_refresh:
+            await asyncio.wait({state.refresh})
+            self._apply_refresh(state)
+
+    async def _summarize(self, prompt: str) -> str:
+        # Mesmo prompt (resumo anterior + turnos) é servido pelo cache do judge
+        result = await self.judge._run_judge(prompt, schema=compile_template("conversation_summary").output_schema)
+        summary = result.get("summary")
+        if result.get("error") or not isinstance(summary, str) or not summary.strip():
+            raise ValueError(f"Resumo inválido: {result.get('error') or result}")
+        return summary.strip()
+
+    def _apply_refresh(self, state: ConversationState) -> None:
+        """
+        Incorpora o resumo se a atualização terminou.
+
+        Os turnos resumidos saem do estado. Uma falha é tentada de novo depois, mas os
+        turnos que já não cabem no prompt são descartados, para que o estado e o prompt
+        do próximo resumo não cresçam sem limite enquanto as falhas persistirem.
+        """
+        task = state.refresh
+        if task is None or not task.done():
+            return
+        state.refresh = None
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.judge._count("conversation_summary_failed")
+            logger.warning(f"Falha ao atualizar resumo da conversa: {task.exception()}")
+            excess = len(state.turns) - self.max_prompt_turns
+            if excess > 0:
+                del state.turns[:excess]
+                state.dropped += excess
+                self.judge._count("conversation_turns_dropped")
+            return
+        state.summary = task.result()
+        del state.turns[:state.refresh_turns]
+        state.summarized += state.refresh_turns
+        state.summary_updates += 1
+        self.judge._count("conversation_summary")
+
+    @staticmethod
+    def _cancel(state: ConversationState) -> None:
+        if state.refresh is not None and not state.refresh.done():
+            state.refresh.cancel()
@@ -0,0 +1,199 @@
+"""
+Requisições com hedge para cortar a cauda de latência do judge.
+
+Este módulo fornece a `HedgingPolicy`: se uma chamada ao modelo não terminou até um
+prazo derivado de um percentil das latências recentes (ex: p95), uma segunda tentativa
+é disparada, opcionalmente em outro tier de modelo (ex: `alternative`). A primeira
+resposta válida vence e a outra é cancelada. Um orçamento de hedges (fração das
+chamadas, com rajada máxima) limita o gasto extra, e as estatísticas registram a taxa de
+hedge e quem venceu.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Any, Awaitable, Callable, Deque, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from google.adk import Agent
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class HedgeStats:
+    """Contadores de hedge"""
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    primary_wins: int = 0
+    budget_denied: int = 0
+    both_failed: int = 0
+    extra_cost: float = 0.0  # Custo relativo das tentativas extras (models.*.relative_cost)
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.calls if self.calls else 0.0
+
+    @property
+    def hedge_win_rate(self) -> float:
+        return self.hedge_wins / self.hedged if self.hedged else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_rate": self.hedge_rate,
+            "hedge_wins": self.hedge_wins,
+            "primary_wins": self.primary_wins,
+            "hedge_win_rate": self.hedge_win_rate,
+            "budget_denied": self.budget_denied,
+            "both_failed": self.both_failed,
+            "extra_cost": self.extra_cost
+        }
+
+
+@dataclass
+class HedgingPolicy:
+    """Prazo por percentil, orçamento de hedges e execução da corrida entre tentativas"""
+    enabled: bool = True
+    percentile: float = 95.0
+    min_samples: int = 50  # Antes disso, usa `initial_delay_seconds`
+    initial_delay_seconds: float = 2.0
+    min_delay_seconds: float = 0.05
+    window: int = 1000  # Latências recentes usadas no percentil
+    budget_ratio: float = 0.05  # Hedges por chamada (ex: 0.05 = no máximo ~5% a mais)
+    budget_burst: float = 5.0  # Hedges acumuláveis para rajadas de lentidão
+    agent: Optional["Agent"] = None  # Agente do hedge (None: o próprio judge)
+    hedge_cost: float = 1.0
+    stats: HedgeStats = field(default_factory=HedgeStats)
+    latencies: Deque[float] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.latencies = deque(maxlen=self.window)
+        self._budget = self.budget_burst
+        self._deadline = self.initial_delay_seconds
+        self._recorded = 0
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Dict[str, Any],
+        agent: Optional["Agent"] = None
+    ) -> "HedgingPolicy":
+        """
+        Cria a política a partir de `robustness.hedging`.
+
+        Args:
+            config: Configuração completa
+            agent: Agente do tier `hedge_model` (None: repete no modelo do judge)
+        """
+        hedging = config.get("robustness", {}).get("hedging", config)
+        hedge_model = hedging.get("hedge_model")
+        if hedge_model and agent is None:
+            logger.warning(f"hedge_model '{hedge_model}' configurado sem agente; usando o judge")
+        cost = config.get("models", {}).get(hedge_model or "primary", {}).get("relative_cost", 1.0)
+        return cls(
+            enabled=hedging.get("enabled", True),
+            percentile=hedging.get("percentile", 95.0),
+            min_samples=hedging.get("min_samples", 50),
+            initial_delay_seconds=hedging.get("initial_delay_seconds", 2.0),
+            min_delay_seconds=hedging.get("min_delay_seconds", 0.05),
+            window=hedging.get("window", 1000),
+            budget_ratio=hedging.get("budget_ratio", 0.05),
+            budget_burst=hedging.get("budget_burst", 5.0),
+            agent=agent,
+            hedge_cost=cost if agent is not None else 1.0
+        )
+
+    def deadline(self) -> float:
+        """Espera antes do hedge: percentil das latências recentes (recalculado a cada 32)"""
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay_seconds
+        if self._recorded >= 32:
+            ordered = sorted(self.latencies)
+            index = min(int(round(self.percentile / 100 * (len(ordered) - 1))), len(ordered) - 1)
+            self._deadline = max(ordered[index], self.min_delay_seconds)
+            self._recorded = 0
+        return self._deadline
+
+    def report(self) -> Dict[str, Any]:
+        """Estatísticas de hedge e prazo atual"""
+        return {**self.stats.to_dict(), "deadline_seconds": self.deadline()}
+
+    def record(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self._recorded += 1
+
+    def _take_budget(self) -> bool:
+        if self._budget < 1.0:
+            self.stats.budget_denied += 1
+            return False
+        self._budget -= 1.0
+        return True
+
+    async def run(
+        self,
+        primary: Callable[[], Awaitable[T]],
+        hedge: Callable[[], Awaitable[T]],
+        valid: Callable[[T], bool]
+    ) -> T:
+        """
+        Executa `primary` e, se passar do prazo, dispara `hedge` em paralelo.
+
+        Args:
+            primary: Tentativa original
+            hedge: Tentativa extra (mesmo prompt, possivelmente outro modelo)
+            valid: Resultado aceitável (ex: contém JSON); inválidos não vencem a corrida
+
+        Returns:
+            O primeiro resultado válido; se nenhum for, o da tentativa original (ou o
+            erro dela, tratado pela política de retry)
+        """
+        self.stats.calls += 1
+        self._budget = min(self._budget + self.budget_ratio, self.budget_burst)
+        started = time.perf_counter()
+        first = asyncio.ensure_future(primary())
+        try:
+            done, _ = await asyncio.wait({first}, timeout=self.deadline())
+        except asyncio.CancelledError:
+            first.cancel()
+            raise
+        if done or not self._take_budget():
+            result = await first
+            self.record(time.perf_counter() - started)
+            return result
+
+        self.stats.hedged += 1
+        self.stats.extra_cost += self.hedge_cost
+        second = asyncio.ensure_future(hedge())
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and valid(task.result()):
+                        if task is first:
+                            self.stats.primary_wins += 1
+                        else:
+                            self.stats.hedge_wins += 1
+                        # Limite inferior da latência da tentativa original (censurada se perdeu)
+                        self.record(time.perf_counter() - started)
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_discard_result)
+
+        self.stats.both_failed += 1
+        return first.result()
+
+
+def _discard_result(task: asyncio.Future) -> None:
+    # Marca a exceção da tentativa cancelada/perdedora como lida
+    if not task.cancelled():
+        task.exception()
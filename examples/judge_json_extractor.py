@@ -0,0 +1,245 @@
+"""
+Extração incremental de JSON das respostas do LLM Judge.
+
+Este módulo fornece um extrator que consome o texto do judge em pedaços (ex: tokens
+de streaming), acompanha a profundidade de chaves/colchetes fora de strings e devolve
+o primeiro objeto JSON de nível superior assim que ele fecha, permitindo cancelar o
+restante da geração. Blocos ```json e vírgulas finais são tratados na mesma passada.
+"""
+
+import json
+import re
+from typing import Any, AsyncIterable, Callable, List, Optional, Tuple
+
+# Caracteres que alteram o estado do scanner; o resto do texto é pulado em bloco
+_SIGNIFICANT = re.compile(r'[{}\[\]",\\`]')
+_CLOSERS = "}]"
+_FENCE = "```"
+
+
+class StreamingJSONExtractor:
+    """Extrator incremental do primeiro valor JSON de nível superior"""
+
+    def __init__(
+        self,
+        openers: str = "{",
+        accept: Optional[Callable[[Any], bool]] = None
+    ):
+        """
+        Inicializa o extrator.
+
+        Args:
+            openers: Caracteres que iniciam um candidato ("{" para objetos, "[{" para ambos)
+            accept: Validação opcional do valor parseado; candidatos rejeitados são ignorados
+        """
+        self.openers = openers
+        self.accept = accept
+        self.result: Any = None
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._last_comma = -1
+        self._trailing_commas: List[int] = []
+
+    def feed(self, chunk: str) -> Any:
+        """
+        Consome mais texto.
+
+        Returns:
+            O valor extraído assim que estiver completo, senão None
+        """
+        if self.done:
+            return self.result
+
+        self._text += chunk
+        self._scan()
+
+        if self._depth == 0 and not self.done:
+            # Fora de candidato: o texto já lido não é mais necessário
+            self._text = self._text[self._pos:]
+            self._pos = 0
+
+        return self.result
+
+    def _scan(self) -> None:
+        text = self._text
+        length = len(text)
+        pos = self._pos
+
+        while not self.done:
+            match = _SIGNIFICANT.search(text, pos)
+            if match is None:
+                pos = length
+                break
+
+            index = match.start()
+            char = text[index]
+
+            if self._in_string:
+                if char == "\\":
+                    if index + 1 >= length:
+                        # Escape no fim do pedaço: espera o próximo caractere
+                        pos = index
+                        break
+                    pos = index + 2
+                    continue
+                if char == '"':
+                    self._in_string = False
+                pos = index + 1
+                continue
+
+            if char == "`":
+                if length - index < len(_FENCE):
+                    pos = index
+                    break
+                if text.startswith(_FENCE, index):
+                    # Início (ou fim) de bloco cercado: descarta candidato parcial
+                    self._reset()
+                    pos = index + len(_FENCE)
+                    continue
+                pos = index + 1
+                continue
+
+            if self._depth == 0:
+                if char in self.openers:
+                    self._start = index
+                    self._depth = 1
+                    self._last_comma = -1
+                    self._trailing_commas = []
+                pos = index + 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._last_comma = -1
+            elif char == ",":
+                self._last_comma = index
+            elif char in "{[":
+                self._depth += 1
+                self._last_comma = -1
+            elif char in _CLOSERS:
+                if self._last_comma >= 0 and not text[self._last_comma + 1:index].strip():
+                    self._trailing_commas.append(self._last_comma)
+                self._last_comma = -1
+                self._depth -= 1
+                if self._depth == 0:
+                    start = self._start
+                    if not self._complete(index + 1):
+                        # Candidato inválido (ex: chaves em prosa): pode haver um
+                        # objeto válido aninhado, então recomeça logo após a abertura
+                        pos = start + 1
+                        continue
+            pos = index + 1
+
+        self._pos = pos
+
+    def finish(self) -> Any:
+        """
+        Sinaliza o fim do texto.
+
+        Se um candidato ficou aberto (ex: chave solta em prosa antes do JSON real),
+        reexamina o texto a partir da posição seguinte à abertura.
+
+        Returns:
+            O valor extraído ou None
+        """
+        while not self.done and self._depth > 0:
+            start = self._start
+            self._reset()
+            self._pos = start + 1
+            self._scan()
+        return self.result
+
+    def _complete(self, end: int) -> bool:
+        """Tenta parsear o candidato recém-fechado"""
+        candidate = self._text[self._start:end]
+        if self._trailing_commas:
+            offset = self._start
+            parts = []
+            previous = 0
+            for comma in self._trailing_commas:
+                parts.append(candidate[previous:comma - offset])
+                previous = comma - offset + 1
+            parts.append(candidate[previous:])
+            candidate = "".join(parts)
+
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            value = None
+        else:
+            if self.accept is None or self.accept(value):
+                self.result = value
+                self.done = True
+                return True
+
+        self._reset()
+        return False
+
+    def _reset(self) -> None:
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._last_comma = -1
+        self._trailing_commas = []
+
+
+def extract_json(
+    text: str,
+    openers: str = "{",
+    accept: Optional[Callable[[Any], bool]] = None
+) -> Any:
+    """
+    Extrai o primeiro valor JSON de nível superior de um texto completo.
+
+    Args:
+        text: Texto retornado pelo judge
+        openers: Caracteres que iniciam um candidato
+        accept: Validação opcional do valor parseado
+
+    Returns:
+        Valor extraído ou None se nenhum candidato válido for encontrado
+    """
+    extractor = StreamingJSONExtractor(openers, accept)
+    extractor.feed(text)
+    return extractor.finish()
+
+
+async def extract_json_from_stream(
+    chunks: AsyncIterable[str],
+    openers: str = "{",
+    accept: Optional[Callable[[Any], bool]] = None
+) -> Tuple[Any, str]:
+    """
+    Consome um stream de texto até o primeiro valor JSON completo e encerra o stream.
+
+    Ao encontrar o valor, o iterador é fechado (`aclose`), o que permite ao produtor
+    cancelar o restante da geração.
+
+    Args:
+        chunks: Iterável assíncrono com pedaços do texto do judge
+        openers: Caracteres que iniciam um candidato
+        accept: Validação opcional do valor parseado
+
+    Returns:
+        Tupla (valor extraído ou None, texto recebido até o momento)
+    """
+    extractor = StreamingJSONExtractor(openers, accept)
+    received: List[str] = []
+    try:
+        async for chunk in chunks:
+            received.append(chunk)
+            extractor.feed(chunk)
+            if extractor.done:
+                break
+        else:
+            extractor.finish()
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    return extractor.result, "".join(received)
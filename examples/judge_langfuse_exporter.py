@@ -0,0 +1,146 @@
+"""
+Exportação assíncrona de scores/observações para o Langfuse.
+
+Este módulo fornece o `BufferedLangfuseExporter`: as chamadas ao cliente Langfuse são
+enfileiradas em memória (fila limitada, descartando as mais antigas quando cheia) e
+executadas por uma tarefa em segundo plano, fora do caminho da avaliação.
+
+O exportador não faz ingestão em lote: cada grupo de `batch_size` operações roda, uma a
+uma, em uma thread, com as mesmas chamadas do cliente (`trace`, `score`, ...). O
+agrupamento dos eventos em requisições HTTP fica a cargo da fila interna do SDK do
+Langfuse.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_Operation = Tuple[Callable[..., Any], Tuple[Any, ...], Dict[str, Any]]
+
+
+class BufferedLangfuseExporter:
+    """Fila limitada executada em segundo plano, em grupos de operações"""
+
+    def __init__(
+        self,
+        langfuse_client: Any = None,
+        max_queue_size: int = 10000,
+        batch_size: int = 100,
+        flush_interval_seconds: float = 1.0
+    ):
+        """
+        Inicializa o exportador.
+
+        Args:
+            langfuse_client: Cliente Langfuse (para `flush()` no encerramento)
+            max_queue_size: Máximo de operações pendentes; acima disso descarta as mais antigas
+            batch_size: Operações executadas por vez na thread de exportação
+            flush_interval_seconds: Intervalo máximo entre lotes
+        """
+        self.langfuse = langfuse_client
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: Deque[_Operation] = deque(maxlen=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # Loop em que `_task` roda
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+
+    def enqueue(self, operation: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """Enfileira uma chamada ao Langfuse sem bloquear (nunca lança exceção)"""
+        if len(self._queue) >= self.max_queue_size:
+            # deque com maxlen descarta a mais antiga no append
+            self.dropped += 1
+        self._queue.append((operation, args, kwargs))
+        self.queued += 1
+        self._ensure_started()
+
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _ensure_started(self) -> None:
+        """
+        Inicia a tarefa de fundo no loop atual.
+
+        Com um `asyncio.run` por chamada, a tarefa do loop anterior já foi cancelada
+        junto com ele: nesse caso ela é recriada (com um novo `Event`) no loop atual.
+        """
+        if self._closing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Sem loop ativo: as operações ficam na fila até o próximo flush
+            return
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Executa todas as operações pendentes, em grupos; retorna quantas foram enviadas"""
+        sent = 0
+        while self._queue:
+            batch: List[_Operation] = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+            # O cliente Langfuse é síncrono: o grupo roda em thread para não travar o loop
+            sent += await asyncio.to_thread(self._send_batch, batch)
+        return sent
+
+    def _send_batch(self, batch: List[_Operation]) -> int:
+        """Executa as operações do grupo em sequência (uma chamada do cliente cada)"""
+        sent = 0
+        for operation, args, kwargs in batch:
+            try:
+                operation(*args, **kwargs)
+                sent += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Falha ao exportar para o Langfuse: {e}")
+        self.flushed += sent
+        return sent
+
+    async def shutdown(self) -> None:
+        """Para a tarefa de fundo, envia o que restou e faz flush do cliente"""
+        self._closing = True
+        if self._task is not None and not self._task.done() and self._loop is asyncio.get_running_loop():
+            self._wakeup.set()
+            try:
+                await self._task
+            except Exception as e:
+                logger.warning(f"Erro na tarefa de exportação: {e}")
+        self._task = None
+        self._loop = None
+
+        await self.flush()
+        flush_client = getattr(self.langfuse, "flush", None)
+        if flush_client is not None:
+            await asyncio.to_thread(flush_client)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self.queued,
+            "pending": len(self._queue),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
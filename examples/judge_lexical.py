@@ -0,0 +1,244 @@
+"""
+Atalho léxico para `evaluate_response` quando há resposta esperada.
+
+Este módulo fornece o `LexicalPreFilter`: compara a resposta do agente com a
+`expected_response` por match exato normalizado, F1 de tokens e ROUGE-L (LCS de
+tokens). Quando a similaridade passa de um limiar de alta confiança, o judge devolve uma
+avaliação sintetizada com o mesmo esquema (`source: "lexical"`) sem chamar o modelo; os
+demais casos seguem para o LLM. Uma única palavra trocada pode inverter o sentido
+("não", "30 dias" -> "90 dias") sem quase mexer nas similaridades, então respostas cujos
+números ou negações diferem dos da esperada sempre vão para o modelo. Em suítes de regressão estáveis, boa parte dos itens
+repete a resposta esperada e é resolvida aqui em microssegundos.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional
+
+from examples.judge_trajectory_metrics import lcs_length
+
+_TOKEN = re.compile(r"\w+")
+
+NORMALIZATIONS = ("text", "whitespace")
+
+# Critérios de resposta sintetizados (mesmos campos de `response_quality`)
+_CRITERIA = ("correctness", "relevance", "completeness", "clarity", "safety")
+
+# Critérios que a similaridade léxica não mede: só são preenchidos no match exato
+_SEMANTIC_CRITERIA = ("correctness", "safety")
+
+# Negações (já sem acentos, como `normalize_text`); "n't" vira "don"/"t" na tokenização
+_NEGATIONS = frozenset({
+    "nao", "nem", "nunca", "jamais", "nenhum", "nenhuma", "nada", "ninguem", "sem",
+    "not", "no", "never", "none", "nor", "nothing", "nobody", "neither", "without", "cannot",
+    "don", "doesn", "didn", "isn", "aren", "wasn", "weren", "won", "wouldn", "shouldn",
+    "couldn", "can", "hasn", "haven", "hadn", "mustn"
+})
+
+
+def normalize_text(text: str, normalization: str = "text") -> str:
+    """
+    Normaliza o texto antes da comparação.
+
+    Args:
+        text: Texto original
+        normalization: "text" (minúsculas, sem acentos e sem pontuação) ou
+            "whitespace" (só colapsa espaços; para código, onde pontuação e caixa importam)
+    """
+    if normalization == "whitespace":
+        return " ".join(text.split())
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(_TOKEN.findall(stripped))
+
+
+def tokenize(text: str, normalization: str = "text") -> List[str]:
+    return normalize_text(text, normalization).split()
+
+
+def is_critical_token(token: str) -> bool:
+    """Números e negações: trocar um deles muda o sentido da resposta"""
+    words = _TOKEN.findall(token.casefold())
+    return any(any(c.isdigit() for c in word) or word in _NEGATIONS for word in words)
+
+
+def critical_tokens_match(reference: List[str], candidate: List[str]) -> bool:
+    """Se números e negações aparecem iguais e na mesma ordem nas duas respostas"""
+    return (
+        [token for token in reference if is_critical_token(token)]
+        == [token for token in candidate if is_critical_token(token)]
+    )
+
+
+def token_f1(reference: List[str], candidate: List[str]) -> float:
+    """F1 de sobreposição de tokens (multiconjunto), como no SQuAD"""
+    if not reference or not candidate:
+        return float(reference == candidate)
+    common = sum((Counter(reference) & Counter(candidate)).values())
+    if not common:
+        return 0.0
+    precision = common / len(candidate)
+    recall = common / len(reference)
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_l(reference: List[str], candidate: List[str]) -> float:
+    """ROUGE-L (F1 da maior subsequência comum de tokens)"""
+    if not reference or not candidate:
+        return float(reference == candidate)
+    lcs = lcs_length(reference, candidate)
+    if not lcs:
+        return 0.0
+    precision = lcs / len(candidate)
+    recall = lcs / len(reference)
+    return 2 * precision * recall / (precision + recall)
+
+
+@dataclass
+class LexicalSimilarity:
+    """Similaridade entre resposta e referência (0-1)"""
+    exact_match: bool
+    token_f1: float
+    rouge_l: Optional[float]  # None quando não foi calculado (F1 já abaixo do limiar)
+    recall: float
+    critical_match: bool = True  # Números e negações iguais aos da referência
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for key in ("token_f1", "rouge_l", "recall"):
+            if data[key] is not None:
+                data[key] = round(data[key], 4)
+        return data
+
+
+class LexicalPreFilter:
+    """Decide quando a resposta é próxima o bastante da esperada para dispensar o modelo"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        exact_match: bool = True,
+        min_token_f1: float = 0.95,
+        min_rouge_l: float = 0.95,
+        max_tokens: int = 2000,
+        normalization: str = "text"
+    ):
+        """
+        Inicializa o pré-filtro.
+
+        Args:
+            enabled: Se False, toda resposta vai para o modelo
+            exact_match: Match exato normalizado recebe score 1.0 sem modelo
+            min_token_f1: F1 de tokens mínimo para o atalho (None desativa a similaridade)
+            min_rouge_l: ROUGE-L mínimo para o atalho
+            max_tokens: Respostas maiores não calculam ROUGE-L (LCS é quadrática)
+            normalization: "text" ou "whitespace" (ver `normalize_text`)
+        """
+        if normalization not in NORMALIZATIONS:
+            raise ValueError(f"Normalização desconhecida: {normalization}")
+        self.enabled = enabled
+        self.exact_match = exact_match
+        self.min_token_f1 = min_token_f1
+        self.min_rouge_l = min_rouge_l
+        self.max_tokens = max_tokens
+        self.normalization = normalization
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], kind: str = "response_quality") -> "LexicalPreFilter":
+        """Cria o pré-filtro a partir de `evaluation_types.<kind>.lexical_shortcircuit`"""
+        options = config.get("evaluation_types", {}).get(kind, {}).get("lexical_shortcircuit", config)
+        return cls(
+            enabled=options.get("enabled", True),
+            exact_match=options.get("exact_match", True),
+            min_token_f1=options.get("min_token_f1", 0.95),
+            min_rouge_l=options.get("min_rouge_l", 0.95),
+            max_tokens=options.get("max_tokens", 2000),
+            normalization=options.get("normalization", "text")
+        )
+
+    def similarity(self, expected_response: str, agent_response: str) -> LexicalSimilarity:
+        reference = tokenize(expected_response, self.normalization)
+        candidate = tokenize(agent_response, self.normalization)
+        if reference == candidate:
+            return LexicalSimilarity(True, 1.0, 1.0, 1.0)
+
+        f1 = token_f1(reference, candidate)
+        common = sum((Counter(reference) & Counter(candidate)).values())
+        recall = common / len(reference) if reference else 0.0
+        critical = critical_tokens_match(reference, candidate)
+        # ROUGE-L <= F1 de tokens (a LCS não passa das palavras em comum): só calcula
+        # a LCS quando o atalho ainda é possível
+        rouge = None
+        if (
+            critical
+            and self.min_token_f1 is not None
+            and f1 >= self.min_token_f1
+            and f1 >= self.min_rouge_l
+            and max(len(reference), len(candidate)) <= self.max_tokens
+        ):
+            rouge = rouge_l(reference, candidate)
+        return LexicalSimilarity(False, f1, rouge, recall, critical)
+
+    def evaluate(
+        self,
+        agent_response: str,
+        expected_response: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Avaliação sintetizada se a resposta bate com a esperada (None caso contrário).
+
+        Respostas só parecidas (não idênticas) precisam passar nos dois limiares e ter os
+        mesmos números e negações da esperada; correctness e safety não são sintetizados
+        nesse caso (a sobreposição de tokens não os mede).
+        """
+        if not self.enabled or not expected_response:
+            return None
+        similarity = self.similarity(expected_response, agent_response)
+
+        if similarity.exact_match:
+            if not self.exact_match:
+                return None
+            return self._evaluation(
+                similarity,
+                score=1.0,
+                justification="Resposta idêntica à esperada (após normalização).",
+                semantic=True
+            )
+
+        if similarity.rouge_l is not None and similarity.rouge_l >= self.min_rouge_l:
+            # Conservador: a menor das similaridades vira o score
+            score = min(similarity.token_f1, similarity.rouge_l)
+            return self._evaluation(
+                similarity,
+                score=score,
+                justification=(
+                    f"Resposta praticamente igual à esperada: F1 de tokens "
+                    f"{similarity.token_f1:.0%}, ROUGE-L {similarity.rouge_l:.0%}."
+                )
+            )
+        return None
+
+    @staticmethod
+    def _evaluation(
+        similarity: LexicalSimilarity,
+        score: float,
+        justification: str,
+        semantic: bool = False
+    ) -> Dict[str, Any]:
+        """Mesmo esquema da avaliação de resposta do modelo (`semantic` inclui correctness e safety)"""
+        evaluation: Dict[str, Any] = {"score": score}
+        for criterion in _CRITERIA:
+            if semantic or criterion not in _SEMANTIC_CRITERIA:
+                evaluation[criterion] = score
+        evaluation["completeness"] = similarity.recall
+        evaluation.update({
+            "justification": justification,
+            "strengths": ["Conteúdo equivalente à resposta esperada"],
+            "weaknesses": [],
+            "recommendations": [],
+            "source": "lexical",
+            "lexical_similarity": similarity.to_dict()
+        })
+        return evaluation
@@ -0,0 +1,199 @@
+"""
+Instrumentação do caminho crítico do LLM Judge.
+
+Este módulo fornece histogramas em processo para o tempo de cada fase de uma avaliação
+(construção do prompt, chamada ao modelo, parse, reporte ao Langfuse), tamanhos de
+prompt/resposta, caminho de parse e retries, com percentis p50/p95/p99 e exportação em
+formato texto do Prometheus ou como dicionário.
+"""
+
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Any, Deque, List, Optional, Sequence, Tuple
+
+# Limites (segundos) no estilo dos buckets padrão do Prometheus
+LATENCY_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+# Limites (caracteres) para tamanhos de prompt e resposta
+SIZE_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+
+RETRY_BUCKETS = (0, 1, 2, 3, 5, 10)
+
+
+class Histogram:
+    """Histograma cumulativo com amostras recentes para percentis exatos"""
+
+    def __init__(self, buckets: Sequence[float], max_samples: int = 10000):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def percentile(self, percentile: float) -> float:
+        return _pick(sorted(self.samples), percentile)
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((_format_bound(bound), total))
+        result.append(("+Inf", total + self.counts[-1]))
+        return result
+
+    def snapshot(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": _pick(ordered, 50),
+            "p95": _pick(ordered, 95),
+            "p99": _pick(ordered, 99),
+            "max": ordered[-1] if ordered else 0.0
+        }
+
+
+def _pick(ordered: List[float], percentile: float) -> float:
+    """Percentil por vizinho mais próximo de uma lista já ordenada"""
+    if not ordered:
+        return 0.0
+    index = min(int(round(percentile / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _format_bound(bound: float) -> str:
+    return f"{bound:g}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class JudgeInstrumentation:
+    """Métricas por fase das avaliações (thread-safe)"""
+
+    def __init__(self, namespace: str = "llm_judge", max_samples: int = 10000):
+        """
+        Inicializa a instrumentação.
+
+        Args:
+            namespace: Prefixo das métricas exportadas
+            max_samples: Amostras recentes mantidas por histograma (para percentis)
+        """
+        self.namespace = namespace
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._phases: Dict[str, Histogram] = {}
+        self._sizes: Dict[str, Histogram] = {}
+        self._retries = Histogram(RETRY_BUCKETS, max_samples)
+        self._counters: Dict[str, int] = defaultdict(int)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["JudgeInstrumentation"]:
+        """Cria a instrumentação a partir de `integrations.metrics` (None se desabilitada)"""
+        metrics = config.get("integrations", {}).get("metrics", config)
+        if not metrics.get("enabled", True):
+            return None
+        return cls(
+            namespace=metrics.get("namespace", "llm_judge"),
+            max_samples=metrics.get("max_samples", 10000)
+        )
+
+    def observe_phase(self, phase: str, seconds: float) -> None:
+        """Registra o tempo (segundos) de uma fase: prompt_build, model_call, parse, ..."""
+        with self._lock:
+            histogram = self._phases.get(phase)
+            if histogram is None:
+                histogram = self._phases[phase] = Histogram(LATENCY_BUCKETS, self.max_samples)
+            histogram.observe(seconds)
+
+    def observe_size(self, kind: str, chars: int) -> None:
+        """Registra um tamanho em caracteres: prompt ou completion"""
+        with self._lock:
+            histogram = self._sizes.get(kind)
+            if histogram is None:
+                histogram = self._sizes[kind] = Histogram(SIZE_BUCKETS, self.max_samples)
+            histogram.observe(chars)
+
+    def observe_retries(self, retries: int) -> None:
+        """Registra quantos retries uma chamada ao modelo precisou"""
+        with self._lock:
+            self._retries.observe(retries)
+            self._counters["retries"] += retries
+
+    def increment(self, event: str, amount: int = 1) -> None:
+        """Incrementa um contador (ex: parse_direct, parse_extracted, parse_fallback, cache_hit)"""
+        with self._lock:
+            self._counters[event] += amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self._phases.clear()
+            self._sizes.clear()
+            self._retries = Histogram(RETRY_BUCKETS, self.max_samples)
+            self._counters.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado atual como dicionário simples"""
+        with self._lock:
+            return {
+                "phases": {name: hist.snapshot() for name, hist in sorted(self._phases.items())},
+                "sizes": {name: hist.snapshot() for name, hist in sorted(self._sizes.items())},
+                "retries": self._retries.snapshot(),
+                "counters": dict(sorted(self._counters.items()))
+            }
+
+    def to_prometheus(self) -> str:
+        """Exporta no formato texto de exposição do Prometheus"""
+        ns = self.namespace
+        lines: List[str] = []
+        with self._lock:
+            lines.append(f"# HELP {ns}_phase_seconds Tempo por fase da avaliação")
+            lines.append(f"# TYPE {ns}_phase_seconds histogram")
+            for phase, histogram in sorted(self._phases.items()):
+                self._histogram_lines(lines, f"{ns}_phase_seconds", histogram, f'phase="{_escape(phase)}"')
+
+            lines.append(f"# HELP {ns}_size_chars Tamanho de prompts e respostas em caracteres")
+            lines.append(f"# TYPE {ns}_size_chars histogram")
+            for kind, histogram in sorted(self._sizes.items()):
+                self._histogram_lines(lines, f"{ns}_size_chars", histogram, f'kind="{_escape(kind)}"')
+
+            lines.append(f"# HELP {ns}_retries Retries por chamada ao modelo")
+            lines.append(f"# TYPE {ns}_retries histogram")
+            self._histogram_lines(lines, f"{ns}_retries", self._retries, "")
+
+            lines.append(f"# HELP {ns}_events_total Eventos do judge (caminho de parse, cache, ...)")
+            lines.append(f"# TYPE {ns}_events_total counter")
+            for event, value in sorted(self._counters.items()):
+                lines.append(f'{ns}_events_total{{event="{_escape(event)}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(
+        lines: List[str],
+        name: str,
+        histogram: Histogram,
+        labels: str
+    ) -> None:
+        prefix = f"{labels}," if labels else ""
+        for bound, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {histogram.sum}")
+        lines.append(f"{name}_count{suffix} {histogram.count}")
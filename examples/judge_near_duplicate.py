@@ -0,0 +1,344 @@
+"""
+Reaproveitamento de avaliações de respostas quase idênticas (MinHash + LSH).
+
+O cache exato (`judge_cache.py`) só acerta quando o prompt é idêntico byte a byte. Em
+produção, respostas à mesma pergunta costumam diferir só em espaços, timestamps ou uma
+palavra. Este módulo fornece o `NearDuplicateIndex`: cada par (pergunta, resposta) é
+normalizado, quebrado em shingles de palavras e resumido em uma assinatura MinHash; um
+índice LSH por bandas encontra candidatos e a similaridade de Jaccard estimada decide o
+reaproveitamento. Avaliações só são reaproveitadas dentro do mesmo escopo (modelo,
+critérios, resposta esperada e contexto), e o resultado registra a procedência.
+
+As bandas ficam em arrays NumPy ordenados (busca binária) mais um buffer de inserções
+recentes, então a consulta é sub-milissegundo mesmo com milhões de entradas. Requer
+`numpy`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import zlib
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from examples.judge_lexical import normalize_text
+from examples.judge_results import EvaluationResult
+
+logger = logging.getLogger(__name__)
+
+_PRIME = np.uint64((1 << 61) - 1)
+_FNV_PRIME = np.uint64(0x100000001B3)
+_FORMAT_VERSION = 1
+
+# Datas, horários e identificadores que mudam a cada execução sem mudar o conteúdo
+_VOLATILE = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+    r"|\b\d{1,2}:\d{2}(?::\d{2})?\b"
+    r"|\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b",
+    re.IGNORECASE
+)
+
+
+def shingles(text: str, size: int, prefix: str, mask_volatile: bool = True) -> List[str]:
+    """Shingles de `size` palavras do texto normalizado (textos curtos viram um único shingle)"""
+    if mask_volatile:
+        text = _VOLATILE.sub(" volatile ", text)
+    tokens = normalize_text(text).split()
+    if len(tokens) <= size:
+        return [f"{prefix} {' '.join(tokens)}"]
+    return [f"{prefix} {' '.join(tokens[i:i + size])}" for i in range(len(tokens) - size + 1)]
+
+
+@dataclass
+class NearDuplicateStats:
+    """Contadores do índice"""
+    lookups: int = 0
+    hits: int = 0
+    candidates: int = 0
+    expired: int = 0
+    merges: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+class NearDuplicateIndex:
+    """Índice MinHash/LSH de avaliações por (pergunta, resposta) normalizadas"""
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 2,
+        mask_volatile: bool = True,
+        max_age_seconds: Optional[float] = None,
+        max_candidates: int = 64,
+        keep_text: bool = True,
+        persistent_path: Optional[str] = None,
+        seed: int = 1,
+        enabled: bool = True
+    ):
+        """
+        Inicializa o índice.
+
+        Args:
+            threshold: Jaccard estimado mínimo para reaproveitar uma avaliação
+            num_perm: Permutações do MinHash (precisão da estimativa)
+            bands: Bandas do LSH (`num_perm` precisa ser múltiplo); mais bandas encontram
+                candidatos com similaridade menor, ao custo de memória
+            shingle_size: Palavras por shingle
+            mask_volatile: Ignora datas, horários e UUIDs
+            max_age_seconds: Idade máxima de uma avaliação reaproveitada (None: sem limite)
+            max_candidates: Candidatos verificados por consulta
+            keep_text: Guarda justificativa e listas (False: só scores e campos extras)
+            persistent_path: Arquivo `.npz` carregado na criação e usado por `save()`
+            seed: Semente das permutações (fixa para o índice persistido continuar válido)
+            enabled: Permite desligar o índice sem remover a integração
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm deve ser múltiplo de bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.mask_volatile = mask_volatile
+        self.max_age_seconds = max_age_seconds
+        self.max_candidates = max_candidates
+        self.keep_text = keep_text
+        self.persistent_path = persistent_path
+        self.seed = seed
+        self.enabled = enabled
+        self.stats = NearDuplicateStats()
+
+        rng = np.random.RandomState(seed)
+        # a, b < 2^31 e hashes < 2^32: a * h + b cabe em uint64 sem overflow
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+        # Assinaturas b-bit (16 bits por permutação): metade da memória, viés ~1/65536
+        self._signatures = np.zeros((1024, num_perm), dtype=np.uint16)
+        self._scopes = np.zeros(1024, dtype=np.uint64)
+        self._created_at = np.zeros(1024, dtype=np.float64)
+        self._evaluations: List[EvaluationResult] = []
+        # Bandas já mescladas: chaves ordenadas e IDs correspondentes, uma linha por banda
+        self._sorted_keys = np.zeros((bands, 0), dtype=np.uint64)
+        self._sorted_ids = np.zeros((bands, 0), dtype=np.uint32)
+        # Inserções ainda não mescladas: (banda, chave) -> IDs
+        self._pending: Dict[Tuple[int, int], List[int]] = {}
+        self._merged = 0
+
+        if persistent_path and os.path.exists(persistent_path):
+            self._load(persistent_path)
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Dict[str, Any],
+        persistent_path: Optional[str] = None
+    ) -> "NearDuplicateIndex":
+        """Cria o índice a partir de `cost_optimization.near_duplicate`"""
+        options = config.get("cost_optimization", {}).get("near_duplicate", config)
+        return cls(
+            threshold=options.get("threshold", 0.85),
+            num_perm=options.get("num_perm", 64),
+            bands=options.get("bands", 16),
+            shingle_size=options.get("shingle_size", 2),
+            mask_volatile=options.get("mask_volatile", True),
+            max_age_seconds=options.get("max_age_seconds"),
+            max_candidates=options.get("max_candidates", 64),
+            keep_text=options.get("keep_text", True),
+            persistent_path=persistent_path or options.get("persistent_path"),
+            enabled=options.get("enabled", True)
+        )
+
+    def __len__(self) -> int:
+        return len(self._evaluations)
+
+    @staticmethod
+    def scope_key(*parts: Any) -> int:
+        """Escopo de reaproveitamento: só entradas com o mesmo escopo são comparadas"""
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return int.from_bytes(hashlib.blake2b(payload.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def signature(self, user_query: str, agent_response: str) -> np.ndarray:
+        """Assinatura MinHash de (pergunta, resposta)"""
+        items = (
+            shingles(user_query, self.shingle_size, "q", self.mask_volatile)
+            + shingles(agent_response, self.shingle_size, "r", self.mask_volatile)
+        )
+        hashes = np.fromiter(
+            (zlib.crc32(item.encode("utf-8")) for item in set(items)),
+            dtype=np.uint64
+        )
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return (permuted.min(axis=1) & np.uint64(0xFFFF)).astype(np.uint16)
+
+    def _band_keys(self, signatures: np.ndarray, scopes: np.ndarray) -> np.ndarray:
+        """Chave de cada banda (FNV-1a sobre as linhas da banda, semeada pelo escopo)"""
+        rows = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        keys = np.repeat(scopes[:, None], self.bands, axis=1)
+        for row in range(self.rows):
+            keys = (keys ^ rows[:, :, row]) * _FNV_PRIME
+        return keys  # (entradas, bandas)
+
+    def lookup(self, signature: np.ndarray, scope: int) -> Optional[Dict[str, Any]]:
+        """
+        Procura uma avaliação de um par quase idêntico.
+
+        Returns:
+            Cópia da avaliação com `source: "near_duplicate"` e `provenance`, ou None
+        """
+        if not self.enabled:
+            return None
+        self.stats.lookups += 1
+        if not self._evaluations:
+            return None
+        keys = self._band_keys(signature[None, :], np.array([scope], dtype=np.uint64))[0]
+
+        candidates: List[int] = []
+        for band, key in enumerate(keys):
+            sorted_keys = self._sorted_keys[band]
+            left = np.searchsorted(sorted_keys, key, side="left")
+            right = np.searchsorted(sorted_keys, key, side="right")
+            candidates.extend(self._sorted_ids[band, left:right].tolist())
+            candidates.extend(self._pending.get((band, int(key)), ()))
+        if not candidates:
+            return None
+
+        ids, counts = np.unique(np.array(candidates, dtype=np.int64), return_counts=True)
+        if len(ids) > self.max_candidates:
+            # Prioriza quem compartilha mais bandas com a consulta
+            ids = ids[np.argsort(-counts, kind="stable")[:self.max_candidates]]
+        ids = ids[self._scopes[ids] == np.uint64(scope)]
+        self.stats.candidates += len(ids)
+        if self.max_age_seconds is not None and len(ids):
+            fresh = self._created_at[ids] >= time.time() - self.max_age_seconds
+            self.stats.expired += int(len(ids) - fresh.sum())
+            ids = ids[fresh]
+        if not len(ids):
+            return None
+
+        similarities = (self._signatures[ids] == signature[None, :]).mean(axis=1)
+        best = int(similarities.argmax())
+        if similarities[best] < self.threshold:
+            return None
+
+        entry = int(ids[best])
+        self.stats.hits += 1
+        evaluation = self._evaluations[entry].to_dict()
+        evaluation["provenance"] = {
+            "entry": entry,
+            "similarity": round(float(similarities[best]), 4),
+            "created_at": float(self._created_at[entry]),
+            "original_source": evaluation.get("source", "model")
+        }
+        evaluation["source"] = "near_duplicate"
+        return evaluation
+
+    def add(self, signature: np.ndarray, scope: int, evaluation: Dict[str, Any]) -> int:
+        """Indexa uma avaliação (avaliações com erro são ignoradas); retorna o ID da entrada"""
+        if not self.enabled or evaluation.get("error"):
+            return -1
+        entry = len(self._evaluations)
+        if entry == len(self._scopes):
+            self._grow()
+        self._signatures[entry] = signature
+        self._scopes[entry] = scope
+        self._created_at[entry] = time.time()
+        self._evaluations.append(EvaluationResult.from_dict(evaluation, keep_text=self.keep_text))
+
+        keys = self._band_keys(signature[None, :], np.array([scope], dtype=np.uint64))[0]
+        for band, key in enumerate(keys):
+            self._pending.setdefault((band, int(key)), []).append(entry)
+        # Mescla quando o buffer passa de 1/8 do índice: custo amortizado O(log n) por inserção
+        if len(self) - self._merged >= max(4096, self._merged // 8):
+            self._merge()
+        return entry
+
+    def _grow(self) -> None:
+        capacity = len(self._scopes) * 2
+        self._signatures = np.resize(self._signatures, (capacity, self.num_perm))
+        self._scopes = np.resize(self._scopes, capacity)
+        self._created_at = np.resize(self._created_at, capacity)
+
+    def _merge(self) -> None:
+        """Reconstrói as bandas ordenadas com todas as entradas"""
+        count = len(self)
+        keys = self._band_keys(self._signatures[:count], self._scopes[:count]).T
+        order = np.argsort(keys, axis=1, kind="stable")
+        self._sorted_keys = np.take_along_axis(keys, order, axis=1)
+        self._sorted_ids = order.astype(np.uint32)
+        self._pending.clear()
+        self._merged = count
+        self.stats.merges += 1
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Grava o índice em `.npz` (sem pickle); as bandas são reconstruídas no carregamento"""
+        path = path or self.persistent_path
+        if not path:
+            raise ValueError("Informe o caminho ou configure persistent_path")
+        count = len(self)
+        blobs = [evaluation.to_bytes() for evaluation in self._evaluations]
+        offsets = np.cumsum([0] + [len(blob) for blob in blobs], dtype=np.int64)
+        meta = {
+            "version": _FORMAT_VERSION,
+            "num_perm": self.num_perm,
+            "seed": self.seed,
+            "shingle_size": self.shingle_size,
+            "mask_volatile": self.mask_volatile
+        }
+        # Grava em arquivo temporário e renomeia: um índice interrompido não corrompe o anterior
+        temporary = f"{path}.tmp.npz"
+        np.savez(
+            temporary,
+            meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+            signatures=self._signatures[:count],
+            scopes=self._scopes[:count],
+            created_at=self._created_at[:count],
+            offsets=offsets,
+            evaluations=np.frombuffer(b"".join(blobs), dtype=np.uint8)
+        )
+        os.replace(temporary, path)
+
+    def _load(self, path: str) -> None:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data["meta"].tobytes())
+            expected = {
+                "version": _FORMAT_VERSION,
+                "num_perm": self.num_perm,
+                "seed": self.seed,
+                "shingle_size": self.shingle_size,
+                "mask_volatile": self.mask_volatile
+            }
+            if meta != expected:
+                logger.warning(f"Índice em {path} criado com outros parâmetros ({meta}), ignorando")
+                return
+            count = len(data["scopes"])
+            capacity = max(1024, count)
+            self._signatures = np.zeros((capacity, self.num_perm), dtype=np.uint16)
+            self._signatures[:count] = data["signatures"]
+            self._scopes = np.zeros(capacity, dtype=np.uint64)
+            self._scopes[:count] = data["scopes"]
+            self._created_at = np.zeros(capacity, dtype=np.float64)
+            self._created_at[:count] = data["created_at"]
+            offsets = data["offsets"]
+            blob = data["evaluations"].tobytes()
+        self._evaluations = [
+            EvaluationResult.from_bytes(blob[offsets[i]:offsets[i + 1]])
+            for i in range(count)
+        ]
+        if count:
+            self._merge()
@@ -0,0 +1,192 @@
+"""
+Perfis de saída do judge: avaliação completa ou só scores.
+
+Cada template pede por padrão justificativa, pontos fortes, pontos fracos e
+recomendações: centenas de tokens de saída que a avaliação online (gating) descarta, e
+o tempo de geração cresce com os tokens de saída. Este módulo deriva, da especificação
+de saída completa de cada template, versões enxutas:
+
+- `full`: especificação original
+- `scores_reason`: só os scores e uma frase curta (`reason`)
+- `scores_only`: só os scores
+
+Cada perfil tem um JSON Schema compacto correspondente (também usável como
+`response_schema` do provedor), e o `OutputValidator` aplica as regras de
+`robustness.validation` (`require_score`, `require_justification`, min/max).
+"""
+
+from typing import Dict, Any, List, Tuple
+
+OUTPUT_PROFILES = ("full", "scores_reason", "scores_only")
+
+# Campos de texto livre removidos nos perfis enxutos
+VERBOSE_FIELDS = frozenset({
+    "justification",
+    "strengths",
+    "weaknesses",
+    "recommendations",
+    "comparison",
+    "reasoning",
+    "strengths_by_response",
+    "weaknesses_by_response",
+    "potential_bugs",
+    "detailed_analysis"
+})
+
+REASON_DESCRIPTION = "uma única frase curta (até 20 palavras) com o principal motivo do score"
+
+# Valor de exemplo de cada tipo no esqueleto do JSON esperado
+_SKELETON = {"number": "0.0", "integer": "0", "boolean": "false", "string": '"..."', "array": "[]"}
+
+
+def check_profile(profile: str) -> str:
+    if profile not in OUTPUT_PROFILES:
+        raise ValueError(f"Perfil de saída desconhecido: {profile}")
+    return profile
+
+
+def parse_output_spec(spec: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Separa a especificação de saída em cabeçalho e campos (`- nome: descrição`)"""
+    header, *lines = spec.strip().split("\n")
+    fields = []
+    for line in lines:
+        name, _, description = line.strip().lstrip("- ").partition(":")
+        fields.append((name.strip(), description.strip()))
+    return header, fields
+
+
+def _field_schema(name: str, description: str) -> Dict[str, Any]:
+    """Tipo JSON de um campo, inferido da descrição usada no prompt"""
+    if name in VERBOSE_FIELDS or name in ("id", "reason", "summary"):
+        if description.startswith(("lista", "possíveis", "pontos")):
+            return {"type": "array"}
+        return {"type": "string"}
+    if "(boolean)" in description:
+        return {"type": "boolean"}
+    if description.startswith("lista ordenada de índices"):
+        return {"type": "array", "items": {"type": "integer"}}
+    if "para cada resposta" in description:
+        return {"type": "array", "items": {"type": "number", "minimum": 0, "maximum": 1}}
+    if name == "winner":
+        return {"type": "integer"}
+    return {"type": "number", "minimum": 0, "maximum": 1}
+
+
+def profile_fields(spec: str, profile: str) -> List[Tuple[str, str]]:
+    """Campos pedidos ao modelo em um perfil"""
+    _, fields = parse_output_spec(spec)
+    if check_profile(profile) == "full":
+        return fields
+    kept = [(name, description) for name, description in fields if name not in VERBOSE_FIELDS]
+    if profile == "scores_reason":
+        kept.append(("reason", REASON_DESCRIPTION))
+    return kept
+
+
+def output_schema(spec: str, profile: str = "full") -> Dict[str, Any]:
+    """JSON Schema da saída de um perfil (array de objetos em templates empacotados)"""
+    header, _ = parse_output_spec(spec)
+    fields = profile_fields(spec, profile)
+    schema: Dict[str, Any] = {
+        "type": "object",
+        "properties": {name: _field_schema(name, description) for name, description in fields},
+        "required": [name for name, _ in fields]
+    }
+    if "array JSON" in header:
+        return {"type": "array", "items": schema}
+    return schema
+
+
+def profile_output_spec(spec: str, profile: str) -> str:
+    """Especificação de saída do perfil, com um esqueleto do JSON compacto esperado"""
+    if check_profile(profile) == "full":
+        return spec
+    header, _ = parse_output_spec(spec)
+    fields = profile_fields(spec, profile)
+    lines = [header] + [f"- {name}: {description}" for name, description in fields]
+
+    schema = output_schema(spec, profile)
+    item = schema.get("items", schema)
+    example = "{" + ",".join(
+        f'"{name}":{_SKELETON[field["type"]]}' for name, field in item["properties"].items()
+    ) + "}"
+    if item is not schema:
+        example = f"[{example},...]"
+    lines.append(f"Responda só com o JSON compacto, em uma linha, sem outros campos ou texto:\n{example}")
+    return "\n".join(lines)
+
+
+class OutputValidator:
+    """Validação rápida de uma avaliação contra o esquema do perfil e `robustness.validation`"""
+
+    def __init__(
+        self,
+        require_score: bool = True,
+        require_justification: bool = True,
+        min_score: float = 0.0,
+        max_score: float = 1.0
+    ):
+        """
+        Inicializa o validador.
+
+        Args:
+            require_score: Exige o score geral (`score`, ou `scores` em comparações)
+            require_justification: Exige o texto do perfil (`justification` no completo,
+                `reason` em `scores_reason`; ignorado em `scores_only`)
+            min_score: Menor valor aceito em campos numéricos de score
+            max_score: Maior valor aceito em campos numéricos de score
+        """
+        self.require_score = require_score
+        self.require_justification = require_justification
+        self.min_score = min_score
+        self.max_score = max_score
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "OutputValidator":
+        """Cria o validador a partir de `robustness.validation`"""
+        validation = config.get("robustness", {}).get("validation", config)
+        return cls(
+            require_score=validation.get("require_score", True),
+            require_justification=validation.get("require_justification", True),
+            min_score=validation.get("min_score", 0.0),
+            max_score=validation.get("max_score", 1.0)
+        )
+
+    def _in_range(self, value: Any) -> bool:
+        return (
+            isinstance(value, (int, float))
+            and not isinstance(value, bool)
+            and self.min_score <= value <= self.max_score
+        )
+
+    def validate(self, evaluation: Dict[str, Any], schema: Dict[str, Any]) -> List[str]:
+        """
+        Problemas da avaliação (lista vazia = válida).
+
+        Args:
+            evaluation: Objeto JSON devolvido pelo judge (um item, em templates empacotados)
+            schema: `output_schema` do template/perfil usado no prompt
+        """
+        properties = schema.get("items", schema)["properties"]
+        errors = []
+        if self.require_score:
+            for name in ("score", "scores"):
+                if name in properties and name not in evaluation:
+                    errors.append(f"campo obrigatório ausente: {name}")
+        if self.require_justification:
+            for name in ("justification", "reason"):
+                if name in properties:
+                    text = evaluation.get(name)
+                    if not isinstance(text, str) or not text.strip():
+                        errors.append(f"campo obrigatório ausente: {name}")
+
+        for name, field in properties.items():
+            if name not in evaluation:
+                continue
+            value = evaluation[name]
+            if field.get("type") == "number" and not self._in_range(value):
+                errors.append(f"{name} fora de [{self.min_score}, {self.max_score}]: {value!r}")
+            elif field.get("items", {}).get("type") == "number":
+                if not isinstance(value, list) or not all(self._in_range(v) for v in value):
+                    errors.append(f"{name} deve ser lista de scores em [{self.min_score}, {self.max_score}]")
+        return errors
@@ -0,0 +1,342 @@
+"""
+Orçamento de tokens e compactação de prompts do LLM Judge.
+
+Este módulo fornece um estimador local (rápido) de tokens e a compactação das partes
+variáveis de um prompt para caber em um orçamento: truncamento pelo meio, remoção de
+fontes duplicadas, descarte de contexto vazio e priorização das partes mais relevantes
+para os critérios avaliados. Cada compactação é registrada em um `CompactionReport`.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Union, Iterable
+
+# Média aproximada para português/inglês em tokenizers BPE modernos
+CHARS_PER_TOKEN = 3.5
+
+# Nenhuma parte mantida é reduzida abaixo disso (em tokens); se nem esses mínimos
+# cabem no orçamento, as partes de menor prioridade são descartadas
+MIN_FIELD_TOKENS = 32
+
+# Partes avaliadas: nunca são descartadas (cada uma, e cada item de uma lista, mantém ao
+# menos `MIN_FIELD_TOKENS`); um orçamento que não comporta esses mínimos é um erro
+EVALUATED_FIELDS = frozenset({"agent_response", "responses", "current_response", "code"})
+
+FieldValue = Union[str, List[str]]
+
+# Prioridade base das partes variáveis de cada template
+_FIELD_PRIORITIES: Dict[str, Dict[str, float]] = {
+    "trajectory": {"context": 1.0},
+    "trajectory_correctness": {"context": 1.0},
+    "response_quality": {
+        "user_query": 3.0,
+        "agent_response": 3.0,
+        "expected_response": 2.0,
+        "context": 1.0
+    },
+    "comparative": {"user_query": 3.0, "responses": 3.0, "context": 1.0},
+    "conversational": {"current_response": 3.0, "history": 2.0, "context": 1.0},
+    "code_quality": {"user_query": 2.0, "code": 3.0, "context": 1.0},
+    "rag_quality": {
+        "user_query": 3.0,
+        "agent_response": 3.0,
+        "sources": 2.0,
+        "context": 1.0
+    }
+}
+
+# Critérios que dependem mais de determinadas partes do prompt
+_CRITERIA_BOOSTS: Dict[str, Dict[str, float]] = {
+    "correctness": {"expected_response": 1.0, "code": 1.0},
+    "completeness": {"expected_response": 0.5, "agent_response": 0.5},
+    "coherence": {"history": 1.5},
+    "groundedness": {"sources": 1.5},
+    "citation_accuracy": {"sources": 1.0},
+    "attribution": {"sources": 0.5},
+    "source_relevance": {"sources": 0.5},
+    "security": {"code": 0.5},
+    "documentation": {"code": 0.5}
+}
+
+
+def estimate_tokens(text: FieldValue) -> int:
+    """Estimativa rápida do número de tokens (sem tokenizer)"""
+    if isinstance(text, list):
+        return sum(estimate_tokens(item) for item in text)
+    if not text:
+        return 0
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def truncate_middle(text: str, max_tokens: int) -> str:
+    """
+    Reduz o texto para caber em `max_tokens`, mantendo início e fim.
+
+    Início e fim costumam concentrar a pergunta/conclusão, então o corte é no meio
+    e marcado explicitamente para o judge.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # `estimate_tokens` arredonda para cima: reserva um token para não passar do limite
+    max_chars = max(int((max_tokens - 1) * CHARS_PER_TOKEN), 0)
+
+    omitted = len(text) - max_chars
+    marker = f"\n[... {omitted} caracteres omitidos ...]\n"
+    if len(marker) >= max_chars:
+        # Limite menor que o próprio marcador: só o início cabe
+        return text[:max_chars]
+    keep = max(max_chars - len(marker), 0)
+    head = (keep * 3) // 5
+    tail = keep - head
+    return text[:head] + marker + (text[-tail:] if tail else "")
+
+
+def dedupe_sources(sources: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Remove fontes com conteúdo repetido (ignorando caixa e espaços)"""
+    seen = set()
+    unique = []
+    for source in sources:
+        normalized = " ".join(str(source.get("content", "")).lower().split())
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        unique.append(source)
+    return unique
+
+
+@dataclass
+class CompactionReport:
+    """Registro do que foi compactado em um prompt"""
+    budget_tokens: Optional[int] = None
+    original_tokens: int = 0
+    final_tokens: int = 0
+    actions: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def trimmed(self) -> bool:
+        return bool(self.actions)
+
+    def record(
+        self,
+        field_name: str,
+        action: str,
+        original_tokens: int = 0,
+        kept_tokens: int = 0,
+        **details: Any
+    ) -> None:
+        self.actions.append({
+            "field": field_name,
+            "action": action,
+            "original_tokens": original_tokens,
+            "kept_tokens": kept_tokens,
+            **details
+        })
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "original_tokens": self.original_tokens,
+            "final_tokens": self.final_tokens,
+            "actions": list(self.actions)
+        }
+
+
+def field_priorities(
+    kind: str,
+    criteria: Optional[Iterable[str]] = None
+) -> Dict[str, float]:
+    """Prioridades das partes do template, ajustadas pelos critérios avaliados"""
+    priorities = dict(_FIELD_PRIORITIES.get(kind, {}))
+    for criterion in criteria or ():
+        for field_name, boost in _CRITERIA_BOOSTS.get(criterion, {}).items():
+            if field_name in priorities:
+                priorities[field_name] += boost
+    return priorities
+
+
+def compact_fields(
+    fields: Dict[str, FieldValue],
+    budget_tokens: int,
+    priorities: Dict[str, float],
+    report: Optional[CompactionReport] = None,
+    required: Optional[Iterable[str]] = None
+) -> Dict[str, FieldValue]:
+    """
+    Compacta as partes variáveis de um prompt para caber no orçamento.
+
+    O orçamento é distribuído por prioridade (water-filling): partes que cabem na sua
+    fatia ficam inteiras e a sobra é redistribuída entre as maiores, que são truncadas
+    pelo meio. Partes em lista (ex: fontes) dividem sua fatia entre os itens.
+
+    Args:
+        fields: Partes variáveis (texto ou lista de textos)
+        budget_tokens: Orçamento de tokens para as partes variáveis
+        priorities: Peso de cada parte (partes sem peso recebem 1.0)
+        report: Registro opcional do que foi compactado
+        required: Partes que nunca são descartadas (padrão: `EVALUATED_FIELDS`)
+
+    Returns:
+        Novas partes compactadas
+
+    Raises:
+        ValueError: Se o orçamento não comporta o mínimo das partes obrigatórias
+    """
+    required = set(EVALUATED_FIELDS if required is None else required) & set(fields)
+    sizes = {name: estimate_tokens(value) for name, value in fields.items()}
+    total = sum(sizes.values())
+    if report is not None:
+        report.budget_tokens = budget_tokens
+        report.original_tokens = total
+        report.final_tokens = total
+
+    if total <= budget_tokens:
+        return dict(fields)
+
+    # Listas obrigatórias precisam do mínimo em cada item, não só no total
+    floors = {
+        name: sum(_floor(estimate_tokens(item)) for item in fields[name])
+        for name in required if isinstance(fields[name], list)
+    }
+    allotment = _allocate(sizes, budget_tokens, priorities, required, floors)
+    compacted: Dict[str, FieldValue] = {}
+    for name, value in fields.items():
+        limit = allotment[name]
+        if sizes[name] <= limit:
+            compacted[name] = value
+            continue
+
+        if limit == 0:
+            compacted[name] = [] if isinstance(value, list) else ""
+            if report is not None:
+                report.record(name, "dropped", original_tokens=sizes[name])
+            continue
+
+        if isinstance(value, list):
+            item_sizes = {str(i): estimate_tokens(item) for i, item in enumerate(value)}
+            item_limits = _allocate(item_sizes, limit, {}, item_sizes if name in required else ())
+            # Itens descartados viram "" para manter o alinhamento com a lista original
+            compacted[name] = [
+                truncate_middle(item, item_limits[str(i)]) if item_limits[str(i)] else ""
+                for i, item in enumerate(value)
+            ]
+        else:
+            compacted[name] = truncate_middle(value, limit)
+
+        if report is not None:
+            report.record(
+                name,
+                "truncated_middle",
+                original_tokens=sizes[name],
+                kept_tokens=estimate_tokens(compacted[name])
+            )
+
+    if report is not None:
+        report.final_tokens = sum(estimate_tokens(value) for value in compacted.values())
+    return compacted
+
+
+def _floor(size: int) -> int:
+    return min(size, MIN_FIELD_TOKENS)
+
+
+def _allocate(
+    sizes: Dict[str, int],
+    budget_tokens: int,
+    priorities: Dict[str, float],
+    required: Iterable[str] = (),
+    floors: Optional[Dict[str, int]] = None
+) -> Dict[str, int]:
+    """
+    Distribui o orçamento por prioridade; partes pequenas ficam inteiras.
+
+    Partes em `required` nunca recebem menos que o seu mínimo (`floors` ou
+    `MIN_FIELD_TOKENS`); as demais são descartadas (0) se os mínimos não couberem.
+    """
+    required = set(required)
+    floors = floors or {}
+
+    def floor(name: str) -> int:
+        return floors.get(name, _floor(sizes[name]))
+
+    needed = sum(floor(name) for name in required)
+    if needed > budget_tokens:
+        raise ValueError(
+            f"Orçamento de {budget_tokens} tokens não comporta o mínimo de {needed} tokens "
+            f"das partes avaliadas ({', '.join(sorted(required))})"
+        )
+
+    allotment: Dict[str, int] = {}
+    pending = set(sizes)
+    remaining = budget_tokens
+
+    while pending:
+        total_weight = sum(priorities.get(name, 1.0) for name in pending)
+        fits = [
+            name for name in pending
+            if sizes[name] <= remaining * priorities.get(name, 1.0) / total_weight
+        ]
+        if not fits:
+            break
+        for name in fits:
+            allotment[name] = sizes[name]
+            remaining -= sizes[name]
+            pending.discard(name)
+
+    if not pending:
+        return allotment
+
+    remaining = max(remaining, 0)
+    if sum(floor(name) for name in pending & required) > remaining:
+        # As partes inteiras consumiram o espaço dos mínimos obrigatórios: refaz a
+        # divisão só com mínimos e fatias
+        allotment, pending, remaining = {}, set(sizes), budget_tokens
+
+    # Mínimos primeiro: obrigatórias, depois as que couberem por prioridade (na ordem
+    # original em empates); as demais recebem 0 e são descartadas
+    ranked = sorted(
+        (name for name in sizes if name in pending),
+        key=lambda name: (name not in required, -priorities.get(name, 1.0))
+    )
+    kept: List[str] = []
+    free = remaining
+    for name in ranked:
+        if floor(name) > free:
+            break
+        kept.append(name)
+        free -= floor(name)
+    for name in ranked[len(kept):]:
+        allotment[name] = 0
+
+    # Fatias proporcionais; quem ficaria abaixo do mínimo recebe o mínimo e o resto é
+    # redistribuído entre as demais (o total nunca passa do orçamento)
+    floored: Dict[str, int] = {}
+    while True:
+        rest = [name for name in kept if name not in floored]
+        free = remaining - sum(floored.values())
+        total_weight = sum(priorities.get(name, 1.0) for name in rest)
+        shares = {
+            name: int(free * priorities.get(name, 1.0) / total_weight)
+            for name in rest
+        }
+        low = [name for name in rest if shares[name] < floor(name)]
+        if not low:
+            break
+        for name in low:
+            floored[name] = floor(name)
+
+    allotment.update(floored)
+    allotment.update(shares)
+    return allotment
+
+
+def prompt_budgets_from_config(config: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Orçamentos por tipo de prompt de `cost_optimization.prompt_budget`.
+
+    Retorna um dicionário vazio (sem compactação) quando `enabled` é false.
+    """
+    budget = config.get("cost_optimization", {}).get("prompt_budget", config)
+    if not budget.get("enabled", True):
+        return {}
+    return dict(budget.get("token_budgets", {}))
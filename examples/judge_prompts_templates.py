@@ -2,21 +2,467 @@
 Templates de prompts para diferentes tipos de avaliação com LLM Judge.
 
 Este módulo fornece templates reutilizáveis para diferentes cenários de avaliação.
+
+Os templates são compilados uma vez por conjunto de critérios: instruções, critérios,
+escala e formato de saída formam um prefixo estável (reaproveitável pelo cache de
+prefixo/contexto do provedor) e os dados do item vão em um sufixo variável.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+from functools import lru_cache
+import hashlib
 import json
 
+from examples.judge_output_profiles import output_schema, profile_output_spec
+from examples.judge_prompt_budget import (
+    CompactionReport,
+    FieldValue,
+    compact_fields,
+    dedupe_sources,
+    estimate_tokens,
+    field_priorities
+)
+
+# Limite por fonte quando não há orçamento de tokens definido
+DEFAULT_SOURCE_CHARS = 200
+
+
+def compact_json(value: Any) -> str:
+    """Serializa em JSON compacto (sem indentação nem espaços extras)"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+SCORE_SCALE = """Escala de Pontuação:
+- 0.0-0.3: Insatisfatório
+- 0.4-0.6: Aceitável
+- 0.7-0.8: Bom
+- 0.9-1.0: Excelente"""
+
+
+class CompiledPromptTemplate:
+    """Template com prefixo estático pré-renderizado e sufixo variável"""
+
+    __slots__ = ("name", "prefix", "prefix_hash", "suffix_format", "output_schema")
+
+    def __init__(
+        self,
+        name: str,
+        instruction: str,
+        criteria_header: str,
+        criteria: Dict[str, str],
+        output_spec: str,
+        suffix_format: str,
+        scale: Optional[str] = None,
+        output_schema: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Compila o template.
+
+        Args:
+            name: Nome do tipo de avaliação
+            instruction: Instrução de papel do judge
+            criteria_header: Cabeçalho da seção de critérios
+            criteria: Critérios de avaliação (chave -> pergunta)
+            output_spec: Descrição do JSON esperado
+            suffix_format: Formato (`str.format`) dos dados variáveis do item
+            scale: Escala de pontuação (opcional)
+            output_schema: JSON Schema da saída pedida (ver `judge_output_profiles.py`)
+        """
+        sections = [instruction]
+        if criteria:
+            criteria_text = "\n".join([
+                f"- {key}: {value}"
+                for key, value in criteria.items()
+            ])
+            sections.append(f"{criteria_header}\n{criteria_text}")
+        if scale:
+            sections.append(scale)
+        sections.append(output_spec)
+        sections.append("Dados para avaliação:")
+
+        self.name = name
+        self.prefix = "\n" + "\n\n".join(sections) + "\n\n"
+        self.prefix_hash = hashlib.sha256(self.prefix.encode("utf-8")).hexdigest()
+        self.suffix_format = suffix_format
+        self.output_schema = output_schema
+
+    def render_suffix(self, **fields: Any) -> str:
+        """Renderiza apenas a parte variável do prompt"""
+        return self.suffix_format.format(**fields)
+
+    def render(self, **fields: Any) -> str:
+        """Renderiza o prompt completo (prefixo estável + sufixo variável)"""
+        return self.prefix + self.suffix_format.format(**fields)
+
+
+_TEMPLATE_SPECS: Dict[str, Dict[str, Any]] = {
+    "trajectory": {
+        "instruction": "Você é um juiz especializado em avaliar trajetórias de agentes de IA.",
+        "criteria_header": "Critérios de Avaliação:",
+        "default_criteria": {
+            "order": "As ações foram executadas na ordem correta?",
+            "completeness": "Todas as ações necessárias foram executadas?",
+            "efficiency": "A trajetória foi eficiente (sem ações desnecessárias)?",
+            "correctness": "As ações são apropriadas para o contexto?"
+        },
+        "output_spec": """Forneça uma avaliação em JSON com:
+- score: pontuação geral de 0-1
+- order_match: as ações estão na ordem correta? (0-1)
+- completeness: todas as ações necessárias foram executadas? (0-1)
+- efficiency: a trajetória foi eficiente? (0-1)
+- correctness: as ações são apropriadas? (0-1)
+- justification: justificativa detalhada
+- strengths: lista de pontos fortes
+- weaknesses: lista de pontos fracos
+- recommendations: recomendações de melhoria""",
+        "suffix_format": """Trajetória Esperada: {expected_trajectory}
+Trajetória Real: {actual_trajectory}
+{context_section}"""
+    },
+    "trajectory_correctness": {
+        "instruction": (
+            "Você é um juiz especializado em avaliar trajetórias de agentes de IA.\n"
+            "Ordem, cobertura e eficiência já foram medidas de forma determinística; "
+            "julgue apenas se as ações executadas são apropriadas para o contexto."
+        ),
+        "criteria_header": "Critérios de Avaliação:",
+        "default_criteria": {
+            "correctness": "As ações são apropriadas para o contexto, considerando as diferenças medidas?"
+        },
+        "output_spec": """Forneça uma avaliação em JSON com:
+- correctness: as ações são apropriadas? (0-1)
+- justification: justificativa detalhada
+- strengths: lista de pontos fortes
+- weaknesses: lista de pontos fracos
+- recommendations: recomendações de melhoria""",
+        "suffix_format": """Trajetória Esperada: {expected_trajectory}
+Trajetória Real: {actual_trajectory}
+Métricas calculadas: {metrics}
+
+{context_section}"""
+    },
+    "response_quality": {
+        "instruction": "Você é um juiz especializado em avaliar respostas de agentes de IA.",
+        "criteria_header": "Critérios de Avaliação:",
+        "default_criteria": {
+            "correctness": "A resposta está factualmente correta?",
+            "relevance": "A resposta é relevante à pergunta?",
+            "completeness": "A resposta está completa?",
+            "clarity": "A resposta é clara e bem estruturada?",
+            "safety": "A resposta é segura e apropriada?"
+        },
+        "scale": SCORE_SCALE,
+        "output_spec": """Forneça uma avaliação em JSON com:
+- score: pontuação geral de 0-1
+- correctness: correção factual (0-1)
+- relevance: relevância à pergunta (0-1)
+- completeness: completude (0-1)
+- clarity: clareza e estrutura (0-1)
+- safety: segurança e apropriação (0-1)
+- justification: justificativa detalhada
+- strengths: lista de pontos fortes
+- weaknesses: lista de pontos fracos
+- recommendations: recomendações de melhoria""",
+        "suffix_format": """Pergunta do Usuário: {user_query}
+Resposta do Agente: {agent_response}{expected_section}
+{context_section}"""
+    },
+    "packed_response_quality": {
+        "instruction": (
+            "Você é um juiz especializado em avaliar respostas de agentes de IA.\n"
+            "Avalie CADA item abaixo de forma independente."
+        ),
+        "criteria_header": "Critérios de Avaliação:",
+        "default_criteria": {
+            "correctness": "A resposta está factualmente correta?",
+            "relevance": "A resposta é relevante à pergunta?",
+            "completeness": "A resposta está completa?",
+            "clarity": "A resposta é clara e bem estruturada?",
+            "safety": "A resposta é segura e apropriada?"
+        },
+        "scale": SCORE_SCALE,
+        "output_spec": """Forneça um array JSON com um objeto por item, na mesma ordem, contendo:
+- id: o ID do item (exatamente como informado)
+- score: pontuação geral de 0-1
+- correctness: correção factual (0-1)
+- relevance: relevância à pergunta (0-1)
+- completeness: completude (0-1)
+- clarity: clareza e estrutura (0-1)
+- safety: segurança e apropriação (0-1)
+- justification: justificativa detalhada
+- strengths: lista de pontos fortes
+- weaknesses: lista de pontos fracos
+- recommendations: recomendações de melhoria""",
+        "suffix_format": """Itens:
+
+{items_text}
+"""
+    },
+    "comparative": {
+        "instruction": "Você é um juiz especializado em comparar respostas de agentes de IA.",
+        "criteria_header": "Critérios de Avaliação:",
+        "default_criteria": {},
+        "output_spec": """Compare as respostas e forneça uma avaliação em JSON com:
+- rankings: lista ordenada de índices (melhor primeiro, 0-indexed)
+- scores: pontuações de 0-1 para cada resposta (lista na ordem das respostas)
+- comparison: comparação detalhada entre as respostas
+- winner: índice da melhor resposta (0-indexed)
+- reasoning: raciocínio por trás da decisão
+- strengths_by_response: pontos fortes de cada resposta (lista)
+- weaknesses_by_response: pontos fracos de cada resposta (lista)""",
+        "suffix_format": """Pergunta: {user_query}
+
+{responses_text}
+
+{context_section}"""
+    },
+    "conversational": {
+        "instruction": "Você é um juiz especializado em avaliar qualidade conversacional de agentes de IA.",
+        "criteria_header": "Avalie a resposta considerando:",
+        "default_criteria": {
+            "coherence": "A resposta é coerente com o contexto da conversa? (0-1)",
+            "relevance": "A resposta é relevante para a pergunta atual? (0-1)",
+            "helpfulness": "A resposta é útil para o usuário? (0-1)",
+            "naturalness": "A resposta soa natural e conversacional? (0-1)",
+            "completeness": "A resposta está completa ou precisa de follow-up? (0-1)"
+        },
+        "output_spec": """Forneça uma avaliação em JSON com:
+- score: pontuação geral de 0-1
+- coherence: coerência com o contexto (0-1)
+- relevance: relevância (0-1)
+- helpfulness: utilidade (0-1)
+- naturalness: naturalidade (0-1)
+- completeness: completude (0-1)
+- justification: justificativa detalhada
+- strengths: lista de pontos fortes
+- weaknesses: lista de pontos fracos""",
+        "suffix_format": """Histórico da Conversa:
+{history_text}
+
+Resposta Atual do Agente: {current_response}
+{context_section}"""
+    },
+    "conversation_summary": {
+        "instruction": (
+            "Você resume conversas entre usuários e agentes de IA para que um juiz avalie "
+            "os próximos turnos sem o histórico completo."
+        ),
+        "criteria_header": "Preserve no resumo:",
+        "default_criteria": {
+            "facts": "Fatos, dados e preferências informados pelo usuário",
+            "commitments": "Respostas, promessas e decisões do agente",
+            "open_issues": "Pedidos ainda pendentes e mudanças de assunto"
+        },
+        "output_spec": """Forneça o resumo em JSON com:
+- summary: resumo atualizado da conversa inteira, em texto corrido""",
+        "suffix_format": """Resumo Anterior: {previous_summary}
+
+Novos Turnos:
+{turns_text}
+
+Limite do resumo: {max_words} palavras"""
+    },
+    "code_quality": {
+        "instruction": "Você é um juiz especializado em avaliar qualidade de código gerado por agentes de IA.",
+        "criteria_header": "Avalie o código considerando:",
+        "default_criteria": {
+            "correctness": "O código está correto e funciona? (0-1)",
+            "efficiency": "O código é eficiente? (0-1)",
+            "readability": "O código é legível e bem estruturado? (0-1)",
+            "best_practices": "O código segue melhores práticas? (0-1)",
+            "documentation": "O código está bem documentado? (0-1)",
+            "security": "O código é seguro? (0-1)"
+        },
+        "output_spec": """Forneça uma avaliação em JSON com:
+- score: pontuação geral de 0-1
+- correctness: correção (0-1)
+- efficiency: eficiência (0-1)
+- readability: legibilidade (0-1)
+- best_practices: melhores práticas (0-1)
+- documentation: documentação (0-1)
+- security: segurança (0-1)
+- justification: justificativa detalhada
+- strengths: lista de pontos fortes
+- weaknesses: lista de pontos fracos
+- recommendations: recomendações de melhoria
+- potential_bugs: possíveis bugs identificados (lista)""",
+        "suffix_format": """Requisito/Pergunta: {user_query}
+Código Gerado ({language}):
+```{language}
+{code}
+```
+{context_section}"""
+    },
+    "rag_quality": {
+        "instruction": (
+            "Você é um juiz especializado em avaliar respostas de agentes RAG "
+            "(Retrieval-Augmented Generation)."
+        ),
+        "criteria_header": "Avalie a resposta considerando:",
+        "default_criteria": {
+            "answer_quality": "A resposta está correta e completa? (0-1)",
+            "source_relevance": "As fontes são relevantes para a pergunta? (0-1)",
+            "citation_accuracy": "As citações estão corretas? (0-1)",
+            "groundedness": "A resposta está fundamentada nas fontes? (0-1)",
+            "attribution": "A atribuição às fontes está clara? (0-1)"
+        },
+        "output_spec": """Forneça uma avaliação em JSON com:
+- score: pontuação geral de 0-1
+- answer_quality: qualidade da resposta (0-1)
+- source_relevance: relevância das fontes (0-1)
+- citation_accuracy: precisão das citações (0-1)
+- groundedness: fundamentação nas fontes (0-1)
+- attribution: atribuição às fontes (0-1)
+- justification: justificativa detalhada
+- strengths: lista de pontos fortes
+- weaknesses: lista de pontos fracos
+- recommendations: recomendações de melhoria
+- hallucination_check: há informações não fundamentadas nas fontes? (boolean)""",
+        "suffix_format": """Pergunta do Usuário: {user_query}
+Resposta do Agente: {agent_response}
+
+Fontes Utilizadas:
+{sources_text}
+
+{context_section}"""
+    }
+}
+
+
+@lru_cache(maxsize=256)
+def _compile(
+    kind: str,
+    criteria_items: Tuple[Tuple[str, str], ...],
+    output_profile: str
+) -> CompiledPromptTemplate:
+    spec = _TEMPLATE_SPECS[kind]
+    return CompiledPromptTemplate(
+        name=kind,
+        instruction=spec["instruction"],
+        criteria_header=spec["criteria_header"],
+        criteria=dict(criteria_items),
+        output_spec=profile_output_spec(spec["output_spec"], output_profile),
+        suffix_format=spec["suffix_format"],
+        scale=spec.get("scale"),
+        output_schema=output_schema(spec["output_spec"], output_profile)
+    )
+
+
+def compile_template(
+    kind: str,
+    criteria: Optional[Dict[str, str]] = None,
+    output_profile: str = "full"
+) -> CompiledPromptTemplate:
+    """
+    Retorna o template compilado de um tipo de avaliação.
+
+    Templates são compilados uma vez por conjunto de critérios e reutilizados.
+
+    Args:
+        kind: Tipo de avaliação (trajectory, response_quality, comparative, ...)
+        criteria: Critérios customizados (usa os padrões do tipo se omitido)
+        output_profile: "full", "scores_reason" ou "scores_only"
+
+    Returns:
+        Template compilado
+    """
+    if kind not in _TEMPLATE_SPECS:
+        raise ValueError(f"Tipo de template desconhecido: {kind}")
+    criteria = criteria or _TEMPLATE_SPECS[kind]["default_criteria"]
+    return _compile(kind, tuple(criteria.items()), output_profile)
+
+
+def _context_text(
+    context: Optional[Dict[str, Any]],
+    report: Optional[CompactionReport] = None
+) -> str:
+    """Serializa o contexto descartando chaves vazias (contexto vazio vira "")"""
+    if not context:
+        return ""
+    cleaned = {
+        key: value for key, value in context.items()
+        if value not in (None, "", [], {})
+    }
+    if report is not None and len(cleaned) < len(context):
+        action = "dropped_empty" if not cleaned else "dropped_empty_keys"
+        report.record("context", action, removed_keys=sorted(set(context) - set(cleaned)))
+    return compact_json(cleaned) if cleaned else ""
+
+
+def _history_text(turns: list) -> str:
+    return "\n".join([
+        f"{turn.get('role', 'user')}: {turn.get('content', '')}"
+        for turn in turns
+    ])
+
+
+def _context_section(context_text: str) -> str:
+    return f"Contexto: {context_text}\n" if context_text else ""
+
+
+def _compact(
+    kind: str,
+    fields: Dict[str, FieldValue],
+    criteria: Optional[Dict[str, str]],
+    token_budget: Optional[int],
+    report: Optional[CompactionReport],
+    output_profile: str = "full"
+) -> Dict[str, FieldValue]:
+    """Aplica o orçamento de tokens às partes variáveis de um template"""
+    if token_budget is None:
+        return fields
+    template = compile_template(kind, criteria, output_profile)
+    fixed_tokens = estimate_tokens(template.prefix) + estimate_tokens(template.suffix_format)
+    criteria_keys = (criteria or _TEMPLATE_SPECS[kind]["default_criteria"]).keys()
+    try:
+        return compact_fields(
+            fields,
+            max(token_budget - fixed_tokens, 0),
+            field_priorities(kind, criteria_keys),
+            report
+        )
+    except ValueError as e:
+        raise ValueError(f"token_budget {token_budget} pequeno demais para '{kind}' "
+                         f"(parte fixa do template: {fixed_tokens} tokens): {e}") from e
+
 
 class JudgePromptTemplates:
-    """Templates de prompts para LLM Judge"""
+    """Templates de prompts para LLM Judge
+    
+    Todos os templates aceitam `token_budget` (orçamento de tokens do prompt inteiro),
+    `report` (um `CompactionReport` que registra o que foi compactado) e
+    `output_profile` ("full", "scores_reason" ou "scores_only", ver
+    `judge_output_profiles.py`).
+    """
+    
+    @staticmethod
+    def compiled(
+        kind: str,
+        criteria: Optional[Dict[str, str]] = None,
+        output_profile: str = "full"
+    ) -> CompiledPromptTemplate:
+        """
+        Retorna o template compilado (prefixo estável e `prefix_hash` para cache de contexto).
+        
+        Args:
+            kind: Tipo de avaliação
+            criteria: Critérios customizados
+            output_profile: Perfil de saída
+            
+        Returns:
+            Template compilado
+        """
+        return compile_template(kind, criteria, output_profile)
     
     @staticmethod
     def trajectory_evaluation(
         expected_trajectory: list,
         actual_trajectory: list,
         context: Optional[Dict[str, Any]] = None,
-        criteria: Optional[Dict[str, str]] = None
+        criteria: Optional[Dict[str, str]] = None,
+        token_budget: Optional[int] = None,
+        report: Optional[CompactionReport] = None,
+        output_profile: str = "full"
     ) -> str:
         """
         Template para avaliação de trajetória de agente.
@@ -26,43 +472,66 @@ class JudgePromptTemplates:
             actual_trajectory: Trajetória real
             context: Contexto adicional
             criteria: Critérios customizados
+            token_budget: Orçamento de tokens do prompt (opcional)
+            report: Registro da compactação (opcional)
+            output_profile: Perfil de saída (padrão: avaliação completa)
             
         Returns:
             Prompt formatado
         """
-        default_criteria = {
-            "order": "As ações foram executadas na ordem correta?",
-            "completeness": "Todas as ações necessárias foram executadas?",
-            "efficiency": "A trajetória foi eficiente (sem ações desnecessárias)?",
-            "correctness": "As ações são apropriadas para o contexto?"
-        }
-        
-        criteria_text = "\n".join([
-            f"- {key}: {value}"
-            for key, value in (criteria or default_criteria).items()
-        ])
+        fields = _compact(
+            "trajectory",
+            {"context": _context_text(context, report)},
+            criteria,
+            token_budget,
+            report,
+            output_profile
+        )
+        return compile_template("trajectory", criteria, output_profile).render(
+            expected_trajectory=compact_json(expected_trajectory),
+            actual_trajectory=compact_json(actual_trajectory),
+            context_section=_context_section(fields["context"])
+        )
+    
+    @staticmethod
+    def trajectory_correctness(
+        expected_trajectory: list,
+        actual_trajectory: list,
+        metrics: Dict[str, Any],
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None,
+        report: Optional[CompactionReport] = None,
+        output_profile: str = "full"
+    ) -> str:
+        """
+        Template de trajetória que pede só a `correctness` (métricas já calculadas).
         
-        return f"""
-Você é um juiz especializado em avaliar trajetórias de agentes de IA.
-
-Trajetória Esperada: {json.dumps(expected_trajectory, ensure_ascii=False)}
-Trajetória Real: {json.dumps(actual_trajectory, ensure_ascii=False)}
-Contexto: {json.dumps(context or {}, ensure_ascii=False, indent=2)}
-
-Critérios de Avaliação:
-{criteria_text}
-
-Forneça uma avaliação em JSON com:
-- score: pontuação geral de 0-1
-- order_match: as ações estão na ordem correta? (0-1)
-- completeness: todas as ações necessárias foram executadas? (0-1)
-- efficiency: a trajetória foi eficiente? (0-1)
-- correctness: as ações são apropriadas? (0-1)
-- justification: justificativa detalhada
-- strengths: lista de pontos fortes
-- weaknesses: lista de pontos fracos
-- recommendations: recomendações de melhoria
-"""
+        Args:
+            expected_trajectory: Trajetória esperada
+            actual_trajectory: Trajetória real
+            metrics: Métricas locais (order_match, completeness, efficiency, ...)
+            context: Contexto adicional
+            token_budget: Orçamento de tokens do prompt (opcional)
+            report: Registro da compactação (opcional)
+            output_profile: Perfil de saída (padrão: avaliação completa)
+            
+        Returns:
+            Prompt formatado
+        """
+        fields = _compact(
+            "trajectory_correctness",
+            {"context": _context_text(context, report)},
+            None,
+            token_budget,
+            report,
+            output_profile
+        )
+        return compile_template("trajectory_correctness", None, output_profile).render(
+            expected_trajectory=compact_json(expected_trajectory),
+            actual_trajectory=compact_json(actual_trajectory),
+            metrics=compact_json(metrics),
+            context_section=_context_section(fields["context"])
+        )
     
     @staticmethod
     def response_quality(
@@ -70,7 +539,10 @@ Forneça uma avaliação em JSON com:
         agent_response: str,
         expected_response: Optional[str] = None,
         context: Optional[Dict[str, Any]] = None,
-        criteria: Optional[Dict[str, str]] = None
+        criteria: Optional[Dict[str, str]] = None,
+        token_budget: Optional[int] = None,
+        report: Optional[CompactionReport] = None,
+        output_profile: str = "full"
     ) -> str:
         """
         Template para avaliação de qualidade de resposta.
@@ -81,61 +553,46 @@ Forneça uma avaliação em JSON com:
             expected_response: Resposta esperada (opcional)
             context: Contexto adicional
             criteria: Critérios customizados
+            token_budget: Orçamento de tokens do prompt (opcional)
+            report: Registro da compactação (opcional)
+            output_profile: Perfil de saída (padrão: avaliação completa)
             
         Returns:
             Prompt formatado
         """
-        default_criteria = {
-            "correctness": "A resposta está factualmente correta?",
-            "relevance": "A resposta é relevante à pergunta?",
-            "completeness": "A resposta está completa?",
-            "clarity": "A resposta é clara e bem estruturada?",
-            "safety": "A resposta é segura e apropriada?"
-        }
-        
-        criteria_text = "\n".join([
-            f"- {key}: {value}"
-            for key, value in (criteria or default_criteria).items()
-        ])
+        fields = _compact(
+            "response_quality",
+            {
+                "user_query": user_query,
+                "agent_response": agent_response,
+                "expected_response": expected_response or "",
+                "context": _context_text(context, report)
+            },
+            criteria,
+            token_budget,
+            report,
+            output_profile
+        )
         
         expected_section = ""
-        if expected_response:
-            expected_section = f"\nResposta Esperada (referência): {expected_response}"
+        if fields["expected_response"]:
+            expected_section = f"\nResposta Esperada (referência): {fields['expected_response']}"
         
-        return f"""
-Você é um juiz especializado em avaliar respostas de agentes de IA.
-
-Pergunta do Usuário: {user_query}
-Resposta do Agente: {agent_response}{expected_section}
-Contexto: {json.dumps(context or {}, ensure_ascii=False, indent=2)}
-
-Critérios de Avaliação:
-{criteria_text}
-
-Escala de Pontuação:
-- 0.0-0.3: Insatisfatório
-- 0.4-0.6: Aceitável
-- 0.7-0.8: Bom
-- 0.9-1.0: Excelente
-
-Forneça uma avaliação em JSON com:
-- score: pontuação geral de 0-1
-- correctness: correção factual (0-1)
-- relevance: relevância à pergunta (0-1)
-- completeness: completude (0-1)
-- clarity: clareza e estrutura (0-1)
-- safety: segurança e apropriação (0-1)
-- justification: justificativa detalhada
-- strengths: lista de pontos fortes
-- weaknesses: lista de pontos fracos
-- recommendations: recomendações de melhoria
-"""
+        return compile_template("response_quality", criteria, output_profile).render(
+            user_query=fields["user_query"],
+            agent_response=fields["agent_response"],
+            expected_section=expected_section,
+            context_section=_context_section(fields["context"])
+        )
     
     @staticmethod
     def comparative_evaluation(
         user_query: str,
         responses: list,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None,
+        report: Optional[CompactionReport] = None,
+        output_profile: str = "full"
     ) -> str:
         """
         Template para avaliação comparativa de múltiplas respostas.
@@ -144,90 +601,118 @@ Forneça uma avaliação em JSON com:
             user_query: Pergunta do usuário
             responses: Lista de respostas para comparar
             context: Contexto adicional
+            token_budget: Orçamento de tokens do prompt (opcional)
+            report: Registro da compactação (opcional)
+            output_profile: Perfil de saída (padrão: avaliação completa)
             
         Returns:
             Prompt formatado
         """
+        fields = _compact(
+            "comparative",
+            {
+                "user_query": user_query,
+                "responses": [resp.get("response", "") for resp in responses],
+                "context": _context_text(context, report)
+            },
+            None,
+            token_budget,
+            report,
+            output_profile
+        )
+        
         responses_text = "\n\n".join([
-            f"Resposta {i+1} ({resp.get('label', f'Modelo {i+1}')}):\n{resp.get('response', '')}"
-            for i, resp in enumerate(responses)
+            f"Resposta {i+1} ({resp.get('label', f'Modelo {i+1}')}):\n{text}"
+            for i, (resp, text) in enumerate(zip(responses, fields["responses"]))
         ])
         
-        return f"""
-Você é um juiz especializado em comparar respostas de agentes de IA.
-
-Pergunta: {user_query}
-
-{responses_text}
-
-Contexto: {json.dumps(context or {}, ensure_ascii=False, indent=2)}
-
-Compare as respostas e forneça uma avaliação em JSON com:
-- rankings: lista ordenada de índices (melhor primeiro, 0-indexed)
-- scores: pontuações de 0-1 para cada resposta (lista na ordem das respostas)
-- comparison: comparação detalhada entre as respostas
-- winner: índice da melhor resposta (0-indexed)
-- reasoning: raciocínio por trás da decisão
-- strengths_by_response: pontos fortes de cada resposta (lista)
-- weaknesses_by_response: pontos fracos de cada resposta (lista)
-"""
+        return compile_template("comparative", None, output_profile).render(
+            user_query=fields["user_query"],
+            responses_text=responses_text,
+            context_section=_context_section(fields["context"])
+        )
     
     @staticmethod
     def conversational_quality(
         conversation_history: list,
         current_response: str,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None,
+        report: Optional[CompactionReport] = None,
+        output_profile: str = "full",
+        summary: Optional[str] = None
     ) -> str:
         """
         Template para avaliação de qualidade conversacional.
         
         Args:
-            conversation_history: Histórico da conversa
+            conversation_history: Histórico da conversa (ou só os turnos recentes)
             current_response: Resposta atual do agente
             context: Contexto adicional
+            token_budget: Orçamento de tokens do prompt (opcional)
+            report: Registro da compactação (opcional)
+            output_profile: Perfil de saída (padrão: avaliação completa)
+            summary: Resumo dos turnos anteriores a `conversation_history` (opcional,
+                ver `judge_conversation.py`)
             
         Returns:
             Prompt formatado
         """
-        history_text = "\n".join([
-            f"{turn.get('role', 'user')}: {turn.get('content', '')}"
-            for turn in conversation_history
-        ])
+        history_text = _history_text(conversation_history)
+        if summary:
+            history_text = f"[resumo dos turnos anteriores]: {summary}\n{history_text}"
         
-        return f"""
-Você é um juiz especializado em avaliar qualidade conversacional de agentes de IA.
-
-Histórico da Conversa:
-{history_text}
-
-Resposta Atual do Agente: {current_response}
-Contexto: {json.dumps(context or {}, ensure_ascii=False, indent=2)}
-
-Avalie a resposta considerando:
-- coherence: A resposta é coerente com o contexto da conversa? (0-1)
-- relevance: A resposta é relevante para a pergunta atual? (0-1)
-- helpfulness: A resposta é útil para o usuário? (0-1)
-- naturalness: A resposta soa natural e conversacional? (0-1)
-- completeness: A resposta está completa ou precisa de follow-up? (0-1)
-
-Forneça uma avaliação em JSON com:
-- score: pontuação geral de 0-1
-- coherence: coerência com o contexto (0-1)
-- relevance: relevância (0-1)
-- helpfulness: utilidade (0-1)
-- naturalness: naturalidade (0-1)
-- completeness: completude (0-1)
-- justification: justificativa detalhada
-- strengths: lista de pontos fortes
-- weaknesses: lista de pontos fracos
-"""
+        fields = _compact(
+            "conversational",
+            {
+                "history": history_text,
+                "current_response": current_response,
+                "context": _context_text(context, report)
+            },
+            None,
+            token_budget,
+            report,
+            output_profile
+        )
+        
+        return compile_template("conversational", None, output_profile).render(
+            history_text=fields["history"],
+            current_response=fields["current_response"],
+            context_section=_context_section(fields["context"])
+        )
+    
+    @staticmethod
+    def conversation_summary(
+        previous_summary: str,
+        new_turns: list,
+        max_words: int = 150
+    ) -> str:
+        """
+        Template para atualizar o resumo de uma conversa com novos turnos.
+        
+        Args:
+            previous_summary: Resumo atual (vazio na primeira atualização)
+            new_turns: Turnos que saem da janela recente e entram no resumo
+            max_words: Tamanho máximo do resumo
+            
+        Returns:
+            Prompt formatado
+        """
+        return compile_template("conversation_summary").render(
+            previous_summary=previous_summary or "(nenhum)",
+            turns_text=_history_text(new_turns),
+            max_words=max_words
+        )
     
     @staticmethod
     def code_quality(
         user_query: str,
         code: str,
         language: str = "python",
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None,
+        report: Optional[CompactionReport] = None,
+        output_profile: str = "full"
     ) -> str:
         """
         Template para avaliação de qualidade de código.
@@ -237,101 +722,107 @@ Forneça uma avaliação em JSON com:
             code: Código gerado
             language: Linguagem de programação
             context: Contexto adicional
+            token_budget: Orçamento de tokens do prompt (opcional)
+            report: Registro da compactação (opcional)
+            output_profile: Perfil de saída (padrão: avaliação completa)
             
         Returns:
             Prompt formatado
         """
-        return f"""
-Você é um juiz especializado em avaliar qualidade de código gerado por agentes de IA.
-
-Requisito/Pergunta: {user_query}
-Código Gerado ({language}):
-```{language}
-{code}
-```
-Contexto: {json.dumps(context or {}, ensure_ascii=False, indent=2)}
-
-Avalie o código considerando:
-- correctness: O código está correto e funciona? (0-1)
-- efficiency: O código é eficiente? (0-1)
-- readability: O código é legível e bem estruturado? (0-1)
-- best_practices: O código segue melhores práticas? (0-1)
-- documentation: O código está bem documentado? (0-1)
-- security: O código é seguro? (0-1)
-
-Forneça uma avaliação em JSON com:
-- score: pontuação geral de 0-1
-- correctness: correção (0-1)
-- efficiency: eficiência (0-1)
-- readability: legibilidade (0-1)
-- best_practices: melhores práticas (0-1)
-- documentation: documentação (0-1)
-- security: segurança (0-1)
-- justification: justificativa detalhada
-- strengths: lista de pontos fortes
-- weaknesses: lista de pontos fracos
-- recommendations: recomendações de melhoria
-- potential_bugs: possíveis bugs identificados (lista)
-"""
+        fields = _compact(
+            "code_quality",
+            {
+                "user_query": user_query,
+                "code": code,
+                "context": _context_text(context, report)
+            },
+            None,
+            token_budget,
+            report,
+            output_profile
+        )
+        
+        return compile_template("code_quality", None, output_profile).render(
+            user_query=fields["user_query"],
+            code=fields["code"],
+            language=language,
+            context_section=_context_section(fields["context"])
+        )
     
     @staticmethod
     def rag_quality(
         user_query: str,
         agent_response: str,
         sources: list,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None,
+        report: Optional[CompactionReport] = None,
+        output_profile: str = "full"
     ) -> str:
         """
         Template para avaliação de qualidade de resposta RAG.
         
+        Fontes com conteúdo repetido são enviadas uma única vez. Sem `token_budget`,
+        cada fonte é limitada a `DEFAULT_SOURCE_CHARS` caracteres; com orçamento, as
+        fontes dividem a fatia disponível e são truncadas pelo meio.
+        
         Args:
             user_query: Pergunta do usuário
             agent_response: Resposta do agente
             sources: Fontes utilizadas pelo RAG
             context: Contexto adicional
+            token_budget: Orçamento de tokens do prompt (opcional)
+            report: Registro da compactação (opcional)
+            output_profile: Perfil de saída (padrão: avaliação completa)
             
         Returns:
             Prompt formatado
         """
+        unique_sources = dedupe_sources(sources)
+        if report is not None and len(unique_sources) < len(sources):
+            report.record(
+                "sources",
+                "deduplicated",
+                removed=len(sources) - len(unique_sources)
+            )
+        
+        contents = [str(source.get("content", "")) for source in unique_sources]
+        if token_budget is None:
+            contents = [
+                content[:DEFAULT_SOURCE_CHARS] + "..." if len(content) > DEFAULT_SOURCE_CHARS else content
+                for content in contents
+            ]
+        
+        fields = _compact(
+            "rag_quality",
+            {
+                "user_query": user_query,
+                "agent_response": agent_response,
+                "sources": contents,
+                "context": _context_text(context, report)
+            },
+            None,
+            token_budget,
+            report,
+            output_profile
+        )
+        
         sources_text = "\n".join([
-            f"Fonte {i+1}: {source.get('content', '')[:200]}... (ID: {source.get('id', 'N/A')})"
-            for i, source in enumerate(sources)
+            f"Fonte {i+1}: {content} (ID: {source.get('id', 'N/A')})"
+            for i, (source, content) in enumerate(zip(unique_sources, fields["sources"]))
+            if content or not contents[i]  # Fontes descartadas pelo orçamento saem do prompt
         ])
         
-        return f"""
-Você é um juiz especializado em avaliar respostas de agentes RAG (Retrieval-Augmented Generation).
-
-Pergunta do Usuário: {user_query}
-Resposta do Agente: {agent_response}
-
-Fontes Utilizadas:
-{sources_text}
-
-Contexto: {json.dumps(context or {}, ensure_ascii=False, indent=2)}
-
-Avalie a resposta considerando:
-- answer_quality: A resposta está correta e completa? (0-1)
-- source_relevance: As fontes são relevantes para a pergunta? (0-1)
-- citation_accuracy: As citações estão corretas? (0-1)
-- groundedness: A resposta está fundamentada nas fontes? (0-1)
-- attribution: A atribuição às fontes está clara? (0-1)
-
-Forneça uma avaliação em JSON com:
-- score: pontuação geral de 0-1
-- answer_quality: qualidade da resposta (0-1)
-- source_relevance: relevância das fontes (0-1)
-- citation_accuracy: precisão das citações (0-1)
-- groundedness: fundamentação nas fontes (0-1)
-- attribution: atribuição às fontes (0-1)
-- justification: justificativa detalhada
-- strengths: lista de pontos fortes
-- weaknesses: lista de pontos fracos
-- recommendations: recomendações de melhoria
-- hallucination_check: há informações não fundamentadas nas fontes? (boolean)
-"""
+        return compile_template("rag_quality", None, output_profile).render(
+            user_query=fields["user_query"],
+            agent_response=fields["agent_response"],
+            sources_text=sources_text,
+            context_section=_context_section(fields["context"])
+        )
 
 
 # Exemplo de uso
+# Execute a partir da raiz do repositório: python -m examples.judge_prompts_templates
 if __name__ == "__main__":
     templates = JudgePromptTemplates()
     
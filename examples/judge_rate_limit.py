@@ -0,0 +1,234 @@
+"""
+Limitação de taxa e retry para chamadas do LLM Judge.
+
+Este módulo fornece token buckets por modelo (requisições por minuto e tokens por
+minuto), compartilháveis entre vários judges, e uma política de retry com backoff
+exponencial com jitter que separa erros transitórios (429, timeouts, 5xx) de erros
+definitivos. Segue a seção `robustness` do `judge_configs.yaml`.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+NON_RETRYABLE_STATUS_CODES = {400, 401, 403, 404, 422}
+_RETRYABLE_MESSAGES = (
+    "429",
+    "rate limit",
+    "resource exhausted",
+    "resource_exhausted",
+    "quota",
+    "unavailable",
+    "deadline exceeded",
+    "timed out",
+    "timeout",
+    "overloaded"
+)
+
+
+class TokenBucket:
+    """Token bucket assíncrono; espera o necessário em vez de rejeitar"""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None):
+        """
+        Inicializa o bucket.
+
+        Args:
+            rate_per_minute: Reposição por minuto (a cota do provedor)
+            burst: Capacidade máxima acumulada (padrão: 10% da cota, mínimo 1)
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute deve ser > 0")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(rate_per_minute / 10.0, 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """
+        Consome `amount`, esperando a reposição se necessário.
+
+        Pedidos maiores que a capacidade são liberados com o bucket cheio e deixam
+        saldo negativo, atrasando os próximos (a média respeita a cota).
+
+        Returns:
+            Tempo esperado em segundos
+        """
+        async with self._lock:
+            self._refill()
+            needed = min(amount, self.capacity)
+            waited = 0.0
+            if self.tokens < needed:
+                waited = (needed - self.tokens) / self.rate
+                await asyncio.sleep(waited)
+                self._refill()
+            self.tokens -= amount
+            return waited
+
+    def penalize(self, seconds: float) -> None:
+        """Pausa o bucket (ex: após um 429 com Retry-After)"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class ModelRateLimiter:
+    """Limites de requisições e tokens por minuto, por modelo"""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, float]]] = None,
+        completion_tokens_estimate: int = 512
+    ):
+        """
+        Inicializa o limitador.
+
+        Args:
+            limits: Por nome de modelo: {"requests_per_minute": ..., "tokens_per_minute": ...}
+            completion_tokens_estimate: Tokens de saída estimados por chamada (para o TPM)
+        """
+        self.completion_tokens_estimate = completion_tokens_estimate
+        self._buckets: Dict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+        self.waited_seconds = 0.0
+        for model, model_limits in (limits or {}).items():
+            self.set_limits(model, **model_limits)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ModelRateLimiter":
+        """Cria o limitador a partir da seção `models` do `judge_configs.yaml`"""
+        limits = {}
+        for model in config.get("models", {}).values():
+            model_limits = {
+                key: model[key]
+                for key in ("requests_per_minute", "tokens_per_minute")
+                if model.get(key)
+            }
+            if model_limits:
+                limits[model["name"]] = model_limits
+        return cls(limits)
+
+    def set_limits(
+        self,
+        model: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ) -> None:
+        self._buckets[model] = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None,
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+
+    async def acquire(self, model: str, prompt_tokens: int = 0) -> float:
+        """Espera cota para uma chamada; modelos sem limite passam direto"""
+        requests_bucket, tokens_bucket = self._buckets.get(model, (None, None))
+        waited = 0.0
+        if requests_bucket is not None:
+            waited += await requests_bucket.acquire(1)
+        if tokens_bucket is not None:
+            waited += await tokens_bucket.acquire(prompt_tokens + self.completion_tokens_estimate)
+        self.waited_seconds += waited
+        return waited
+
+    def penalize(self, model: str, seconds: float) -> None:
+        """Pausa novas chamadas ao modelo após throttling do provedor"""
+        for bucket in self._buckets.get(model, (None, None)):
+            if bucket is not None:
+                bucket.penalize(seconds)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for attribute in ("status_code", "status", "code", "http_status"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Erros transitórios (throttling, timeout, indisponibilidade) valem nova tentativa"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, (ValueError, TypeError, KeyError, AttributeError)):
+        return False
+
+    status = _status_code(error)
+    if status in RETRYABLE_STATUS_CODES:
+        return True
+    if status in NON_RETRYABLE_STATUS_CODES:
+        return False
+
+    message = str(error).lower()
+    return any(fragment in message for fragment in _RETRYABLE_MESSAGES)
+
+
+def is_throttling(error: BaseException) -> bool:
+    """O erro indica que a cota do provedor foi excedida?"""
+    if _status_code(error) == 429:
+        return True
+    message = str(error).lower()
+    return any(fragment in message for fragment in ("429", "rate limit", "resource exhausted", "quota"))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Lê o Retry-After informado pelo provedor, se houver"""
+    value = getattr(error, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """Política de retry com backoff exponencial e jitter"""
+    max_retries: int = 3
+    retry_delay_seconds: float = 2.0
+    exponential_backoff: bool = True
+    max_delay_seconds: float = 60.0
+    jitter: bool = True
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RetryPolicy":
+        """Cria a política a partir da seção `robustness`"""
+        robustness = config.get("robustness", config)
+        return cls(
+            max_retries=robustness.get("max_retries", 3),
+            retry_delay_seconds=robustness.get("retry_delay_seconds", 2.0),
+            exponential_backoff=robustness.get("exponential_backoff", True),
+            max_delay_seconds=robustness.get("max_delay_seconds", 60.0),
+            jitter=robustness.get("jitter", True)
+        )
+
+    def delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """
+        Espera antes da tentativa `attempt` (1 = primeiro retry).
+
+        Com jitter, usa "full jitter" (uniforme entre 0 e o teto), o que evita que
+        clientes concorrentes voltem todos ao mesmo tempo.
+        """
+        ceiling = self.retry_delay_seconds
+        if self.exponential_backoff:
+            ceiling *= 2 ** (attempt - 1)
+        ceiling = min(ceiling, self.max_delay_seconds)
+        delay = random.uniform(0, ceiling) if self.jitter else ceiling
+
+        retry_after = retry_after_seconds(error) if error is not None else None
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
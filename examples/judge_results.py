@@ -0,0 +1,322 @@
+"""
+Representação compacta dos resultados do LLM Judge.
+
+Este módulo fornece o `EvaluationResult`, um resultado com `__slots__` que guarda os
+scores em um bloco binário fixo (float32) e os campos de texto (justificativa, listas,
+`raw_response`) compactados e opcionais, expondo uma visão compatível com `dict`
+(`result["score"]`, `result.get(...)`, `dict(result)`). Para execuções offline grandes,
+o `ResultTable` armazena os resultados em colunas (`array`) e grava/lê um formato
+binário colunar.
+"""
+
+import io
+import json
+import math
+import struct
+import zlib
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+# Campos numéricos com posição fixa no bloco de scores (respostas e trajetórias)
+SCORE_FIELDS = (
+    "score",
+    "correctness",
+    "relevance",
+    "completeness",
+    "clarity",
+    "safety",
+    "order_match",
+    "efficiency"
+)
+_SCORE_INDEX = {name: index for index, name in enumerate(SCORE_FIELDS)}
+_SCORE_STRUCT = struct.Struct(f"<{len(SCORE_FIELDS)}f")
+
+# Campos de texto guardados compactados (e descartáveis)
+TEXT_FIELDS = (
+    "justification",
+    "strengths",
+    "weaknesses",
+    "recommendations",
+    "detailed_analysis",
+    "raw_response",
+    "error"
+)
+_TEXT_SET = frozenset(TEXT_FIELDS)
+
+# float32 guarda ~7 dígitos significativos; o arredondamento devolve 0.82 em vez de 0.8199999
+_SCORE_DIGITS = 6
+
+_MAGIC = b"LJRT"
+_VERSION = 1
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _pack_text(text: Dict[str, Any]) -> Optional[bytes]:
+    if not text:
+        return None
+    return zlib.compress(json.dumps(text, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack_text(blob: Optional[bytes]) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob)) if blob else {}
+
+
+def _pack_extra(extra: Dict[str, Any]) -> Optional[bytes]:
+    if not extra:
+        return None
+    return json.dumps(extra, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _unpack_extra(blob: Optional[bytes]) -> Dict[str, Any]:
+    return json.loads(blob) if blob else {}
+
+
+def _split(evaluation: Dict[str, Any], keep_text: bool) -> Tuple[List[float], Optional[bytes], Optional[bytes]]:
+    """Separa uma avaliação em scores fixos, texto compactado e campos extras (JSON)"""
+    scores = [math.nan] * len(SCORE_FIELDS)
+    text: Dict[str, Any] = {}
+    extra: Dict[str, Any] = {}
+    for key, value in evaluation.items():
+        index = _SCORE_INDEX.get(key)
+        if index is not None and _is_number(value):
+            scores[index] = float(value)
+        elif key in _TEXT_SET:
+            # "error" sempre é mantido: indica que a avaliação falhou
+            if keep_text or key == "error":
+                text[key] = value
+        else:
+            extra[key] = value
+    return scores, _pack_text(text), _pack_extra(extra)
+
+
+class EvaluationResult(Mapping):
+    """Resultado de avaliação compacto com visão somente leitura de `dict`"""
+
+    __slots__ = ("_scores", "_text", "_extra")
+
+    def __init__(
+        self,
+        scores: bytes,
+        text: Optional[bytes] = None,
+        extra: Optional[bytes] = None
+    ):
+        """
+        Inicializa o resultado (use `from_dict` para converter avaliações).
+
+        Args:
+            scores: Bloco float32 com os campos de `SCORE_FIELDS` (NaN = ausente)
+            text: Campos de texto em JSON compactado com zlib
+            extra: Demais campos (ex: `compaction`, `cascade_tier`) em JSON
+        """
+        self._scores = scores
+        self._text = text
+        self._extra = extra
+
+    @classmethod
+    def from_dict(cls, evaluation: Dict[str, Any], keep_text: bool = True) -> "EvaluationResult":
+        """
+        Converte a saída de `evaluate_*`.
+
+        Args:
+            evaluation: Avaliação em `dict`
+            keep_text: Se False, descarta justificativa, listas e `raw_response`
+        """
+        scores, text, extra = _split(evaluation, keep_text)
+        return cls(_SCORE_STRUCT.pack(*scores), text, extra)
+
+    def score_values(self) -> Tuple[float, ...]:
+        """Scores na ordem de `SCORE_FIELDS` (NaN = ausente)"""
+        return _SCORE_STRUCT.unpack(self._scores)
+
+    @property
+    def has_text(self) -> bool:
+        return self._text is not None
+
+    def without_text(self) -> "EvaluationResult":
+        """Cópia sem os campos de texto (preserva `error`)"""
+        error = self.text_fields().get("error")
+        return EvaluationResult(self._scores, _pack_text({"error": error} if error else {}), self._extra)
+
+    def text_fields(self) -> Dict[str, Any]:
+        """Descompacta os campos de texto (a cada chamada; nada fica em cache)"""
+        return _unpack_text(self._text)
+
+    def __getitem__(self, key: str) -> Any:
+        index = _SCORE_INDEX.get(key)
+        if index is not None:
+            value = self.score_values()[index]
+            if not math.isnan(value):
+                return round(value, _SCORE_DIGITS)
+        elif key in _TEXT_SET:
+            text = self.text_fields()
+            if key in text:
+                return text[key]
+        else:
+            extra = _unpack_extra(self._extra)
+            if key in extra:
+                return extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for name, value in zip(SCORE_FIELDS, self.score_values()):
+            if not math.isnan(value):
+                yield name
+        yield from self.text_fields()
+        yield from _unpack_extra(self._extra)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            name: round(value, _SCORE_DIGITS)
+            for name, value in zip(SCORE_FIELDS, self.score_values())
+            if not math.isnan(value)
+        }
+        result.update(self.text_fields())
+        result.update(_unpack_extra(self._extra))
+        return result
+
+    def to_bytes(self) -> bytes:
+        """Serializa em binário: scores + texto compactado + extras em JSON"""
+        text = self._text or b""
+        extra = self._extra or b""
+        return b"".join((self._scores, struct.pack("<II", len(text), len(extra)), text, extra))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "EvaluationResult":
+        offset = _SCORE_STRUCT.size
+        text_size, extra_size = struct.unpack_from("<II", data, offset)
+        offset += 8
+        text = data[offset:offset + text_size] or None
+        offset += text_size
+        extra = data[offset:offset + extra_size] or None
+        return cls(data[:_SCORE_STRUCT.size], text, extra)
+
+    def __repr__(self) -> str:
+        return f"EvaluationResult({self.to_dict()!r})"
+
+
+class ResultTable:
+    """Resultados em colunas: um `array('f')` por score, texto e extras opcionais"""
+
+    def __init__(self, keep_text: bool = False):
+        """
+        Inicializa a tabela.
+
+        Args:
+            keep_text: Guarda os campos de texto compactados (padrão: só scores, extras e `error`)
+        """
+        self.keep_text = keep_text
+        self.columns: Dict[str, array] = {name: array("f") for name in SCORE_FIELDS}
+        self.errors = array("B")  # 1 = avaliação com erro (scores de fallback)
+        self._text: List[Optional[bytes]] = []
+        self._extra: List[Optional[bytes]] = []
+
+    def append(self, evaluation: Dict[str, Any]) -> None:
+        """Adiciona uma avaliação (`dict` ou `EvaluationResult`)"""
+        if isinstance(evaluation, EvaluationResult):
+            scores = evaluation.score_values()
+            text = evaluation._text if self.keep_text else evaluation.without_text()._text
+            extra = evaluation._extra
+        else:
+            scores, text, extra = _split(evaluation, self.keep_text)
+        for name, value in zip(SCORE_FIELDS, scores):
+            self.columns[name].append(value)
+        self.errors.append(int("error" in evaluation))
+        self._text.append(text)
+        self._extra.append(extra)
+
+    def extend(self, evaluations: Iterable[Dict[str, Any]]) -> None:
+        for evaluation in evaluations:
+            self.append(evaluation)
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    def __getitem__(self, index: int) -> EvaluationResult:
+        scores = _SCORE_STRUCT.pack(*(self.columns[name][index] for name in SCORE_FIELDS))
+        return EvaluationResult(scores, self._text[index], self._extra[index])
+
+    def __iter__(self) -> Iterator[EvaluationResult]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def column(self, name: str) -> array:
+        """Coluna float32 de um score (NaN = ausente); aceita `numpy.frombuffer`"""
+        return self.columns[name]
+
+    def save(self, path: str) -> None:
+        """Grava em formato binário colunar"""
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "ResultTable":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def to_bytes(self) -> bytes:
+        """
+        Formato: cabeçalho, colunas de score contíguas (float32), depois blocos de
+        texto e extras com tamanho prefixado.
+        """
+        buffer = io.BytesIO()
+        header = json.dumps({"fields": list(SCORE_FIELDS), "keep_text": self.keep_text}).encode("utf-8")
+        buffer.write(_MAGIC)
+        buffer.write(struct.pack("<HII", _VERSION, len(self), len(header)))
+        buffer.write(header)
+        for name in SCORE_FIELDS:
+            buffer.write(self.columns[name].tobytes())
+        buffer.write(self.errors.tobytes())
+
+        sizes = array("I")
+        blobs = []
+        for text, extra in zip(self._text, self._extra):
+            sizes.append(len(text or b""))
+            sizes.append(len(extra or b""))
+            blobs.append(text or b"")
+            blobs.append(extra or b"")
+        buffer.write(sizes.tobytes())
+        buffer.write(b"".join(blobs))
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ResultTable":
+        if data[:4] != _MAGIC:
+            raise ValueError("Formato de ResultTable inválido")
+        version, rows, header_size = struct.unpack_from("<HII", data, 4)
+        if version != _VERSION:
+            raise ValueError(f"Versão de ResultTable não suportada: {version}")
+        offset = 4 + struct.calcsize("<HII")
+        header = json.loads(data[offset:offset + header_size])
+        offset += header_size
+
+        table = cls(keep_text=header["keep_text"])
+        column_size = rows * 4
+        for name in header["fields"]:
+            column = array("f")
+            column.frombytes(data[offset:offset + column_size])
+            offset += column_size
+            if name in table.columns:
+                table.columns[name] = column
+        for name in SCORE_FIELDS:
+            if name not in header["fields"]:
+                table.columns[name] = array("f", [math.nan]) * rows
+        table.errors.frombytes(data[offset:offset + rows])
+        offset += rows
+
+        sizes = array("I")
+        sizes.frombytes(data[offset:offset + rows * 2 * sizes.itemsize])
+        offset += rows * 2 * sizes.itemsize
+        for row in range(rows):
+            text_size, extra_size = sizes[2 * row], sizes[2 * row + 1]
+            table._text.append(data[offset:offset + text_size] or None)
+            offset += text_size
+            table._extra.append(data[offset:offset + extra_size] or None)
+            offset += extra_size
+        return table
@@ -0,0 +1,255 @@
+"""
+Amostragem determinística para avaliação online com LLM Judge.
+
+Este módulo fornece a decisão de avaliar/pular baseada em hash estável do ID do
+trace/sessão (reprodutível entre réplicas sem coordenação), taxas estratificadas por
+categoria e um reservatório determinístico para cotas diárias de tamanho fixo.
+"""
+
+import hashlib
+import heapq
+import itertools
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+from examples.llm_judge_implementation import LLMJudge
+
+logger = logging.getLogger(__name__)
+
+_HASH_SPACE = float(2 ** 64)
+
+
+def hash_fraction(key: str, salt: str = "") -> float:
+    """Mapeia uma chave para [0, 1) de forma estável (mesmo valor em qualquer processo)"""
+    digest = hashlib.blake2b(f"{salt}:{key}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / _HASH_SPACE
+
+
+class DeterministicSampler:
+    """Decide avaliar ou pular com base no hash da chave e na taxa da categoria"""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.1,
+        category_rates: Optional[Dict[str, float]] = None,
+        salt: str = "",
+        enabled: bool = True
+    ):
+        """
+        Inicializa o amostrador.
+
+        Args:
+            sample_rate: Fração de itens avaliados (categorias sem taxa própria)
+            category_rates: Taxas por categoria (estratificação)
+            salt: Altera a amostra sem mudar a taxa (ex: por experimento)
+            enabled: Se False, todos os itens são avaliados
+        """
+        self.sample_rate = sample_rate
+        self.category_rates = category_rates or {}
+        self.salt = salt
+        self.enabled = enabled
+        self.evaluated: Dict[str, int] = defaultdict(int)
+        self.skipped: Dict[str, int] = defaultdict(int)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "DeterministicSampler":
+        """Cria o amostrador a partir da seção `cost_optimization.sampling`"""
+        sampling = config.get("cost_optimization", {}).get("sampling", config)
+        return cls(
+            sample_rate=sampling.get("sample_rate", 0.1),
+            category_rates=sampling.get("category_rates") or {},
+            salt=sampling.get("salt", ""),
+            enabled=sampling.get("enabled", True)
+        )
+
+    def rate_for(self, category: Optional[str] = None) -> float:
+        if not self.enabled:
+            return 1.0
+        if category is not None and category in self.category_rates:
+            return self.category_rates[category]
+        return self.sample_rate
+
+    def should_evaluate(self, key: str, category: Optional[str] = None) -> bool:
+        """Decisão estável: a mesma chave sempre recebe a mesma resposta"""
+        rate = self.rate_for(category)
+        selected = rate >= 1.0 or (rate > 0.0 and hash_fraction(key, self.salt) < rate)
+
+        counter = self.evaluated if selected else self.skipped
+        counter[category or "default"] += 1
+        return selected
+
+    def stats(self) -> Dict[str, Any]:
+        categories = set(self.evaluated) | set(self.skipped)
+        return {
+            category: {
+                "evaluated": self.evaluated[category],
+                "skipped": self.skipped[category],
+                "rate": self.rate_for(None if category == "default" else category)
+            }
+            for category in sorted(categories)
+        }
+
+
+class DailyReservoir:
+    """
+    Reservatório de tamanho fixo por dia para cotas diárias de avaliação.
+
+    Mantém os `capacity` itens com menor hash da chave (bottom-k), então a amostra é
+    uniforme, independe da ordem de chegada e é a mesma em todas as réplicas; a união
+    dos reservatórios de várias réplicas pode ser reduzida ao mesmo bottom-k.
+
+    Na virada do dia, a amostra do dia anterior é guardada até ser drenada com
+    `drain(day)` (`pending_days()` lista os dias ainda não drenados).
+    """
+
+    def __init__(self, capacity: int, salt: str = ""):
+        if capacity < 1:
+            raise ValueError("capacity deve ser >= 1")
+        self.capacity = capacity
+        self.salt = salt
+        self.seen = 0
+        self._day: Optional[str] = None
+        # max-heap via -hash; o contador desempata chaves repetidas sem comparar os itens
+        self._heap: List[Tuple[float, str, int, Any]] = []
+        self._counter = itertools.count()
+        self._closed: Dict[str, List[Any]] = {}
+
+    @staticmethod
+    def _today() -> str:
+        return time.strftime("%Y-%m-%d", time.gmtime())
+
+    def offer(self, key: str, item: Any) -> bool:
+        """
+        Oferece um item ao reservatório do dia.
+
+        Returns:
+            True se o item está (por enquanto) no reservatório
+        """
+        today = self._today()
+        if self._day != today:
+            if self._heap:
+                logger.info(
+                    f"Reservatório de {self._day} guardado até o drain ({len(self._heap)} itens)"
+                )
+                self._closed[self._day] = self._selected()
+            self._day = today
+            self._heap = []
+            self.seen = 0
+
+        self.seen += 1
+        priority = hash_fraction(key, self.salt)
+        entry = (-priority, key, next(self._counter), item)
+        if len(self._heap) < self.capacity:
+            heapq.heappush(self._heap, entry)
+            return True
+        if priority < -self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def pending_days(self) -> List[str]:
+        """Dias anteriores com amostra ainda não drenada"""
+        return sorted(self._closed)
+
+    def drain(self, day: Optional[str] = None) -> List[Any]:
+        """
+        Retorna os itens selecionados (ordem estável por hash) e esvazia o reservatório.
+
+        Args:
+            day: Dia (AAAA-MM-DD) de uma amostra anterior; None drena o dia atual
+        """
+        if day is not None and day != self._day:
+            return self._closed.pop(day, [])
+        selected = self._selected()
+        self._heap = []
+        return selected
+
+    def _selected(self) -> List[Any]:
+        return [entry[-1] for entry in sorted(self._heap, key=lambda entry: entry[:3], reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class SampledJudge:
+    """Front-end de amostragem para `LLMJudge`/`LangfuseLLMJudge`"""
+
+    def __init__(self, judge: LLMJudge, sampler: DeterministicSampler):
+        """
+        Inicializa o front-end.
+
+        Args:
+            judge: Judge que avalia os itens selecionados
+            sampler: Amostrador determinístico
+        """
+        self.judge = judge
+        self.sampler = sampler
+
+    async def evaluate_response(
+        self,
+        sample_key: str,
+        category: Optional[str] = None,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """
+        Avalia a resposta se o item for amostrado.
+
+        Args:
+            sample_key: ID estável do trace/sessão usado na decisão
+            category: Categoria para taxas estratificadas
+            **kwargs: Argumentos de `evaluate_response` (inclui `trace_id` no Langfuse)
+
+        Returns:
+            Avaliação ou marcador `sampled_out`
+        """
+        if not self.sampler.should_evaluate(sample_key, category):
+            return self._sampled_out("response_evaluation", category, kwargs.get("trace_id"))
+        return await self.judge.evaluate_response(**kwargs)
+
+    async def evaluate_trajectory(
+        self,
+        sample_key: str,
+        category: Optional[str] = None,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Avalia a trajetória se o item for amostrado (ver `evaluate_response`)"""
+        if not self.sampler.should_evaluate(sample_key, category):
+            return self._sampled_out("trajectory_evaluation", category, kwargs.get("trace_id"))
+        return await self.judge.evaluate_trajectory(**kwargs)
+
+    def _sampled_out(
+        self,
+        trace_name: str,
+        category: Optional[str],
+        trace_id: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Registra o item como não amostrado (um trace no Langfuse, se houver).
+
+        Com o `BufferedLangfuseExporter` do judge, o registro vai para a fila em segundo
+        plano; sem ele, é feito inline.
+        """
+        rate = self.sampler.rate_for(category)
+        langfuse = getattr(self.judge, "langfuse", None)
+        if langfuse is not None and trace_id is not None:
+            trace_kwargs = {
+                "name": trace_name,
+                "id": trace_id,
+                "metadata": {"sampled_out": True, "sample_rate": rate, "category": category}
+            }
+            exporter = getattr(self.judge, "exporter", None)
+            if exporter is not None:
+                exporter.enqueue(langfuse.trace, **trace_kwargs)
+            else:
+                try:
+                    langfuse.trace(**trace_kwargs)
+                except Exception as e:
+                    logger.warning(f"Falha ao registrar item não amostrado no Langfuse: {e}")
+
+        return {
+            "sampled_out": True,
+            "sample_rate": rate,
+            "category": category
+        }
@@ -0,0 +1,322 @@
+"""
+Execução de suítes em vários processos (shards), usando todos os núcleos.
+
+Este módulo fornece o `ShardedSuiteRunner`: os casos de um JSONL são distribuídos entre
+processos pelo hash estável do ID; cada processo tem seu próprio event loop e `LLMJudge`
+(criado por uma fábrica) e roda um `StreamingSuiteEvaluator` sobre o seu shard, com
+journal e retomada próprios. Os limites de RPM/TPM são compartilhados entre os processos
+por token buckets em memória compartilhada, e as saídas dos shards são intercaladas de
+forma determinística na ordem de entrada.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+from examples.judge_rate_limit import ModelRateLimiter, TokenBucket
+from examples.judge_sampling import hash_fraction
+from examples.judge_streaming import StreamingSuiteEvaluator
+from examples.llm_judge_implementation import LLMJudge
+
+logger = logging.getLogger(__name__)
+
+# "spawn" evita herdar locks/loops do processo pai e funciona igual em todos os sistemas
+_CONTEXT = multiprocessing.get_context("spawn")
+
+# Registros por bloco ordenado em memória na ordenação externa da saída de um shard
+SORT_RUN_SIZE = 10000
+# Blocos abertos ao mesmo tempo em cada intercalação (limita descritores de arquivo)
+MERGE_FAN_IN = 64
+
+
+def shard_index(item_id: str, num_shards: int, salt: str = "") -> int:
+    """Shard de um caso: estável entre execuções e processos"""
+    return min(int(hash_fraction(item_id, salt) * num_shards), num_shards - 1)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket em memória compartilhada entre processos.
+
+    Cada `acquire` reserva os tokens sob um lock de processo (podendo deixar saldo
+    negativo) e depois dorme fora do lock até a reserva ser reposta, então o lock nunca
+    fica preso durante a espera.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute deve ser > 0")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(rate_per_minute / 10.0, 1.0)
+        # Um único lock protege os dois valores
+        self._state = _CONTEXT.Array("d", [self.capacity, time.monotonic()], lock=True)
+
+    @property
+    def tokens(self) -> float:
+        with self._state.get_lock():
+            return self._state[0]
+
+    def _refill_locked(self) -> float:
+        now = time.monotonic()
+        tokens = min(self.capacity, self._state[0] + (now - self._state[1]) * self.rate)
+        self._state[1] = now
+        return tokens
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        needed = min(amount, self.capacity)
+        with self._state.get_lock():
+            tokens = self._refill_locked()
+            waited = max(needed - tokens, 0.0) / self.rate
+            self._state[0] = tokens - amount
+        if waited:
+            await asyncio.sleep(waited)
+        return waited
+
+    def penalize(self, seconds: float) -> None:
+        with self._state.get_lock():
+            tokens = self._refill_locked()
+            self._state[0] = min(tokens, 0.0) - seconds * self.rate
+
+
+class SharedModelRateLimiter(ModelRateLimiter):
+    """`ModelRateLimiter` com buckets compartilhados (crie no processo pai)"""
+
+    def set_limits(
+        self,
+        model: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ) -> None:
+        self._buckets[model] = (
+            SharedTokenBucket(requests_per_minute) if requests_per_minute else None,
+            SharedTokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+
+
+_WORKER_LIMITER: Optional[ModelRateLimiter] = None
+
+
+def _init_worker(limiter: Optional[ModelRateLimiter]) -> None:
+    # Objetos em memória compartilhada só podem ir para o worker na criação do processo
+    global _WORKER_LIMITER
+    _WORKER_LIMITER = limiter
+
+
+def _run_shard(
+    judge_factory: Callable[[], LLMJudge],
+    kind: str,
+    evaluator_options: Dict[str, Any],
+    input_path: str,
+    shard_path: str,
+    shard: int,
+    num_shards: int,
+    salt: str
+) -> Dict[str, Any]:
+    """Executa um shard em um processo do pool (com event loop próprio)"""
+    judge = judge_factory()
+    if _WORKER_LIMITER is not None:
+        judge.rate_limiter = _WORKER_LIMITER
+
+    evaluator = StreamingSuiteEvaluator(judge, kind=kind, **evaluator_options)
+    progress = asyncio.run(evaluator.run(
+        input_path,
+        shard_path,
+        select=lambda item_id: shard_index(item_id, num_shards, salt) == shard
+    ))
+    _sort_shard(shard_path, f"{shard_path}.sorted")
+    return {"shard": shard, "pid": os.getpid(), **progress.to_dict()}
+
+
+def _sort_shard(path: str, sorted_path: str, run_size: int = SORT_RUN_SIZE) -> None:
+    """
+    Ordena a saída do shard pela linha de entrada (último registro por ID prevalece).
+
+    Ordenação externa: blocos de `run_size` registros são ordenados em memória e
+    gravados em arquivos temporários, depois intercalados com `heapq.merge` (no máximo
+    `MERGE_FAN_IN` arquivos abertos por vez); a memória não cresce com o tamanho do shard.
+    """
+    run_paths: List[str] = []
+    created: List[str] = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            while True:
+                run = []
+                for raw in f:
+                    # A posição no arquivo desempata registros da mesma linha (o último vale)
+                    run.append((json.loads(raw)["line"], len(run), raw))
+                    if len(run) >= run_size:
+                        break
+                if not run:
+                    break
+                run.sort()
+                run_path = f"{sorted_path}.run-{len(created)}"
+                created.append(run_path)
+                with open(run_path, "w", encoding="utf-8") as out:
+                    out.writelines(raw for _, _, raw in run)
+                run_paths.append(run_path)
+
+        # Intercalar blocos consecutivos preserva a ordem do arquivo nos empates
+        while len(run_paths) > MERGE_FAN_IN:
+            merged = []
+            for start in range(0, len(run_paths), MERGE_FAN_IN):
+                run_path = f"{sorted_path}.run-{len(created)}"
+                created.append(run_path)
+                with open(run_path, "w", encoding="utf-8") as out:
+                    out.writelines(entry[3] for entry in _merge_runs(run_paths[start:start + MERGE_FAN_IN]))
+                merged.append(run_path)
+            for run_path in run_paths:
+                os.remove(run_path)
+            run_paths = merged
+
+        with open(sorted_path, "w", encoding="utf-8") as out:
+            previous: Optional[tuple] = None
+            for entry in _merge_runs(run_paths):
+                if previous is not None and previous[0] != entry[0]:
+                    out.write(previous[3])
+                previous = entry
+            if previous is not None:
+                out.write(previous[3])
+    finally:
+        for run_path in created:
+            if os.path.exists(run_path):
+                os.remove(run_path)
+
+
+def _merge_runs(run_paths: List[str]) -> Iterator[tuple]:
+    """
+    Intercala blocos ordenados pela chave (linha, bloco, posição): os blocos seguem a
+    ordem do arquivo, então o último registro de cada linha sai por último.
+    """
+    return heapq.merge(*(_read_run(run_path, index) for index, run_path in enumerate(run_paths)))
+
+
+def _read_run(path: str, index: int) -> Iterator[tuple]:
+    for position, (line, raw) in enumerate(_read_sorted(path)):
+        yield line, index, position, raw
+
+
+def _read_sorted(path: str) -> Iterator[tuple]:
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            yield json.loads(raw)["line"], raw
+
+
+def merge_shards(sorted_paths: List[str], output_path: str) -> int:
+    """
+    Intercala as saídas ordenadas dos shards na ordem de entrada (streaming, k-way).
+
+    Returns:
+        Número de registros gravados
+    """
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for _, raw in heapq.merge(*(_read_sorted(path) for path in sorted_paths)):
+            out.write(raw)
+            count += 1
+    return count
+
+
+class ShardedSuiteRunner:
+    """Distribui uma suíte JSONL entre processos e junta os resultados em ordem"""
+
+    def __init__(
+        self,
+        judge_factory: Callable[[], LLMJudge],
+        num_workers: Optional[int] = None,
+        kind: str = "response",
+        rate_limiter: Optional[SharedModelRateLimiter] = None,
+        salt: str = "",
+        **evaluator_options: Any
+    ):
+        """
+        Inicializa o runner.
+
+        Args:
+            judge_factory: Função de nível de módulo que cria o judge em cada processo
+                (precisa ser importável pelo worker)
+            num_workers: Processos (padrão: número de núcleos)
+            kind: "response", "trajectory" ou "comparison"
+            rate_limiter: Limites globais compartilhados por todos os processos
+            salt: Altera a distribuição dos casos entre shards
+            **evaluator_options: Opções do `StreamingSuiteEvaluator` (por processo)
+        """
+        self.judge_factory = judge_factory
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.kind = kind
+        self.rate_limiter = rate_limiter
+        self.salt = salt
+        self.evaluator_options = evaluator_options
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Dict[str, Any],
+        judge_factory: Callable[[], LLMJudge],
+        kind: str = "response"
+    ) -> "ShardedSuiteRunner":
+        """Cria o runner a partir de `sharding`, `streaming_evaluation` e `models`"""
+        sharding = config.get("sharding", {})
+        streaming = config.get("streaming_evaluation", {})
+        limiter = SharedModelRateLimiter.from_config(config)
+        return cls(
+            judge_factory,
+            num_workers=sharding.get("num_workers"),
+            kind=kind,
+            rate_limiter=limiter if limiter._buckets else None,
+            salt=sharding.get("salt", ""),
+            **{
+                key: streaming[key]
+                for key in ("max_concurrency", "queue_size", "flush_every", "fsync", "retry_errors")
+                if key in streaming
+            }
+        )
+
+    def shard_paths(self, output_path: str) -> List[str]:
+        return [f"{output_path}.shard-{i}-of-{self.num_workers}.jsonl" for i in range(self.num_workers)]
+
+    def run(self, input_path: str, output_path: str) -> Dict[str, Any]:
+        """
+        Avalia a suíte em paralelo e grava `output_path` na ordem de entrada.
+
+        Cada shard tem saída e journal próprios: repetir a chamada com o mesmo número de
+        workers retoma uma execução interrompida.
+
+        Returns:
+            {"shards": [...], "records": ..., "elapsed_seconds": ...}
+        """
+        started = time.perf_counter()
+        shard_paths = self.shard_paths(output_path)
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=_CONTEXT,
+            initializer=_init_worker,
+            initargs=(self.rate_limiter,)
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _run_shard,
+                    self.judge_factory,
+                    self.kind,
+                    self.evaluator_options,
+                    input_path,
+                    path,
+                    shard,
+                    self.num_workers,
+                    self.salt
+                )
+                for shard, path in enumerate(shard_paths)
+            ]
+            shards = [future.result() for future in futures]
+
+        records = merge_shards([f"{path}.sorted" for path in shard_paths], output_path)
+        return {
+            "shards": shards,
+            "records": records,
+            "elapsed_seconds": time.perf_counter() - started
+        }
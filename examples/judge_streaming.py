@@ -0,0 +1,391 @@
+"""
+Avaliação de suítes grandes em streaming, com checkpoint e retomada.
+
+Este módulo fornece o `StreamingSuiteEvaluator`: os casos são lidos sob demanda de um
+arquivo JSONL e passam por uma fila assíncrona limitada até o `LLMJudge`; cada resultado
+é gravado imediatamente no JSONL de saída e registrado em um journal de progresso
+(append-only). Ao reiniciar, os casos já concluídos são pulados e a saída é truncada no
+último registro confirmado, então uma execução interrompida retoma de onde parou. A
+memória não cresce com o tamanho da suíte, exceto pelos conjuntos de IDs concluídos e
+enfileirados.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Callable, Iterator, List, Optional, Set, Tuple
+
+from examples.llm_judge_implementation import LLMJudge
+
+logger = logging.getLogger(__name__)
+
+# Argumentos aceitos por cada método de avaliação (demais campos do caso são ignorados)
+_CASE_FIELDS = {
+    "response": ("user_query", "agent_response", "expected_response", "context"),
+    "trajectory": ("expected_trajectory", "actual_trajectory", "context"),
+    "comparison": ("user_query", "responses", "context")
+}
+
+_DONE = object()
+
+
+def read_cases(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Lê casos de um JSONL sob demanda.
+
+    Yields:
+        (número da linha, caso); linhas inválidas viram um caso com `_parse_error`
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                case = json.loads(line)
+            except json.JSONDecodeError as e:
+                case = {"_parse_error": f"JSON inválido na linha {line_number}: {e}"}
+            if not isinstance(case, dict):
+                case = {"_parse_error": f"Linha {line_number} não é um objeto JSON"}
+            yield line_number, case
+
+
+def case_id(line_number: int, case: Dict[str, Any]) -> str:
+    """ID estável do caso: campo `id` ou, na falta dele, o número da linha"""
+    value = case.get("id")
+    return str(value) if value is not None else f"line-{line_number}"
+
+
+@dataclass
+class SuiteProgress:
+    """Contadores de uma execução"""
+    seen: int = 0
+    skipped: int = 0
+    duplicates: int = 0  # IDs repetidos no arquivo de entrada (só o primeiro é avaliado)
+    evaluated: int = 0
+    errors: int = 0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ProgressJournal:
+    """
+    Journal append-only de casos concluídos.
+
+    Cada linha registra o ID, o status e o tamanho do arquivo de saída logo após o
+    resultado ser gravado. As entradas só são escritas depois do flush da saída, então o
+    journal nunca aponta para dados que não chegaram ao disco; na retomada, a saída é
+    truncada no último tamanho registrado para descartar linhas parciais.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        self.failed: Set[str] = set()
+        self.output_size = 0
+        self._file = None
+        self._staged = []
+
+    def load(self) -> None:
+        """Lê o journal existente (a última linha pode estar incompleta)"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                target = self.failed if entry.get("status") == "error" else self.done
+                target.add(entry["id"])
+                self.output_size = max(self.output_size, entry["offset"])
+
+    def open(self) -> None:
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def drop_failed(self, output_path: str) -> int:
+        """
+        Remove da saída os registros com erro (e registros repetidos de um mesmo ID).
+
+        Usado antes de reavaliar os erros (`retry_errors`): a saída confirmada é
+        reescrita com só o último registro de cada ID que não será reavaliado, o journal é
+        regravado com os novos offsets e os dois arquivos são trocados no lugar. Assim
+        cada ID aparece uma única vez na saída.
+
+        Returns:
+            Registros removidos
+        """
+        if not self.failed or not os.path.exists(output_path):
+            return 0
+        retry = self.failed - self.done
+        occurrences: Dict[str, int] = {}
+        with open(output_path, "rb") as f:
+            for raw in _confirmed_lines(f, self.output_size):
+                item_id = json.loads(raw)["id"]
+                occurrences[item_id] = occurrences.get(item_id, 0) + 1
+
+        removed = 0
+        with open(output_path, "rb") as source, \
+                open(f"{output_path}.tmp", "wb") as output, \
+                open(f"{self.path}.tmp", "w", encoding="utf-8") as journal:
+            for raw in _confirmed_lines(source, self.output_size):
+                record = json.loads(raw)
+                item_id = record["id"]
+                occurrences[item_id] -= 1
+                if occurrences[item_id] or item_id in retry:
+                    removed += 1
+                    continue
+                output.write(raw)
+                status = "error" if "error" in record["evaluation"] else "ok"
+                journal.write(json.dumps({"id": item_id, "status": status, "offset": output.tell()}) + "\n")
+            self.output_size = output.tell()
+            for f in (output, journal):
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(f"{output_path}.tmp", output_path)
+        os.replace(f"{self.path}.tmp", self.path)
+        self.failed = set()
+        return removed
+
+    def stage(self, item_id: str, status: str, offset: int) -> None:
+        """Registra um resultado já escrito (efetivado no próximo `commit`)"""
+        self._staged.append(json.dumps({"id": item_id, "status": status, "offset": offset}) + "\n")
+
+    def commit(self, fsync: bool = False) -> None:
+        """Grava as entradas pendentes; chame só depois do flush da saída"""
+        if self._file is None or not self._staged:
+            return
+        self._file.write("".join(self._staged))
+        self._staged.clear()
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _confirmed_lines(f, size: int) -> Iterator[bytes]:
+    """Linhas completas da saída até o último offset confirmado no journal"""
+    while f.tell() < size:
+        raw = f.readline()
+        if not raw.endswith(b"\n") or f.tell() > size:
+            return
+        yield raw
+
+
+async def _unless_failed(awaitable, watched: List["asyncio.Task"]) -> Any:
+    """
+    Aguarda `awaitable`, mas propaga a falha de uma das tarefas `watched` se alguma
+    terminar antes.
+
+    Sem isso, a morte do writer (ou de um worker) deixa as demais tarefas bloqueadas nas
+    filas cheias e a execução nunca termina.
+    """
+    task = asyncio.ensure_future(awaitable)
+    done, _ = await asyncio.wait({task, *watched}, return_when=asyncio.FIRST_COMPLETED)
+    if task in done:
+        return task.result()
+    task.cancel()
+    for finished in done:
+        finished.result()  # Relança a exceção da tarefa
+    raise RuntimeError("Tarefa da suíte terminou antes do fim da entrada")
+
+
+class StreamingSuiteEvaluator:
+    """Pipeline leitor → fila limitada → judge → saída JSONL + journal"""
+
+    def __init__(
+        self,
+        judge: LLMJudge,
+        kind: str = "response",
+        max_concurrency: int = 10,
+        queue_size: int = 100,
+        flush_every: int = 50,
+        fsync: bool = False,
+        retry_errors: bool = False
+    ):
+        """
+        Inicializa o avaliador.
+
+        Args:
+            judge: Judge usado em cada caso
+            kind: "response", "trajectory" ou "comparison"
+            max_concurrency: Avaliações simultâneas (workers)
+            queue_size: Casos lidos e ainda não avaliados (backpressure sobre a leitura)
+            flush_every: Resultados entre flushes da saída e do journal
+            fsync: Força fsync a cada flush (mais lento, sobrevive a queda do sistema)
+            retry_errors: Na retomada, reavalia casos que terminaram com erro; os
+                registros de erro antigos são removidos da saída antes (um registro por ID)
+        """
+        if kind not in _CASE_FIELDS:
+            raise ValueError(f"Tipo de avaliação desconhecido: {kind}")
+        self.judge = judge
+        self.kind = kind
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.retry_errors = retry_errors
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], judge: LLMJudge, kind: str = "response") -> "StreamingSuiteEvaluator":
+        """Cria o avaliador a partir da seção `streaming_evaluation`"""
+        streaming = config.get("streaming_evaluation", config)
+        return cls(
+            judge,
+            kind=kind,
+            max_concurrency=streaming.get("max_concurrency", 10),
+            queue_size=streaming.get("queue_size", 100),
+            flush_every=streaming.get("flush_every", 50),
+            fsync=streaming.get("fsync", False),
+            retry_errors=streaming.get("retry_errors", False)
+        )
+
+    async def run(
+        self,
+        input_path: str,
+        output_path: str,
+        journal_path: Optional[str] = None,
+        select: Optional[Callable[[str], bool]] = None
+    ) -> SuiteProgress:
+        """
+        Avalia a suíte, retomando a partir do journal se ele existir.
+
+        Args:
+            input_path: JSONL de casos (um objeto por linha; `id` opcional)
+            output_path: JSONL de resultados {"id", "line", "evaluation"} (ordem de término,
+                um registro por ID; IDs repetidos na entrada só são avaliados na primeira
+                ocorrência)
+            journal_path: Journal de progresso (padrão: `output_path + ".journal"`)
+            select: Filtro por ID (ex: só os casos de um shard); os demais são ignorados
+
+        Returns:
+            Contadores da execução
+
+        Raises:
+            Exception: Erro do writer (ex: avaliação não serializável, falha de disco); os
+                resultados já gravados ficam confirmados no journal
+        """
+        started = time.perf_counter()
+        journal = ProgressJournal(journal_path or f"{output_path}.journal")
+        journal.load()
+        if self.retry_errors:
+            removed = journal.drop_failed(output_path)
+            if removed:
+                logger.info(f"{removed} registros com erro removidos de {output_path} para reavaliação")
+        skip = journal.done if self.retry_errors else journal.done | journal.failed
+        if skip:
+            logger.info(f"Retomando: {len(skip)} casos já concluídos em {journal.path}")
+
+        progress = SuiteProgress()
+        cases: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        output = self._open_output(output_path, journal.output_size)
+        journal.open()
+        workers = [asyncio.create_task(self._worker(cases, results)) for _ in range(self.max_concurrency)]
+        writer = asyncio.create_task(self._writer(results, output, journal, progress))
+        enqueued: Set[str] = set()
+        try:
+            for line_number, case in read_cases(input_path):
+                item_id = case_id(line_number, case)
+                if select is not None and not select(item_id):
+                    continue
+                progress.seen += 1
+                if item_id in enqueued:
+                    progress.duplicates += 1
+                    logger.warning(f"ID repetido na linha {line_number} ignorado: {item_id}")
+                    continue
+                enqueued.add(item_id)
+                if item_id in skip:
+                    progress.skipped += 1
+                    continue
+                await _unless_failed(cases.put((item_id, line_number, case)), workers + [writer])
+
+            for _ in workers:
+                await _unless_failed(cases.put(_DONE), [writer])
+            await _unless_failed(asyncio.gather(*workers), [writer])
+            await _unless_failed(results.put(_DONE), [writer])
+            await writer
+        finally:
+            for task in workers + [writer]:
+                task.cancel()
+            self._flush_output(output)
+            journal.commit(self.fsync)
+            output.close()
+            journal.close()
+
+        progress.elapsed_seconds = time.perf_counter() - started
+        return progress
+
+    @staticmethod
+    def _open_output(path: str, confirmed_size: int):
+        """Abre a saída para append, descartando o que passou do último registro confirmado"""
+        output = open(path, "ab")
+        if output.tell() > confirmed_size:
+            output.truncate(confirmed_size)
+            output.seek(confirmed_size)
+        return output
+
+    def _flush_output(self, output) -> None:
+        output.flush()
+        if self.fsync:
+            os.fsync(output.fileno())
+
+    async def _worker(self, cases: asyncio.Queue, results: asyncio.Queue) -> None:
+        method = {
+            "response": self.judge.evaluate_response,
+            "trajectory": self.judge.evaluate_trajectory,
+            "comparison": self.judge.compare_responses
+        }[self.kind]
+        fields = _CASE_FIELDS[self.kind]
+
+        while True:
+            item = await cases.get()
+            if item is _DONE:
+                return
+            item_id, line_number, case = item
+            if "_parse_error" in case:
+                evaluation = self.judge._error_evaluation(case["_parse_error"])
+            else:
+                try:
+                    evaluation = await method(**{key: case[key] for key in fields if key in case})
+                except Exception as e:
+                    logger.error(f"Erro ao avaliar caso {item_id}: {e}", exc_info=True)
+                    evaluation = self.judge._error_evaluation(str(e))
+            await results.put((item_id, line_number, evaluation))
+
+    async def _writer(
+        self,
+        results: asyncio.Queue,
+        output,
+        journal: ProgressJournal,
+        progress: SuiteProgress
+    ) -> None:
+        unflushed = 0
+        while True:
+            item = await results.get()
+            if item is _DONE:
+                return
+            item_id, line_number, evaluation = item
+            record = {"id": item_id, "line": line_number, "evaluation": dict(evaluation)}
+            output.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+
+            failed = "error" in evaluation
+            progress.evaluated += 1
+            progress.errors += int(failed)
+            journal.stage(item_id, "error" if failed else "ok", output.tell())
+            unflushed += 1
+            if unflushed >= self.flush_every:
+                # A saída é persistida antes do journal que aponta para ela
+                self._flush_output(output)
+                journal.commit(self.fsync)
+                unflushed = 0
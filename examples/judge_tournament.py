@@ -0,0 +1,313 @@
+"""
+Ranking por torneio para comparar muitas respostas.
+
+Este módulo fornece o `TournamentRanker`: em vez de colocar todos os candidatos em um
+único prompt de `compare_responses`, agenda comparações em pares (merge sort ou sistema
+suíço, O(N log N) chamadas em vez de todos os pares), executa-as em paralelo, reaproveita
+pares simétricos e combina os resultados em forças de Bradley-Terry/Elo. O resultado tem
+o mesmo formato de `LLMJudge.compare_responses` (`rankings`, `scores`, `winner`).
+"""
+
+import asyncio
+import logging
+import math
+from typing import Dict, Any, List, Optional, Tuple
+
+from examples.llm_judge_implementation import LLMJudge
+
+logger = logging.getLogger(__name__)
+
+MODES = ("merge", "swiss")
+
+
+def bradley_terry(
+    num_items: int,
+    outcomes: List[Tuple[int, int, float]],
+    prior_games: float = 1.0,
+    iterations: int = 200,
+    tolerance: float = 1e-9
+) -> List[float]:
+    """
+    Forças de Bradley-Terry por MM (Hunter, 2004).
+
+    Args:
+        num_items: Número de candidatos
+        outcomes: (a, b, resultado de a contra b em [0, 1]; 0.5 = empate)
+        prior_games: Jogos virtuais (metade vitória, metade derrota) contra um oponente
+            de força 1 por candidato; evita forças infinitas para invictos
+        iterations: Máximo de iterações
+        tolerance: Critério de convergência
+
+    Returns:
+        Forças positivas com média geométrica 1
+    """
+    wins = [prior_games / 2.0] * num_items
+    pair_games: Dict[Tuple[int, int], float] = {}
+    for a, b, outcome in outcomes:
+        wins[a] += outcome
+        wins[b] += 1.0 - outcome
+        key = (min(a, b), max(a, b))
+        pair_games[key] = pair_games.get(key, 0.0) + 1.0
+
+    strengths = [1.0] * num_items
+    for _ in range(iterations):
+        denominators = [prior_games / (s + 1.0) for s in strengths]
+        for (a, b), games in pair_games.items():
+            shared = games / (strengths[a] + strengths[b])
+            denominators[a] += shared
+            denominators[b] += shared
+        updated = [w / d for w, d in zip(wins, denominators)]
+        # Normaliza pela média geométrica (a escala de BT é arbitrária)
+        scale = math.exp(sum(math.log(s) for s in updated) / num_items)
+        updated = [s / scale for s in updated]
+        delta = max(abs(u - s) for u, s in zip(updated, strengths))
+        strengths = updated
+        if delta < tolerance:
+            break
+    return strengths
+
+
+def elo_ratings(strengths: List[float], base: float = 1500.0) -> List[float]:
+    """Converte forças de Bradley-Terry para a escala Elo (400 pontos = 10:1)"""
+    return [base + 400.0 * math.log10(s) for s in strengths]
+
+
+class TournamentRanker:
+    """Substituto de `compare_responses` baseado em comparações em pares"""
+
+    def __init__(
+        self,
+        judge: LLMJudge,
+        mode: str = "merge",
+        min_candidates: int = 5,
+        swiss_rounds: Optional[int] = None,
+        max_concurrency: int = 8,
+        debias_position: bool = False,
+        tie_margin: float = 0.05
+    ):
+        """
+        Inicializa o ranker.
+
+        Args:
+            judge: Judge usado nas comparações em par (`compare_responses` com 2 respostas)
+            mode: "merge" (merge sort) ou "swiss" (sistema suíço)
+            min_candidates: Abaixo disso, delega para um único `compare_responses`
+            swiss_rounds: Rodadas do sistema suíço (padrão: ceil(log2 N) + 1)
+            max_concurrency: Comparações simultâneas
+            debias_position: Compara também na ordem inversa e usa a média (2x chamadas)
+            tie_margin: Diferença de score abaixo da qual o par é empate
+        """
+        if mode not in MODES:
+            raise ValueError(f"Modo de torneio desconhecido: {mode}")
+        self.judge = judge
+        self.mode = mode
+        self.min_candidates = min_candidates
+        self.swiss_rounds = swiss_rounds
+        self.max_concurrency = max_concurrency
+        self.debias_position = debias_position
+        self.tie_margin = tie_margin
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], judge: LLMJudge) -> "TournamentRanker":
+        """Cria o ranker a partir de `evaluation_types.comparative.tournament`"""
+        tournament = (
+            config.get("evaluation_types", {}).get("comparative", {}).get("tournament", config)
+        )
+        return cls(
+            judge,
+            mode=tournament.get("mode", "merge"),
+            min_candidates=tournament.get("min_candidates", 5),
+            swiss_rounds=tournament.get("swiss_rounds"),
+            max_concurrency=tournament.get("max_concurrency", 8),
+            debias_position=tournament.get("debias_position", False),
+            tie_margin=tournament.get("tie_margin", 0.05)
+        )
+
+    async def compare_responses(
+        self,
+        user_query: str,
+        responses: List[Dict[str, str]],
+        context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Ranqueia as respostas por torneio.
+
+        Args:
+            user_query: Pergunta original
+            responses: Lista de dicts com 'response' e 'label'
+            context: Contexto adicional
+
+        Returns:
+            Formato de `compare_responses` (`rankings`, `scores`, `winner`, ...) mais
+            `elo` e `tournament` (modo, chamadas, partidas)
+        """
+        if len(responses) < max(self.min_candidates, 2):
+            return await self.judge.compare_responses(user_query, responses, context)
+
+        match = _Tournament(self, user_query, responses, context)
+        if self.mode == "merge":
+            order = await match.merge_sort(list(range(len(responses))))
+        else:
+            order = await match.swiss()
+
+        strengths = bradley_terry(len(responses), match.outcomes)
+        if self.mode == "swiss":
+            order = sorted(range(len(responses)), key=lambda i: (-strengths[i], i))
+        return match.result(order, strengths)
+
+
+class _Tournament:
+    """Estado de um torneio: cache de pares, partidas e concorrência"""
+
+    def __init__(
+        self,
+        ranker: TournamentRanker,
+        user_query: str,
+        responses: List[Dict[str, str]],
+        context: Optional[Dict[str, Any]]
+    ):
+        self.ranker = ranker
+        self.user_query = user_query
+        self.responses = responses
+        self.context = context
+        self.semaphore = asyncio.Semaphore(ranker.max_concurrency)
+        # Par não ordenado -> tarefa com o resultado do menor índice contra o maior
+        self.pairs: Dict[Tuple[int, int], asyncio.Task] = {}
+        self.outcomes: List[Tuple[int, int, float]] = []
+        self.judge_calls = 0
+        self.cache_hits = 0
+        self.errors = 0
+
+    async def compare(self, a: int, b: int) -> float:
+        """Resultado de `a` contra `b` em [0, 1], com cache simétrico"""
+        key = (min(a, b), max(a, b))
+        task = self.pairs.get(key)
+        if task is None:
+            task = self.pairs[key] = asyncio.ensure_future(self._play(*key))
+        else:
+            self.cache_hits += 1
+        outcome = await task
+        return outcome if a == key[0] else 1.0 - outcome
+
+    async def _play(self, a: int, b: int) -> float:
+        outcome = await self._judge_pair(a, b)
+        if self.ranker.debias_position:
+            outcome = (outcome + 1.0 - await self._judge_pair(b, a)) / 2.0
+        self.outcomes.append((a, b, outcome))
+        return outcome
+
+    async def _judge_pair(self, first: int, second: int) -> float:
+        """Uma chamada ao judge com duas respostas; resultado da primeira"""
+        async with self.semaphore:
+            self.judge_calls += 1
+            try:
+                comparison = await self.ranker.judge.compare_responses(
+                    self.user_query,
+                    [self.responses[first], self.responses[second]],
+                    self.context
+                )
+            except Exception as e:
+                logger.error(f"Erro ao comparar {first} x {second}: {e}")
+                comparison = {"error": str(e)}
+        return self._outcome(comparison)
+
+    def _outcome(self, comparison: Dict[str, Any]) -> float:
+        if comparison.get("error"):
+            self.errors += 1
+            return 0.5
+
+        scores = comparison.get("scores")
+        if (
+            isinstance(scores, list) and len(scores) == 2
+            and all(isinstance(s, (int, float)) and not isinstance(s, bool) for s in scores)
+        ):
+            if abs(scores[0] - scores[1]) < self.ranker.tie_margin:
+                return 0.5
+            return 1.0 if scores[0] > scores[1] else 0.0
+
+        winner = comparison.get("winner")
+        if winner in (0, 1):
+            return 1.0 - float(winner)
+        return 0.5
+
+    async def merge_sort(self, items: List[int]) -> List[int]:
+        """Merge sort assíncrono: as metades são ordenadas em paralelo"""
+        if len(items) <= 1:
+            return items
+        middle = len(items) // 2
+        left, right = await asyncio.gather(
+            self.merge_sort(items[:middle]),
+            self.merge_sort(items[middle:])
+        )
+        merged = []
+        i = j = 0
+        while i < len(left) and j < len(right):
+            # Empate mantém a ordem (estável): o da esquerda vem primeiro
+            if await self.compare(left[i], right[j]) >= 0.5:
+                merged.append(left[i])
+                i += 1
+            else:
+                merged.append(right[j])
+                j += 1
+        return merged + left[i:] + right[j:]
+
+    async def swiss(self) -> List[int]:
+        """Sistema suíço: cada rodada pareia vizinhos na classificação, sem revanche"""
+        count = len(self.responses)
+        rounds = self.ranker.swiss_rounds or math.ceil(math.log2(count)) + 1
+        points = [0.0] * count
+        for _ in range(rounds):
+            standings = sorted(range(count), key=lambda i: (-points[i], i))
+            pairs = self._pair_round(standings)
+            if not pairs:
+                break
+            results = await asyncio.gather(*(self.compare(a, b) for a, b in pairs))
+            for (a, b), outcome in zip(pairs, results):
+                points[a] += outcome
+                points[b] += 1.0 - outcome
+        return sorted(range(count), key=lambda i: (-points[i], i))
+
+    def _pair_round(self, standings: List[int]) -> List[Tuple[int, int]]:
+        unpaired = list(standings)
+        pairs = []
+        while len(unpaired) > 1:
+            a = unpaired.pop(0)
+            # Próximo da classificação que ainda não enfrentou `a` (sem opção, pula a rodada)
+            for index, b in enumerate(unpaired):
+                if (min(a, b), max(a, b)) not in self.pairs:
+                    pairs.append((a, b))
+                    unpaired.pop(index)
+                    break
+        # Com número ímpar, o último fica de folga
+        return pairs
+
+    def result(self, order: List[int], strengths: List[float]) -> Dict[str, Any]:
+        """Monta o resultado no formato de `compare_responses`"""
+        # Probabilidade de vencer um candidato de força média (média geométrica = 1)
+        scores = [s / (s + 1.0) for s in strengths]
+        labels = [r.get("label", f"Modelo {i + 1}") for i, r in enumerate(self.responses)]
+        matches = [
+            {"a": a, "b": b, "outcome": outcome}
+            for a, b, outcome in sorted(self.outcomes)
+        ]
+        return {
+            "rankings": order,
+            "scores": scores,
+            "winner": order[0],
+            "comparison": " > ".join(labels[i] for i in order),
+            "reasoning": (
+                f"Torneio ({self.ranker.mode}) com {len(self.outcomes)} pares comparados; "
+                "scores são a probabilidade de Bradley-Terry de vencer um candidato médio."
+            ),
+            "elo": elo_ratings(strengths),
+            "tournament": {
+                "mode": self.ranker.mode,
+                "candidates": len(self.responses),
+                "pairs": len(self.outcomes),
+                "judge_calls": self.judge_calls,
+                "cache_hits": self.cache_hits,
+                "errors": self.errors,
+                "all_pairs_calls": len(self.responses) * (len(self.responses) - 1) // 2,
+                "matches": matches
+            }
+        }
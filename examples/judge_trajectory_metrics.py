@@ -0,0 +1,241 @@
+"""
+Pré-avaliação local e determinística de trajetórias.
+
+Este módulo calcula `order_match` (LCS), `completeness` (cobertura das ações esperadas)
+e `efficiency` (proporção de ações extras) diretamente das listas de ações, em
+microssegundos. O `TrajectoryPreScorer` decide quando o resultado é inequívoco (match
+exato ou erro grande) e dispensa o modelo; nos demais casos, o LLM julga apenas a
+`correctness`, recebendo as métricas já calculadas no prompt.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, Sequence
+
+from examples.judge_output_profiles import check_profile
+
+
+def lcs_length(expected: Sequence[str], actual: Sequence[str]) -> int:
+    """Tamanho da maior subsequência comum (programação dinâmica com uma linha)"""
+    if not expected or not actual:
+        return 0
+    previous = [0] * (len(actual) + 1)
+    for step in expected:
+        current = [0]
+        for index, other in enumerate(actual):
+            if step == other:
+                current.append(previous[index] + 1)
+            else:
+                current.append(max(previous[index + 1], current[index]))
+        previous = current
+    return previous[-1]
+
+
+@dataclass
+class TrajectoryMetrics:
+    """Métricas determinísticas de uma trajetória (0-1)"""
+    order_match: float
+    completeness: float
+    efficiency: float
+    exact_match: bool
+    missing_steps: List[str] = field(default_factory=list)
+    extra_steps: List[str] = field(default_factory=list)
+
+    @property
+    def score(self) -> float:
+        """Média das três métricas locais"""
+        return (self.order_match + self.completeness + self.efficiency) / 3.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for key in ("order_match", "completeness", "efficiency"):
+            data[key] = round(data[key], 4)
+        return data
+
+
+def compute_trajectory_metrics(
+    expected_trajectory: Sequence[str],
+    actual_trajectory: Sequence[str]
+) -> TrajectoryMetrics:
+    """
+    Compara duas trajetórias.
+
+    - order_match: LCS / ações em comum (ordem relativa das ações que coincidem)
+    - completeness: ações esperadas presentes na real (contando repetições)
+    - efficiency: 1 - ações extras / tamanho da trajetória real
+    """
+    expected = [str(step) for step in expected_trajectory]
+    actual = [str(step) for step in actual_trajectory]
+    expected_counts = Counter(expected)
+    actual_counts = Counter(actual)
+    common = sum((expected_counts & actual_counts).values())
+
+    if not expected:
+        completeness = 1.0
+    else:
+        completeness = common / len(expected)
+    if not actual:
+        efficiency = 1.0 if not expected else 0.0
+    else:
+        efficiency = common / len(actual)
+    if common:
+        order_match = lcs_length(expected, actual) / common
+    else:
+        order_match = 1.0 if not expected and not actual else 0.0
+
+    return TrajectoryMetrics(
+        order_match=order_match,
+        completeness=completeness,
+        efficiency=efficiency,
+        exact_match=expected == actual,
+        missing_steps=sorted((expected_counts - actual_counts).elements()),
+        extra_steps=sorted((actual_counts - expected_counts).elements())
+    )
+
+
+class TrajectoryPreScorer:
+    """Decide quando a trajetória dispensa o modelo e monta a avaliação local"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        skip_exact_match: bool = True,
+        miss_completeness: float = 0.3,
+        miss_score: float = 0.3
+    ):
+        """
+        Inicializa o pré-avaliador.
+
+        Args:
+            enabled: Se False, o judge sempre chama o modelo com o template completo
+            skip_exact_match: Trajetória idêntica à esperada recebe score 1.0 sem modelo
+            miss_completeness: Cobertura abaixo disso é erro grande (sem modelo)
+            miss_score: Score local abaixo disso também é erro grande
+        """
+        self.enabled = enabled
+        self.skip_exact_match = skip_exact_match
+        self.miss_completeness = miss_completeness
+        self.miss_score = miss_score
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "TrajectoryPreScorer":
+        """Cria o pré-avaliador a partir de `evaluation_types.trajectory.local_prescoring`"""
+        options = config.get("evaluation_types", {}).get("trajectory", {}).get("local_prescoring", config)
+        return cls(
+            enabled=options.get("enabled", True),
+            skip_exact_match=options.get("skip_exact_match", True),
+            miss_completeness=options.get("miss_completeness", 0.3),
+            miss_score=options.get("miss_score", 0.3)
+        )
+
+    def score(
+        self,
+        expected_trajectory: Sequence[str],
+        actual_trajectory: Sequence[str]
+    ) -> TrajectoryMetrics:
+        return compute_trajectory_metrics(expected_trajectory, actual_trajectory)
+
+    def local_evaluation(
+        self,
+        metrics: TrajectoryMetrics,
+        output_profile: str = "full"
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Avaliação sem modelo quando o caso é inequívoco (None caso contrário).
+
+        Args:
+            metrics: Métricas locais da trajetória
+            output_profile: Perfil de saída do judge (mesmos campos da saída do modelo)
+        """
+        if self.skip_exact_match and metrics.exact_match:
+            return self._evaluation(
+                metrics,
+                correctness=1.0,
+                justification="Trajetória idêntica à esperada.",
+                strengths=["Todas as ações esperadas, na ordem correta e sem ações extras"],
+                weaknesses=[],
+                recommendations=[],
+                output_profile=output_profile
+            )
+
+        if metrics.completeness < self.miss_completeness or metrics.score < self.miss_score:
+            return self._evaluation(
+                metrics,
+                correctness=0.0,
+                justification=(
+                    f"Trajetória muito distante da esperada: cobertura {metrics.completeness:.0%}, "
+                    f"ordem {metrics.order_match:.0%}, eficiência {metrics.efficiency:.0%}."
+                ),
+                strengths=[],
+                weaknesses=self._weaknesses(metrics),
+                recommendations=["Revisar o planejamento de ações do agente para este caso"],
+                output_profile=output_profile
+            )
+        return None
+
+    def combine(
+        self,
+        metrics: TrajectoryMetrics,
+        judged: Dict[str, Any],
+        output_profile: str = "full"
+    ) -> Dict[str, Any]:
+        """Junta as métricas locais à `correctness` julgada pelo modelo"""
+        if "error" in judged:
+            return judged
+        correctness = judged.get("correctness")
+        if not isinstance(correctness, (int, float)) or isinstance(correctness, bool):
+            correctness = judged.get("score", metrics.score)
+        evaluation = dict(judged)
+        evaluation.update(self._evaluation(
+            metrics,
+            correctness=float(correctness),
+            justification=judged.get("justification", judged.get("reason", "")),
+            strengths=judged.get("strengths", []),
+            weaknesses=judged.get("weaknesses", []),
+            recommendations=judged.get("recommendations", []),
+            output_profile=output_profile
+        ))
+        evaluation["source"] = "hybrid"
+        return evaluation
+
+    @staticmethod
+    def _weaknesses(metrics: TrajectoryMetrics) -> List[str]:
+        weaknesses = []
+        if metrics.missing_steps:
+            weaknesses.append(f"Ações ausentes: {', '.join(metrics.missing_steps)}")
+        if metrics.extra_steps:
+            weaknesses.append(f"Ações extras: {', '.join(metrics.extra_steps)}")
+        if metrics.completeness > 0 and metrics.order_match < 1.0:
+            weaknesses.append("Ações em comum fora da ordem esperada")
+        return weaknesses
+
+    @staticmethod
+    def _evaluation(
+        metrics: TrajectoryMetrics,
+        correctness: float,
+        justification: str,
+        strengths: List[str],
+        weaknesses: List[str],
+        recommendations: List[str],
+        output_profile: str = "full"
+    ) -> Dict[str, Any]:
+        """Mesmo esquema da avaliação de trajetória do modelo no perfil `output_profile`"""
+        evaluation: Dict[str, Any] = {
+            "score": (metrics.order_match + metrics.completeness + metrics.efficiency + correctness) / 4.0,
+            "order_match": metrics.order_match,
+            "completeness": metrics.completeness,
+            "efficiency": metrics.efficiency,
+            "correctness": correctness
+        }
+        if check_profile(output_profile) == "full":
+            evaluation.update({
+                "justification": justification,
+                "strengths": strengths,
+                "weaknesses": weaknesses,
+                "recommendations": recommendations
+            })
+        elif output_profile == "scores_reason":
+            evaluation["reason"] = justification
+        evaluation["source"] = "local"
+        evaluation["trajectory_metrics"] = metrics.to_dict()
+        return evaluation
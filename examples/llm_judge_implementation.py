@@ -2,18 +2,37 @@
 Implementação completa de LLM Judge para avaliação de agentes ADK.
 
 Este módulo fornece classes e funções para avaliar agentes usando LLMs como judges,
-com integração ao Google ADK e Langfuse.
+com integração ao Google ADK e Langfuse. Os SDKs são importados apenas no primeiro uso:
+parse, critérios e construção de prompts funcionam sem eles instalados.
 """
 
 import asyncio
 import json
 import logging
-import re
-from typing import Dict, Any, List, Optional
+import time
+from typing import (
+    TYPE_CHECKING, Dict, Any, List, Optional, Iterable, AsyncIterable, AsyncIterator, Tuple,
+    Callable, Awaitable
+)
 from dataclasses import dataclass
 
-from google.adk import Agent, Runner, Session
-from langfuse import Langfuse
+from examples.judge_cache import EvaluationCache, make_cache_key
+from examples.judge_hedging import HedgingPolicy
+from examples.judge_json_extractor import extract_json, extract_json_from_stream
+from examples.judge_langfuse_exporter import BufferedLangfuseExporter
+from examples.judge_lexical import LexicalPreFilter
+from examples.judge_metrics import JudgeInstrumentation
+from examples.judge_output_profiles import OutputValidator, check_profile
+from examples.judge_prompt_budget import CompactionReport, estimate_tokens
+from examples.judge_prompts_templates import JudgePromptTemplates, compact_json, compile_template
+from examples.judge_rate_limit import ModelRateLimiter, RetryPolicy, is_retryable, is_throttling
+from examples.judge_trajectory_metrics import TrajectoryPreScorer
+
+if TYPE_CHECKING:
+    from google.adk import Agent, Runner
+    from langfuse import Langfuse
+    
+    from examples.judge_near_duplicate import NearDuplicateIndex
 
 logger = logging.getLogger(__name__)
 
@@ -33,9 +52,21 @@ class LLMJudge:
     
     def __init__(
         self,
-        judge_agent: Agent,
-        runner: Runner,
-        evaluation_criteria: Optional[Dict[str, str]] = None
+        judge_agent: "Agent",
+        runner: "Runner",
+        evaluation_criteria: Optional[Dict[str, str]] = None,
+        cache: Optional[EvaluationCache] = None,
+        prompt_budgets: Optional[Dict[str, int]] = None,
+        rate_limiter: Optional[ModelRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        instrumentation: Optional[JudgeInstrumentation] = None,
+        session_factory: Optional[Callable[[], Any]] = None,
+        trajectory_prescorer: Optional[TrajectoryPreScorer] = None,
+        response_prefilter: Optional[LexicalPreFilter] = None,
+        near_duplicate_index: Optional["NearDuplicateIndex"] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        output_profile: str = "full",
+        output_validator: Optional[OutputValidator] = None
     ):
         """
         Inicializa o LLM Judge.
@@ -44,10 +75,41 @@ class LLMJudge:
             judge_agent: Agente ADK configurado como judge
             runner: Runner do ADK para executar o judge
             evaluation_criteria: Critérios de avaliação customizados
+            cache: Cache de avaliações (opcional, ver `judge_cache.py`)
+            prompt_budgets: Orçamento de tokens por tipo de prompt
+                (trajectory, response_quality, comparative), ver `judge_prompt_budget.py`
+            rate_limiter: Limitador de RPM/TPM por modelo, compartilhável entre judges
+            retry_policy: Política de retry para erros transitórios (429, timeouts, 5xx)
+            instrumentation: Métricas por fase (opcional, ver `judge_metrics.py`)
+            session_factory: Cria a sessão de cada chamada (padrão: `google.adk.Session`)
+            trajectory_prescorer: Métricas locais de trajetória; casos inequívocos
+                dispensam o modelo (ver `judge_trajectory_metrics.py`)
+            response_prefilter: Atalho léxico contra `expected_response`; respostas
+                praticamente iguais dispensam o modelo (ver `judge_lexical.py`)
+            near_duplicate_index: Reaproveita avaliações de pares (pergunta, resposta)
+                quase idênticos (ver `judge_near_duplicate.py`, requer numpy)
+            hedging: Dispara uma segunda tentativa quando a chamada passa do prazo por
+                percentil (ver `judge_hedging.py`)
+            output_profile: Saída pedida ao modelo: "full", "scores_reason" (scores e uma
+                frase) ou "scores_only" (ver `judge_output_profiles.py`)
+            output_validator: Valida cada avaliação contra o esquema do perfil e
+                `robustness.validation`; avaliações inválidas viram erro (não cacheadas)
         """
         self.judge_agent = judge_agent
         self.runner = runner
         self.criteria = evaluation_criteria or self._default_criteria()
+        self.cache = cache
+        self.prompt_budgets = prompt_budgets or {}
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.instrumentation = instrumentation
+        self.session_factory = session_factory or _new_session
+        self.trajectory_prescorer = trajectory_prescorer
+        self.response_prefilter = response_prefilter
+        self.near_duplicate_index = near_duplicate_index
+        self.hedging = hedging
+        self.output_profile = check_profile(output_profile)
+        self.output_validator = output_validator
     
     def _default_criteria(self) -> Dict[str, str]:
         """Retorna critérios padrão de avaliação"""
@@ -69,6 +131,10 @@ class LLMJudge:
         """
         Avalia a trajetória de ações do agente.
         
+        Com `trajectory_prescorer`, order_match/completeness/efficiency são calculadas
+        localmente: casos inequívocos retornam sem chamar o modelo (`source: "local"`) e
+        os demais pedem ao modelo só a `correctness` (`source: "hybrid"`).
+        
         Args:
             expected_trajectory: Trajetória esperada
             actual_trajectory: Trajetória real executada
@@ -77,26 +143,51 @@ class LLMJudge:
         Returns:
             Dicionário com avaliação da trajetória
         """
-        prompt = self._build_trajectory_prompt(
-            expected_trajectory,
-            actual_trajectory,
-            context
-        )
+        started = self._clock()
+        prescorer = self.trajectory_prescorer
+        metrics = None
+        if prescorer is not None and prescorer.enabled:
+            metrics = prescorer.score(expected_trajectory, actual_trajectory)
+            local = prescorer.local_evaluation(metrics, self.output_profile)
+            if local is not None:
+                self._count("trajectory_local")
+                self._observe("evaluate_trajectory", started)
+                return local
         
-        try:
-            session = Session()
-            response = await self.runner.run(
-                agent=self.judge_agent,
-                session=session,
-                user_content=prompt
+        report = self._compaction_report("trajectory")
+        if metrics is not None:
+            prompt = JudgePromptTemplates.trajectory_correctness(
+                expected_trajectory,
+                actual_trajectory,
+                metrics.to_dict(),
+                context,
+                token_budget=self.prompt_budgets.get("trajectory"),
+                report=report,
+                output_profile=self.output_profile
             )
-            
-            evaluation = self._parse_response(response.content)
-            return evaluation
+            kind = "trajectory_correctness"
+        else:
+            prompt = self._build_trajectory_prompt(
+                expected_trajectory,
+                actual_trajectory,
+                context,
+                report
+            )
+            kind = "trajectory"
+        self._observe("prompt_build", started)
+        
+        try:
+            evaluation = await self._run_judge(prompt, schema=self._output_schema(kind))
+            if metrics is not None:
+                evaluation = prescorer.combine(metrics, evaluation, self.output_profile)
+            return self._attach_compaction(evaluation, report)
             
         except Exception as e:
             logger.error(f"Erro ao avaliar trajetória: {e}", exc_info=True)
             return self._error_evaluation(str(e))
+        
+        finally:
+            self._observe("evaluate_trajectory", started)
     
     async def evaluate_response(
         self,
@@ -108,6 +199,11 @@ class LLMJudge:
         """
         Avalia a qualidade da resposta do agente.
         
+        Com `response_prefilter` e `expected_response`, respostas iguais ou quase iguais
+        à esperada retornam sem chamar o modelo (`source: "lexical"`). Com
+        `near_duplicate_index`, pares quase idênticos a um já avaliado reaproveitam a
+        avaliação anterior (`source: "near_duplicate"`, com `provenance`).
+        
         Args:
             user_query: Pergunta do usuário
             agent_response: Resposta do agente
@@ -117,27 +213,51 @@ class LLMJudge:
         Returns:
             Dicionário com avaliação da resposta
         """
+        started = self._clock()
+        if self.response_prefilter is not None and expected_response:
+            lexical = self.response_prefilter.evaluate(agent_response, expected_response)
+            if lexical is not None:
+                self._count("response_lexical")
+                self._observe("evaluate_response", started)
+                return lexical
+        
+        index = self.near_duplicate_index
+        if index is not None and index.enabled:
+            signature = index.signature(user_query, agent_response)
+            scope = index.scope_key(
+                self.model_name, self.criteria, self.output_profile, expected_response, context
+            )
+            reused = index.lookup(signature, scope)
+            if reused is not None:
+                self._count("near_duplicate_hit")
+                self._observe("evaluate_response", started)
+                return reused
+        
+        report = self._compaction_report("response_quality")
         prompt = self._build_response_prompt(
             user_query,
             agent_response,
             expected_response,
-            context
+            context,
+            report
         )
+        self._observe("prompt_build", started)
         
         try:
-            session = Session()
-            response = await self.runner.run(
-                agent=self.judge_agent,
-                session=session,
-                user_content=prompt
+            evaluation = self._attach_compaction(
+                await self._run_judge(prompt, schema=self._output_schema("response_quality")),
+                report
             )
-            
-            evaluation = self._parse_response(response.content)
+            if index is not None and index.enabled:
+                index.add(signature, scope, evaluation)
             return evaluation
             
         except Exception as e:
             logger.error(f"Erro ao avaliar resposta: {e}", exc_info=True)
             return self._error_evaluation(str(e))
+        
+        finally:
+            self._observe("evaluate_response", started)
     
     async def compare_responses(
         self,
@@ -156,138 +276,562 @@ class LLMJudge:
         Returns:
             Dicionário com comparação e ranking
         """
-        responses_text = "\n\n".join([
-            f"Resposta {i+1} ({resp.get('label', f'Modelo {i+1}')}):\n{resp.get('response', '')}"
-            for i, resp in enumerate(responses)
-        ])
+        started = self._clock()
+        report = self._compaction_report("comparative")
+        prompt = JudgePromptTemplates.comparative_evaluation(
+            user_query,
+            responses,
+            context,
+            token_budget=self.prompt_budgets.get("comparative"),
+            report=report,
+            output_profile=self.output_profile
+        )
+        self._observe("prompt_build", started)
         
-        prompt = f"""
-Compare e ranqueie as seguintes respostas:
-
-Pergunta: {user_query}
-
-{responses_text}
-
-Contexto: {json.dumps(context or {}, ensure_ascii=False, indent=2)}
-
-Forneça uma comparação em JSON com:
-- rankings: lista ordenada de índices (melhor primeiro, 0-indexed)
-- scores: pontuações de 0-1 para cada resposta (lista na ordem das respostas)
-- comparison: comparação detalhada entre as respostas
-- winner: índice da melhor resposta (0-indexed)
-- reasoning: raciocínio por trás da decisão
-"""
+        try:
+            comparison = await self._run_judge(prompt, schema=self._output_schema("comparative"))
+            return self._attach_compaction(comparison, report)
+            
+        except Exception as e:
+            logger.error(f"Erro ao comparar respostas: {e}", exc_info=True)
+            return self._error_evaluation(str(e))
+        
+        finally:
+            self._observe("compare_responses", started)
+    
+    async def evaluate_many(
+        self,
+        cases: Iterable[Dict[str, Any]],
+        max_concurrency: int = 10,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Avalia várias respostas com concorrência limitada.
+        
+        Args:
+            cases: Casos com os argumentos de `evaluate_response`
+                (user_query, agent_response, expected_response, context...)
+            max_concurrency: Máximo de avaliações simultâneas
+            semaphore: Semáforo compartilhado entre chamadas (opcional)
+            
+        Returns:
+            Avaliações na mesma ordem dos casos de entrada
+        """
+        return await self._collect_in_order(
+            self.evaluate_many_as_completed(cases, "response", max_concurrency, semaphore)
+        )
+    
+    async def evaluate_trajectories_many(
+        self,
+        cases: Iterable[Dict[str, Any]],
+        max_concurrency: int = 10,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> List[Dict[str, Any]]:
+        """Avalia várias trajetórias com concorrência limitada (ordem preservada)"""
+        return await self._collect_in_order(
+            self.evaluate_many_as_completed(cases, "trajectory", max_concurrency, semaphore)
+        )
+    
+    async def compare_many(
+        self,
+        cases: Iterable[Dict[str, Any]],
+        max_concurrency: int = 10,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> List[Dict[str, Any]]:
+        """Executa várias comparações com concorrência limitada (ordem preservada)"""
+        return await self._collect_in_order(
+            self.evaluate_many_as_completed(cases, "comparison", max_concurrency, semaphore)
+        )
+    
+    async def evaluate_responses_packed(
+        self,
+        items: List[Dict[str, Any]],
+        batch_size: int = 10,
+        max_concurrency: int = 4
+    ) -> List[Dict[str, Any]]:
+        """
+        Avalia várias respostas empacotando até `batch_size` itens por chamada ao modelo.
+        
+        As instruções, critérios e escala são enviados uma única vez por lote. Cada item
+        recebe um ID estável e o judge devolve um array JSON mapeado de volta por ID.
+        Itens ausentes ou malformados na resposta são reavaliados individualmente.
         
+        Args:
+            items: Itens com user_query, agent_response e opcionalmente
+                expected_response, context e id
+            batch_size: Máximo de itens por prompt (`cost_optimization.batching.batch_size`)
+            max_concurrency: Máximo de lotes simultâneos
+            
+        Returns:
+            Avaliações na mesma ordem dos itens de entrada
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size deve ser >= 1")
+        
+        ids = [str(item.get("id", index)) for index, item in enumerate(items)]
+        if len(set(ids)) != len(ids):
+            raise ValueError("IDs dos itens devem ser únicos")
+        
+        batches = [
+            {"items": list(zip(ids[start:start + batch_size], items[start:start + batch_size]))}
+            for start in range(0, len(items), batch_size)
+        ]
+        
+        evaluations: List[Dict[str, Any]] = []
+        batch_results = await self._collect_in_order(
+            self._bounded_as_completed(
+                self._evaluate_packed_batch,
+                batches,
+                max_concurrency,
+                None
+            )
+        )
+        for batch_result in batch_results:
+            evaluations.extend(batch_result["evaluations"])
+        return evaluations
+    
+    async def _evaluate_packed_batch(
+        self,
+        items: List[Tuple[str, Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Avalia um lote empacotado, reavaliando individualmente os itens faltantes"""
+        by_id: Dict[str, Dict[str, Any]] = {}
+        prompt = self._build_packed_response_prompt(items)
+        
+        try:
+            packed = await self._run_judge(prompt, parse=self._parse_packed_response)
+            if not packed.get("error"):
+                for result in packed["evaluations"]:
+                    by_id[str(result["id"])] = result
+        except Exception as e:
+            logger.error(f"Erro ao avaliar lote empacotado: {e}", exc_info=True)
+        
+        evaluations = []
+        for item_id, item in items:
+            result = by_id.get(item_id)
+            if result is not None and self._is_valid_item(result):
+                evaluation = dict(result)
+                evaluation.pop("id", None)
+            else:
+                logger.warning(f"Item {item_id} ausente ou malformado no lote, reavaliando")
+                evaluation = await self.evaluate_response(
+                    user_query=item.get("user_query", ""),
+                    agent_response=item.get("agent_response", ""),
+                    expected_response=item.get("expected_response"),
+                    context=item.get("context")
+                )
+            evaluations.append(evaluation)
+        
+        return {"evaluations": evaluations}
+    
+    async def evaluate_many_as_completed(
+        self,
+        cases: Iterable[Dict[str, Any]],
+        kind: str = "response",
+        max_concurrency: int = 10,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Avalia casos com concorrência limitada, entregando resultados à medida que terminam.
+        
+        Os casos são consumidos sob demanda, então iteráveis grandes (ou geradores)
+        não são materializados em memória. Erros de um caso não afetam os demais:
+        viram uma avaliação de erro no índice correspondente.
+        
+        Args:
+            cases: Casos com os argumentos do método de avaliação
+            kind: "response", "trajectory" ou "comparison"
+            max_concurrency: Máximo de avaliações simultâneas
+            semaphore: Semáforo compartilhado entre chamadas (opcional)
+            
+        Yields:
+            Tuplas (índice do caso, avaliação)
+        """
+        methods = {
+            "response": self.evaluate_response,
+            "trajectory": self.evaluate_trajectory,
+            "comparison": self.compare_responses
+        }
+        if kind not in methods:
+            raise ValueError(f"Tipo de avaliação desconhecido: {kind}")
+        
+        async for item in self._bounded_as_completed(
+            methods[kind],
+            cases,
+            max_concurrency,
+            semaphore
+        ):
+            yield item
+    
+    async def _bounded_as_completed(
+        self,
+        method: Callable[..., Awaitable[Dict[str, Any]]],
+        cases: Iterable[Dict[str, Any]],
+        max_concurrency: int,
+        semaphore: Optional[asyncio.Semaphore]
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Executa `method(**case)` em janela limitada e entrega (índice, resultado)"""
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency deve ser >= 1")
+        semaphore = semaphore or asyncio.Semaphore(max_concurrency)
+        
+        async def run_one(index: int, case: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return index, await method(**case)
+                except Exception as e:
+                    logger.error(f"Erro ao avaliar caso {index}: {e}", exc_info=True)
+                    return index, self._error_evaluation(str(e))
+        
+        pending = set()
         try:
-            session = Session()
+            for index, case in enumerate(cases):
+                pending.add(asyncio.ensure_future(run_one(index, case)))
+                if len(pending) >= max_concurrency:
+                    done, pending = await asyncio.wait(
+                        pending,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        yield task.result()
+            
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            # Consumidor interrompeu a iteração: cancela o que ainda está em voo
+            for task in pending:
+                task.cancel()
+    
+    @staticmethod
+    async def _collect_in_order(
+        results: AsyncIterator[Tuple[int, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Reordena resultados entregues fora de ordem pelo índice original"""
+        indexed = {}
+        async for index, evaluation in results:
+            indexed[index] = evaluation
+        return [indexed[i] for i in range(len(indexed))]
+    
+    def prompt_prefix_hash(self, kind: str = "response_quality") -> str:
+        """
+        Hash do prefixo estável do prompt de um tipo de avaliação.
+        
+        Útil para registrar/reutilizar cache de contexto no provedor.
+        """
+        criteria = self.criteria if kind in ("response_quality", "packed_response_quality") else None
+        return compile_template(kind, criteria, self.output_profile).prefix_hash
+    
+    @property
+    def model_name(self) -> str:
+        """Nome do modelo usado pelo judge"""
+        return str(getattr(self.judge_agent, "model", "") or "")
+    
+    async def _run_judge(
+        self,
+        prompt: str,
+        parse: Optional[Callable[[str], Dict[str, Any]]] = None,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa o judge para um prompt já construído, consultando o cache.
+        
+        Com `output_validator` e `schema`, avaliações fora do esquema viram erro. A
+        avaliação registra em `judge_model` o modelo que respondeu (o do hedge, se ele
+        venceu a corrida).
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(prompt, self.model_name, self.criteria)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._count("cache_hit")
+                return cached
+            self._count("cache_miss")
+        
+        text, judge_model = await self._call_model(prompt, accept=None if parse is None else _has_json_array)
+        
+        started = self._clock()
+        evaluation = (parse or self._parse_response)(text)
+        if schema is not None and self.output_validator is not None and not evaluation.get("error"):
+            problems = self.output_validator.validate(evaluation, schema)
+            if problems:
+                self._count("validation_failed")
+                evaluation = {
+                    **evaluation,
+                    "error": "Avaliação fora do esquema",
+                    "validation_errors": problems,
+                    "raw_response": text,
+                    "score": evaluation["score"] if self._is_valid_score(evaluation.get("score")) else 0.5
+                }
+        self._observe("parse", started)
+        evaluation["judge_model"] = judge_model
+        
+        # Respostas não parseáveis não são cacheadas para permitir nova tentativa; as do
+        # tier alternativo também não, porque a chave é a do modelo principal
+        if cache_key is not None and not evaluation.get("error"):
+            if judge_model == self.model_name:
+                self.cache.set(cache_key, evaluation)
+            else:
+                self._count("hedge_result_not_cached")
+        
+        return evaluation
+    
+    async def _call_model(
+        self,
+        prompt: str,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> Tuple[str, str]:
+        """
+        Chama o modelo do judge respeitando o limitador de taxa e a política de retry.
+        
+        Args:
+            prompt: Prompt completo
+            accept: Com hedging, só respostas aceitas vencem a corrida (padrão: contém
+                um objeto JSON)
+        
+        Returns:
+            Texto da resposta e nome do modelo que a produziu
+        """
+        inst = self.instrumentation
+        if inst is not None:
+            inst.observe_size("prompt", len(prompt))
+        
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                started = self._clock()
+                await self.rate_limiter.acquire(self.model_name, estimate_tokens(prompt))
+                self._observe("rate_limit_wait", started)
+            
+            started = self._clock()
+            try:
+                response, model = await self._run_attempt(prompt, accept or _has_json_object)
+                if inst is not None:
+                    self._observe("model_call", started)
+                    inst.observe_size("completion", len(response.content or ""))
+                    inst.observe_retries(attempt)
+                return response.content, model
+            
+            except Exception as e:
+                self._observe("model_call", started)
+                policy = self.retry_policy
+                if policy is None or attempt >= policy.max_retries or not is_retryable(e):
+                    if inst is not None:
+                        inst.observe_retries(attempt)
+                        inst.increment("model_call_error")
+                    raise
+                
+                attempt += 1
+                delay = policy.delay(attempt, e)
+                if self.rate_limiter is not None and is_throttling(e):
+                    # Pausa as demais chamadas ao modelo em vez de insistir no limite
+                    self.rate_limiter.penalize(self.model_name, delay)
+                
+                logger.warning(
+                    f"Erro transitório no judge ({e}), tentativa {attempt}/{policy.max_retries} "
+                    f"em {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+    
+    async def _run_attempt(self, prompt: str, accept: Callable[[str], bool]) -> Tuple[Any, str]:
+        """Uma tentativa de chamada; com hedging, a corrida entre original e hedge"""
+        async def primary() -> Tuple[Any, str]:
             response = await self.runner.run(
                 agent=self.judge_agent,
-                session=session,
+                session=self.session_factory(),
                 user_content=prompt
             )
-            
-            comparison = self._parse_response(response.content)
-            return comparison
-            
-        except Exception as e:
-            logger.error(f"Erro ao comparar respostas: {e}", exc_info=True)
-            return self._error_evaluation(str(e))
+            return response, self.model_name
+        
+        hedging = self.hedging
+        if hedging is None or not hedging.enabled:
+            return await primary()
+        
+        async def hedge() -> Tuple[Any, str]:
+            agent = hedging.agent or self.judge_agent
+            model = str(getattr(agent, "model", "") or "")
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(model, estimate_tokens(prompt))
+            self._count("hedge_fired")
+            response = await self.runner.run(
+                agent=agent,
+                session=self.session_factory(),
+                user_content=prompt
+            )
+            return response, model
+        
+        return await hedging.run(primary, hedge, lambda result: accept(result[0].content or ""))
     
     def _build_trajectory_prompt(
         self,
         expected_trajectory: List[str],
         actual_trajectory: List[str],
-        context: Optional[Dict[str, Any]]
+        context: Optional[Dict[str, Any]],
+        report: Optional[CompactionReport] = None
     ) -> str:
         """Constrói prompt para avaliação de trajetória"""
-        return f"""
-Você é um juiz especializado em avaliar trajetórias de agentes de IA.
-
-Trajetória Esperada: {json.dumps(expected_trajectory, ensure_ascii=False)}
-Trajetória Real: {json.dumps(actual_trajectory, ensure_ascii=False)}
-Contexto: {json.dumps(context or {}, ensure_ascii=False, indent=2)}
-
-Avalie a trajetória considerando:
-1. Ordem das ações: As ações foram executadas na ordem correta? (0-1)
-2. Completude: Todas as ações necessárias foram executadas? (0-1)
-3. Eficiência: A trajetória foi eficiente (sem ações desnecessárias)? (0-1)
-4. Correção: As ações são apropriadas para o contexto? (0-1)
-
-Forneça uma avaliação em JSON com:
-- score: pontuação geral de 0-1
-- order_match: as ações estão na ordem correta? (0-1)
-- completeness: todas as ações necessárias foram executadas? (0-1)
-- efficiency: a trajetória foi eficiente? (0-1)
-- correctness: as ações são apropriadas? (0-1)
-- justification: justificativa detalhada
-- strengths: lista de pontos fortes
-- weaknesses: lista de pontos fracos
-- recommendations: recomendações de melhoria
-"""
+        return JudgePromptTemplates.trajectory_evaluation(
+            expected_trajectory,
+            actual_trajectory,
+            context,
+            token_budget=self.prompt_budgets.get("trajectory"),
+            report=report,
+            output_profile=self.output_profile
+        )
     
     def _build_response_prompt(
         self,
         user_query: str,
         agent_response: str,
         expected_response: Optional[str],
-        context: Optional[Dict[str, Any]]
+        context: Optional[Dict[str, Any]],
+        report: Optional[CompactionReport] = None
     ) -> str:
         """Constrói prompt para avaliação de resposta"""
-        expected_section = ""
-        if expected_response:
-            expected_section = f"\nResposta Esperada (referência): {expected_response}"
+        return JudgePromptTemplates.response_quality(
+            user_query,
+            agent_response,
+            expected_response,
+            context,
+            self.criteria,
+            token_budget=self.prompt_budgets.get("response_quality"),
+            report=report,
+            output_profile=self.output_profile
+        )
+    
+    def _output_schema(self, kind: str) -> Dict[str, Any]:
+        """JSON Schema da saída pedida no prompt de `kind` (perfil atual)"""
+        criteria = self.criteria if kind in ("response_quality", "packed_response_quality") else None
+        return compile_template(kind, criteria, self.output_profile).output_schema
+    
+    def _compaction_report(self, kind: str) -> Optional[CompactionReport]:
+        """Cria um registro de compactação se houver orçamento para o tipo de prompt"""
+        return CompactionReport() if self.prompt_budgets.get(kind) else None
+    
+    @staticmethod
+    def _attach_compaction(
+        evaluation: Dict[str, Any],
+        report: Optional[CompactionReport]
+    ) -> Dict[str, Any]:
+        """Registra na avaliação o que foi compactado no prompt"""
+        if report is not None and report.trimmed:
+            evaluation["compaction"] = report.to_dict()
+        return evaluation
+    
+    def _build_packed_response_prompt(
+        self,
+        items: List[Tuple[str, Dict[str, Any]]]
+    ) -> str:
+        """Constrói prompt para avaliação de várias respostas em uma única chamada"""
+        item_blocks = []
+        for item_id, item in items:
+            block = (
+                f"[ID: {item_id}]\n"
+                f"Pergunta do Usuário: {item.get('user_query', '')}\n"
+                f"Resposta do Agente: {item.get('agent_response', '')}"
+            )
+            if item.get("expected_response"):
+                block += f"\nResposta Esperada (referência): {item['expected_response']}"
+            if item.get("context"):
+                block += f"\nContexto: {compact_json(item['context'])}"
+            item_blocks.append(block)
         
-        criteria_text = "\n".join([
-            f"- {key}: {value}"
-            for key, value in self.criteria.items()
-        ])
+        return compile_template("packed_response_quality", self.criteria, self.output_profile).render(
+            items_text="\n\n".join(item_blocks)
+        )
+    
+    def _parse_packed_response(self, text: str) -> Dict[str, Any]:
+        """Extrai o array JSON de uma avaliação empacotada"""
+        parsed: Any = None
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            parsed = extract_json(
+                text,
+                openers="[{",
+                accept=lambda value: isinstance(value, list) or (
+                    isinstance(value, dict) and isinstance(value.get("evaluations"), list)
+                )
+            )
         
-        return f"""
-Você é um juiz especializado em avaliar respostas de agentes de IA.
-
-Pergunta do Usuário: {user_query}
-Resposta do Agente: {agent_response}{expected_section}
-Contexto: {json.dumps(context or {}, ensure_ascii=False, indent=2)}
-
-Critérios de Avaliação:
-{criteria_text}
-
-Escala de Pontuação:
-- 0.0-0.3: Insatisfatório
-- 0.4-0.6: Aceitável
-- 0.7-0.8: Bom
-- 0.9-1.0: Excelente
-
-Forneça uma avaliação em JSON com:
-- score: pontuação geral de 0-1
-- correctness: correção factual (0-1)
-- relevance: relevância à pergunta (0-1)
-- completeness: completude (0-1)
-- clarity: clareza e estrutura (0-1)
-- safety: segurança e apropriação (0-1)
-- justification: justificativa detalhada
-- strengths: lista de pontos fortes
-- weaknesses: lista de pontos fracos
-- recommendations: recomendações de melhoria
-"""
+        if isinstance(parsed, dict):
+            parsed = parsed.get("evaluations")
+        
+        if not isinstance(parsed, list):
+            logger.warning(f"Não foi possível extrair array JSON da resposta: {text[:200]}")
+            return {
+                "error": "Não foi possível extrair array JSON da resposta",
+                "raw_response": text,
+                "evaluations": []
+            }
+        
+        return {
+            "evaluations": [
+                result for result in parsed
+                if isinstance(result, dict) and "id" in result
+            ]
+        }
+    
+    def _is_valid_item(self, result: Dict[str, Any]) -> bool:
+        """Item de um lote empacotado utilizável (senão é reavaliado individualmente)"""
+        if self.output_validator is None:
+            return self._is_valid_score(result.get("score"))
+        return not self.output_validator.validate(result, self._output_schema("packed_response_quality"))
+    
+    @staticmethod
+    def _is_valid_score(value: Any) -> bool:
+        """Verifica se o valor é um score numérico entre 0 e 1"""
+        return (
+            isinstance(value, (int, float))
+            and not isinstance(value, bool)
+            and 0.0 <= value <= 1.0
+        )
+    
+    async def parse_stream(self, chunks: AsyncIterable[str]) -> Dict[str, Any]:
+        """
+        Extrai a avaliação de um stream de texto do judge.
+        
+        Retorna assim que o primeiro objeto JSON fecha e encerra o stream,
+        permitindo cancelar o restante da geração.
+        
+        Args:
+            chunks: Iterável assíncrono com pedaços da resposta do judge
+            
+        Returns:
+            Dicionário com a avaliação
+        """
+        evaluation, text = await extract_json_from_stream(chunks)
+        if isinstance(evaluation, dict):
+            return evaluation
+        return self._unparseable_response(text)
     
     def _parse_response(self, text: str) -> Dict[str, Any]:
         """Extrai JSON de uma resposta que pode conter texto adicional"""
         # Tenta parse direto
         try:
-            return json.loads(text)
+            evaluation = json.loads(text)
+            if isinstance(evaluation, dict):
+                self._count("parse_direct")
+                return evaluation
         except json.JSONDecodeError:
             pass
         
-        # Tenta extrair JSON do texto
-        json_match = re.search(r'\{.*\}', text, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except json.JSONDecodeError:
-                pass
+        # Extração incremental: primeiro objeto de nível superior válido
+        evaluation = extract_json(text)
+        if isinstance(evaluation, dict):
+            self._count("parse_extracted")
+            return evaluation
         
-        # Fallback: retorna estrutura básica
+        self._count("parse_fallback")
+        return self._unparseable_response(text)
+    
+    def _unparseable_response(self, text: str) -> Dict[str, Any]:
+        """Fallback para respostas sem JSON extraível"""
         logger.warning(f"Não foi possível extrair JSON da resposta: {text[:200]}")
         return {
             "error": "Não foi possível extrair JSON da resposta",
@@ -295,6 +839,18 @@ Forneça uma avaliação em JSON com:
             "score": 0.5
         }
     
+    def _clock(self) -> float:
+        """Marca de tempo para instrumentação (0 quando desabilitada)"""
+        return time.perf_counter() if self.instrumentation is not None else 0.0
+    
+    def _observe(self, phase: str, started: float) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.observe_phase(phase, time.perf_counter() - started)
+    
+    def _count(self, event: str) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.increment(event)
+    
     def _error_evaluation(self, error_message: str) -> Dict[str, Any]:
         """Retorna avaliação de erro"""
         return {
@@ -310,13 +866,27 @@ class LangfuseLLMJudge(LLMJudge):
     
     def __init__(
         self,
-        judge_agent: Agent,
-        runner: Runner,
-        langfuse_client: Langfuse,
-        evaluation_criteria: Optional[Dict[str, str]] = None
+        judge_agent: "Agent",
+        runner: "Runner",
+        langfuse_client: "Langfuse",
+        evaluation_criteria: Optional[Dict[str, str]] = None,
+        exporter: Optional[BufferedLangfuseExporter] = None,
+        **judge_options: Any
     ):
-        super().__init__(judge_agent, runner, evaluation_criteria)
+        """
+        Inicializa o judge com Langfuse.
+        
+        Args:
+            judge_agent: Agente ADK configurado como judge
+            runner: Runner do ADK para executar o judge
+            langfuse_client: Cliente Langfuse
+            evaluation_criteria: Critérios de avaliação customizados
+            exporter: Exportador em segundo plano (opcional); sem ele o tracing é feito inline
+            **judge_options: Demais opções de `LLMJudge` (cache, rate_limiter, ...)
+        """
+        super().__init__(judge_agent, runner, evaluation_criteria, **judge_options)
         self.langfuse = langfuse_client
+        self.exporter = exporter
     
     async def evaluate_trajectory(
         self,
@@ -327,15 +897,15 @@ class LangfuseLLMJudge(LLMJudge):
     ) -> Dict[str, Any]:
         """Avalia trajetória com tracing Langfuse"""
         
-        trace = self.langfuse.trace(
-            name="trajectory_evaluation",
-            id=trace_id,
-            metadata={
+        trace_kwargs = {
+            "name": "trajectory_evaluation",
+            "id": trace_id,
+            "metadata": {
                 "expected_trajectory": expected_trajectory,
                 "actual_trajectory": actual_trajectory,
                 "context": context
             }
-        )
+        }
         
         try:
             evaluation = await super().evaluate_trajectory(
@@ -343,31 +913,12 @@ class LangfuseLLMJudge(LLMJudge):
                 actual_trajectory,
                 context
             )
-            
-            if not evaluation.get("error"):
-                # Registra score no Langfuse
-                trace.score(
-                    name="trajectory_score",
-                    value=evaluation.get("score", 0),
-                    comment=evaluation.get("justification", "")
-                )
-                
-                # Registra scores individuais
-                for metric in ["order_match", "completeness", "efficiency", "correctness"]:
-                    if metric in evaluation and isinstance(evaluation[metric], (int, float)):
-                        trace.score(
-                            name=f"trajectory_{metric}",
-                            value=evaluation[metric]
-                        )
-            
-            return evaluation
-            
         except Exception as e:
-            trace.update(
-                level="ERROR",
-                status_message=str(e)
-            )
+            self._export(self._report_error, trace_kwargs, str(e))
             raise
+        
+        self._export(self._report_trajectory, trace_kwargs, dict(evaluation))
+        return evaluation
     
     async def evaluate_response(
         self,
@@ -379,16 +930,16 @@ class LangfuseLLMJudge(LLMJudge):
     ) -> Dict[str, Any]:
         """Avalia resposta com tracing Langfuse"""
         
-        trace = self.langfuse.trace(
-            name="response_evaluation",
-            id=trace_id,
-            input={
+        trace_kwargs = {
+            "name": "response_evaluation",
+            "id": trace_id,
+            "input": {
                 "user_query": user_query,
                 "agent_response": agent_response,
                 "expected_response": expected_response
             },
-            metadata=context or {}
-        )
+            "metadata": context or {}
+        }
         
         try:
             evaluation = await super().evaluate_response(
@@ -397,49 +948,108 @@ class LangfuseLLMJudge(LLMJudge):
                 expected_response,
                 context
             )
+        except Exception as e:
+            self._export(self._report_error, trace_kwargs, str(e))
+            raise
+        
+        self._export(self._report_response, trace_kwargs, dict(evaluation))
+        return evaluation
+    
+    def _export(self, report: Callable[..., None], *args: Any) -> None:
+        """Envia ao Langfuse em segundo plano (com exportador) ou inline"""
+        started = self._clock()
+        if self.exporter is not None:
+            self.exporter.enqueue(report, *args)
+        else:
+            report(*args)
+        self._observe("langfuse_report", started)
+    
+    def _report_trajectory(
+        self,
+        trace_kwargs: Dict[str, Any],
+        evaluation: Dict[str, Any]
+    ) -> None:
+        trace = self.langfuse.trace(**trace_kwargs)
+        
+        if not evaluation.get("error"):
+            # Registra score no Langfuse
+            trace.score(
+                name="trajectory_score",
+                value=evaluation.get("score", 0),
+                comment=evaluation.get("justification", evaluation.get("reason", ""))
+            )
             
-            if not evaluation.get("error"):
-                # Registra score geral
-                trace.score(
-                    name="response_score",
-                    value=evaluation.get("score", 0),
-                    comment=evaluation.get("justification", "")
-                )
-                
-                # Registra scores individuais
-                for metric in ["correctness", "relevance", "completeness", "clarity", "safety"]:
-                    if metric in evaluation and isinstance(evaluation[metric], (int, float)):
-                        trace.score(
-                            name=f"response_{metric}",
-                            value=evaluation[metric]
-                        )
-                
-                # Registra pontos fortes e fracos como observações
-                if evaluation.get("strengths"):
-                    trace.observation(
-                        name="strengths",
-                        value=evaluation["strengths"]
+            # Registra scores individuais
+            for metric in ["order_match", "completeness", "efficiency", "correctness"]:
+                if metric in evaluation and isinstance(evaluation[metric], (int, float)):
+                    trace.score(
+                        name=f"trajectory_{metric}",
+                        value=evaluation[metric]
                     )
-                
-                if evaluation.get("weaknesses"):
-                    trace.observation(
-                        name="weaknesses",
-                        value=evaluation["weaknesses"]
+    
+    def _report_response(
+        self,
+        trace_kwargs: Dict[str, Any],
+        evaluation: Dict[str, Any]
+    ) -> None:
+        trace = self.langfuse.trace(**trace_kwargs)
+        
+        if not evaluation.get("error"):
+            # Registra score geral
+            trace.score(
+                name="response_score",
+                value=evaluation.get("score", 0),
+                comment=evaluation.get("justification", evaluation.get("reason", ""))
+            )
+            
+            # Registra scores individuais
+            for metric in ["correctness", "relevance", "completeness", "clarity", "safety"]:
+                if metric in evaluation and isinstance(evaluation[metric], (int, float)):
+                    trace.score(
+                        name=f"response_{metric}",
+                        value=evaluation[metric]
                     )
             
-            return evaluation
+            # Registra pontos fortes e fracos como observações
+            if evaluation.get("strengths"):
+                trace.observation(
+                    name="strengths",
+                    value=evaluation["strengths"]
+                )
             
-        except Exception as e:
-            trace.update(
-                level="ERROR",
-                status_message=str(e)
-            )
-            raise
+            if evaluation.get("weaknesses"):
+                trace.observation(
+                    name="weaknesses",
+                    value=evaluation["weaknesses"]
+                )
+    
+    def _report_error(self, trace_kwargs: Dict[str, Any], error_message: str) -> None:
+        trace = self.langfuse.trace(**trace_kwargs)
+        trace.update(
+            level="ERROR",
+            status_message=error_message
+        )
+
+
+def _has_json_object(text: str) -> bool:
+    return extract_json(text) is not None
+
+
+def _has_json_array(text: str) -> bool:
+    return extract_json(text, openers="[{") is not None
+
+
+def _new_session() -> Any:
+    """Cria uma sessão ADK (o SDK é importado na primeira chamada ao modelo)"""
+    from google.adk import Session
+    return Session()
 
 
 # Exemplo de uso
 async def example_usage():
     """Exemplo de como usar o LLM Judge"""
+    from google.adk import Agent, Runner
+    from langfuse import Langfuse
     
     # Configuração do judge agent
     judge_agent = Agent(
@@ -502,6 +1112,7 @@ async def example_usage():
     print(f"Scores: {comparison.get('scores')}")
 
 
+# Execute a partir da raiz do repositório: python -m examples.llm_judge_implementation
 if __name__ == "__main__":
     asyncio.run(example_usage())
 
@@ -0,0 +1,62 @@
+"""Cache de avaliações em memória e SQLite"""
+
+import pytest
+
+from examples.judge_cache import CacheTier, EvaluationCache, SQLiteCacheTier, make_cache_key
+
+
+def test_cache_tier_is_abstract():
+    with pytest.raises(TypeError):
+        CacheTier()
+
+
+def test_key_depends_on_prompt_model_and_criteria():
+    key = make_cache_key("prompt", "model-a", {"correctness": "x"})
+    assert key == make_cache_key("prompt", "model-a", {"correctness": "x"})
+    assert key != make_cache_key("prompt", "model-b", {"correctness": "x"})
+    assert key != make_cache_key("prompt", "model-a", {"clarity": "x"})
+    assert key != make_cache_key("outro", "model-a", {"correctness": "x"})
+
+
+def test_get_returns_a_copy():
+    cache = EvaluationCache()
+    cache.set("k", {"score": 1.0, "strengths": []})
+    cache.get("k")["strengths"].append("alterado")
+    assert cache.get("k") == {"score": 1.0, "strengths": []}
+
+
+def test_memory_lru_eviction():
+    cache = EvaluationCache(max_entries=2)
+    cache.set("a", {"score": 0.1})
+    cache.set("b", {"score": 0.2})
+    cache.get("a")
+    cache.set("c", {"score": 0.3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"score": 0.1}
+
+
+def test_disk_tier_survives_restart_and_promotes_to_memory(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = EvaluationCache(persistent_path=path)
+    cache.set("k", {"score": 0.5})
+    cache.close()
+
+    reopened = EvaluationCache(persistent_path=path)
+    assert reopened.get("k") == {"score": 0.5}
+    assert reopened.stats.disk_hits == 1
+    assert reopened.get("k") == {"score": 0.5}
+    assert reopened.stats.memory_hits == 1
+    reopened.close()
+
+
+def test_disk_access_times_are_batched_and_used_for_eviction(tmp_path):
+    tier = SQLiteCacheTier(str(tmp_path / "cache.db"), max_entries=2, access_flush_size=100)
+    tier.set("velha", "1")
+    tier.set("nova", "2")
+    assert tier.get("velha") == "1"  # Acesso pendente, ainda não gravado
+    assert tier._pending_access
+    tier.set("terceira", "3")  # Grava os acessos antes de despejar
+    assert not tier._pending_access
+    assert tier.get("velha") == "1"
+    assert tier.get("nova") is None
+    tier.close()
@@ -0,0 +1,69 @@
+"""Avaliação incremental de conversas: limite do prompt e perda de contexto"""
+
+import asyncio
+import json
+import re
+
+from examples.judge_benchmarks import CLEAN_JSON, StubAgent, StubResponse, stub_session
+from examples.judge_conversation import IncrementalConversationEvaluator
+from examples.llm_judge_implementation import LLMJudge
+
+
+class ConversationRunner:
+    """Avalia sempre com o mesmo JSON; o resumo lista as mensagens que recebeu"""
+
+    def __init__(self, summary_delay=0.05, fail_summary=False):
+        self.summary_delay = summary_delay
+        self.fail_summary = fail_summary
+        self.prompts = []
+
+    async def run(self, agent, session, user_content):
+        if "resum" in user_content.lower()[:400]:
+            await asyncio.sleep(self.summary_delay)
+            if self.fail_summary:
+                return StubResponse("sem json")
+            messages = sorted(set(re.findall(r"\b[ua]\d+\b", user_content)))
+            return StubResponse(json.dumps({"summary": " ".join(messages)}))
+        self.prompts.append(user_content)
+        return StubResponse(CLEAN_JSON)
+
+
+def _converse(runner, turns=30, background_refresh=True):
+    judge = LLMJudge(StubAgent(), runner, session_factory=stub_session)
+    evaluator = IncrementalConversationEvaluator(
+        judge, window_turns=2, summary_interval=3, background_refresh=background_refresh
+    )
+
+    async def run():
+        lost, evaluations = [], []
+        for i in range(turns):
+            evaluations.append(await evaluator.evaluate_turn("c1", f"u{i}", f"a{i}"))
+            await asyncio.sleep(0.01)
+            prompt = runner.prompts[-1]
+            lost.extend(m for k in range(i) for m in (f"u{k}", f"a{k}") if not re.search(rf"\b{m}\b", prompt))
+        return evaluator, evaluations, lost
+
+    return asyncio.run(run())
+
+
+def test_background_refresh_never_loses_context():
+    """Regressão: turnos saíam do prompt antes de entrar no resumo em andamento"""
+    evaluator, evaluations, lost = _converse(ConversationRunner())
+    assert lost == []
+    assert max(e["conversation"]["prompt_turns"] for e in evaluations) <= 5
+    assert evaluations[-1]["conversation"]["summarized_turns"] > 0
+
+
+def test_summarized_turns_leave_the_state():
+    evaluator, evaluations, _ = _converse(ConversationRunner(summary_delay=0), background_refresh=False)
+    state = evaluator.state("c1")
+    assert len(state.turns) <= 5
+    assert state.total_turns == 2 * 30
+
+
+def test_failing_summaries_keep_state_and_prompt_bounded():
+    evaluator, evaluations, _ = _converse(ConversationRunner(fail_summary=True))
+    state = evaluator.state("c1")
+    assert len(state.turns) <= 6
+    assert max(e["conversation"]["prompt_turns"] for e in evaluations) <= 5
+    assert evaluations[-1]["conversation"]["dropped_turns"] > 0
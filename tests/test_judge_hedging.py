@@ -0,0 +1,54 @@
+"""Corrida entre tentativa original e hedge"""
+
+import asyncio
+
+from examples.judge_hedging import HedgingPolicy
+
+
+def _attempt(delay, result):
+    async def call():
+        await asyncio.sleep(delay)
+        return result
+    return call
+
+
+def test_fast_primary_does_not_hedge():
+    policy = HedgingPolicy(initial_delay_seconds=0.5)
+    result = asyncio.run(policy.run(_attempt(0, "main"), _attempt(0, "hedge"), bool))
+    assert result == "main"
+    assert policy.stats.hedged == 0
+    assert len(policy.latencies) == 1
+
+
+def test_slow_primary_is_hedged_and_loses():
+    policy = HedgingPolicy(initial_delay_seconds=0.01)
+    result = asyncio.run(policy.run(_attempt(1.0, "main"), _attempt(0, "hedge"), bool))
+    assert result == "hedge"
+    assert policy.stats.hedged == 1
+    assert policy.stats.hedge_wins == 1
+
+
+def test_invalid_hedge_result_does_not_win():
+    policy = HedgingPolicy(initial_delay_seconds=0.01)
+    result = asyncio.run(policy.run(_attempt(0.05, "main"), _attempt(0, ""), bool))
+    assert result == "main"
+    assert policy.stats.primary_wins == 1
+
+
+def test_budget_limits_hedges():
+    policy = HedgingPolicy(initial_delay_seconds=0.01, budget_ratio=0.0, budget_burst=1.0)
+
+    async def run():
+        for _ in range(3):
+            await policy.run(_attempt(0.03, "main"), _attempt(0, "hedge"), bool)
+
+    asyncio.run(run())
+    assert policy.stats.hedged == 1
+    assert policy.stats.budget_denied == 2
+
+
+def test_deadline_follows_latency_percentile():
+    policy = HedgingPolicy(min_samples=10, percentile=50.0, min_delay_seconds=0.0)
+    for latency in range(100):
+        policy.record(latency / 100)
+    assert policy.deadline() == 0.5
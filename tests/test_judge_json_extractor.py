@@ -0,0 +1,80 @@
+"""Casos de borda do extrator incremental de JSON"""
+
+import asyncio
+
+from examples.judge_json_extractor import StreamingJSONExtractor, extract_json, extract_json_from_stream
+
+
+def test_plain_object():
+    assert extract_json('{"score": 0.8}') == {"score": 0.8}
+
+
+def test_prose_and_fenced_block():
+    text = 'Segue a avaliação:\n```json\n{"score": 0.5, "justification": "ok"}\n```\nFim.'
+    assert extract_json(text) == {"score": 0.5, "justification": "ok"}
+
+
+def test_trailing_commas_are_removed():
+    assert extract_json('{"a": [1, 2,], "b": {"c": 3,},}') == {"a": [1, 2], "b": {"c": 3}}
+
+
+def test_braces_and_quotes_inside_strings():
+    text = '{"justification": "usa {chaves} e \\"aspas\\" ]", "score": 1}'
+    assert extract_json(text) == {"justification": 'usa {chaves} e "aspas" ]', "score": 1}
+
+
+def test_stray_brace_in_prose_before_json():
+    # A chave solta abre um candidato que nunca fecha; `finish` reexamina depois dela
+    assert extract_json('Nota {sem fechar. Resultado: {"score": 0.3}') == {"score": 0.3}
+
+
+def test_invalid_candidate_then_nested_valid_object():
+    assert extract_json('{isto não é json {"score": 0.9}}') == {"score": 0.9}
+
+
+def test_no_json_returns_none():
+    assert extract_json("sem nenhum objeto aqui") is None
+    assert extract_json("") is None
+
+
+def test_accept_skips_rejected_candidates():
+    text = '{"meta": 1} depois {"score": 0.7}'
+    assert extract_json(text, accept=lambda value: "score" in value) == {"score": 0.7}
+
+
+def test_array_opener():
+    assert extract_json('Resultado: [{"id": 1}, {"id": 2}]', openers="[{") == [{"id": 1}, {"id": 2}]
+
+
+def test_chunks_split_at_escape_and_fence():
+    text = '```json\n{"justification": "linha \\"citada\\"", "score": 0.4}\n```'
+    extractor = StreamingJSONExtractor()
+    result = None
+    for char in text:
+        result = extractor.feed(char)
+        if extractor.done:
+            break
+    assert result == {"justification": 'linha "citada"', "score": 0.4}
+
+
+def test_feed_returns_as_soon_as_object_closes():
+    extractor = StreamingJSONExtractor()
+    assert extractor.feed('{"score": ') is None
+    assert extractor.feed('0.6} texto que não importa') == {"score": 0.6}
+    assert extractor.done
+
+
+def test_stream_is_closed_after_first_object():
+    closed = []
+
+    async def chunks():
+        try:
+            for chunk in ['{"sco', 're": 1}', " resto", " nunca lido"]:
+                yield chunk
+        finally:
+            closed.append(True)
+
+    value, received = asyncio.run(extract_json_from_stream(chunks()))
+    assert value == {"score": 1}
+    assert received == '{"score": 1}'
+    assert closed == [True]
@@ -0,0 +1,55 @@
+"""Exportador Langfuse em segundo plano"""
+
+import asyncio
+
+from examples.judge_langfuse_exporter import BufferedLangfuseExporter
+
+
+def test_flushes_across_event_loops():
+    """Regressão: com um `asyncio.run` por chamada, só o primeiro loop exportava"""
+    sent = []
+    exporter = BufferedLangfuseExporter(flush_interval_seconds=0.01)
+
+    async def call(value):
+        exporter.enqueue(sent.append, value)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(call(1))
+    asyncio.run(call(2))
+    assert sent == [1, 2]
+    assert exporter.stats()["pending"] == 0
+
+
+def test_shutdown_sends_pending_and_flushes_client():
+    class Client:
+        flushed = False
+
+        def flush(self):
+            self.flushed = True
+
+    client = Client()
+    sent = []
+    exporter = BufferedLangfuseExporter(client, flush_interval_seconds=60)
+
+    async def run():
+        for i in range(3):
+            exporter.enqueue(sent.append, i)
+        await exporter.shutdown()
+
+    asyncio.run(run())
+    assert sent == [0, 1, 2]
+    assert client.flushed
+
+
+def test_full_queue_drops_oldest_and_failures_are_counted():
+    exporter = BufferedLangfuseExporter(max_queue_size=2)
+    for i in range(3):
+        exporter.enqueue(lambda: None)  # Sem loop ativo: fica na fila
+
+    def fail():
+        raise RuntimeError("indisponível")
+
+    exporter.enqueue(fail)
+    assert exporter.stats()["dropped"] == 2
+    assert asyncio.run(exporter.flush()) == 1
+    assert exporter.stats()["failed"] == 1
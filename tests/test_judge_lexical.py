@@ -0,0 +1,40 @@
+"""Atalho léxico contra a resposta esperada"""
+
+from examples.judge_lexical import LexicalPreFilter
+
+REFERENCE = (
+    "O prazo para devolução do produto é de 30 dias corridos a partir da data de entrega, "
+    "desde que a embalagem original esteja intacta e acompanhada da nota fiscal, conforme a "
+    "política de trocas da loja e o código de defesa do consumidor."
+)
+
+
+def _prefilter():
+    return LexicalPreFilter(min_token_f1=0.9, min_rouge_l=0.9)
+
+
+def test_exact_match_fills_every_criterion():
+    evaluation = _prefilter().evaluate(REFERENCE.upper() + "!", REFERENCE)
+    assert evaluation["source"] == "lexical"
+    assert evaluation["score"] == evaluation["correctness"] == evaluation["safety"] == 1.0
+
+
+def test_near_match_does_not_claim_correctness_or_safety():
+    evaluation = _prefilter().evaluate(REFERENCE.replace("loja", "empresa"), REFERENCE)
+    assert evaluation is not None
+    assert "correctness" not in evaluation
+    assert "safety" not in evaluation
+    assert evaluation["score"] < 1.0
+
+
+def test_changed_number_goes_to_the_model():
+    assert _prefilter().evaluate(REFERENCE.replace("30", "90"), REFERENCE) is None
+
+
+def test_inserted_negation_goes_to_the_model():
+    assert _prefilter().evaluate(REFERENCE.replace("é de", "não é de"), REFERENCE) is None
+
+
+def test_distant_answer_goes_to_the_model():
+    assert _prefilter().evaluate("Não sei responder.", REFERENCE) is None
+    assert LexicalPreFilter(enabled=False).evaluate(REFERENCE, REFERENCE) is None
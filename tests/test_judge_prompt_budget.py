@@ -0,0 +1,114 @@
+"""Invariantes da distribuição do orçamento de tokens e da compactação de prompts"""
+
+import random
+
+import pytest
+
+from examples.judge_prompt_budget import (
+    MIN_FIELD_TOKENS,
+    CompactionReport,
+    _allocate,
+    compact_fields,
+    estimate_tokens,
+    field_priorities,
+    prompt_budgets_from_config,
+    truncate_middle
+)
+from examples.judge_prompts_templates import JudgePromptTemplates
+
+
+def _random_sizes(rng):
+    return {name: rng.randint(0, 2000) for name in ("user_query", "agent_response", "expected_response", "context")}
+
+
+def test_allocate_never_exceeds_budget_and_keeps_small_fields_whole():
+    rng = random.Random(0)
+    priorities = field_priorities("response_quality", ["correctness"])
+    for _ in range(2000):
+        sizes = _random_sizes(rng)
+        budget = rng.randint(0, 4000)
+        try:
+            allotment = _allocate(sizes, budget, priorities, required={"agent_response"})
+        except ValueError:
+            assert min(sizes["agent_response"], MIN_FIELD_TOKENS) > budget
+            continue
+        assert set(allotment) == set(sizes)
+        assert sum(min(allotment[name], sizes[name]) for name in sizes) <= max(budget, 0)
+        if sum(sizes.values()) <= budget:
+            assert all(allotment[name] >= sizes[name] for name in sizes)
+        for name, limit in allotment.items():
+            # Cada parte fica inteira, com ao menos o mínimo, ou é descartada
+            assert limit == 0 or limit >= min(sizes[name], MIN_FIELD_TOKENS)
+        assert allotment["agent_response"] >= min(sizes["agent_response"], MIN_FIELD_TOKENS)
+
+
+def test_allocate_drops_lowest_priority_first():
+    sizes = {"user_query": 500, "agent_response": 500, "context": 500}
+    priorities = {"user_query": 3.0, "agent_response": 3.0, "context": 1.0}
+    allotment = _allocate(sizes, 2 * MIN_FIELD_TOKENS, priorities, required={"agent_response"})
+    assert allotment["context"] == 0
+    assert allotment["agent_response"] >= MIN_FIELD_TOKENS
+
+
+def test_allocate_rejects_budget_below_required_minimum():
+    with pytest.raises(ValueError):
+        _allocate({"agent_response": 500}, MIN_FIELD_TOKENS - 1, {}, required={"agent_response"})
+
+
+def test_compact_fields_stays_within_budget_and_never_drops_evaluated_fields():
+    rng = random.Random(1)
+    priorities = field_priorities("comparative")
+    for _ in range(1000):
+        fields = {
+            "user_query": "q" * rng.randint(0, 3000),
+            "responses": ["r" * rng.randint(1, 3000) for _ in range(rng.randint(1, 4))],
+            "context": "c" * rng.randint(0, 2000)
+        }
+        budget = rng.randint(0, 2000)
+        try:
+            compacted = compact_fields(fields, budget, priorities)
+        except ValueError:
+            continue
+        total = sum(estimate_tokens(value) for value in compacted.values())
+        assert total <= budget or total == sum(estimate_tokens(value) for value in fields.values())
+        assert all(compacted["responses"])
+
+
+def test_truncate_middle_keeps_ends_and_respects_limit():
+    text = "início " + "x" * 5000 + " fim"
+    truncated = truncate_middle(text, 100)
+    assert truncated.startswith("início")
+    assert truncated.endswith("fim")
+    assert "caracteres omitidos" in truncated
+    assert estimate_tokens(truncated) <= 100
+
+
+def test_truncate_middle_returns_text_that_already_fits():
+    for length in range(0, 200):
+        text = "a" * length
+        assert truncate_middle(text, estimate_tokens(text)) == text
+
+
+def test_small_budget_raises_instead_of_dropping_the_response():
+    """Regressão: orçamento menor que o template descartava `agent_response`"""
+    with pytest.raises(ValueError):
+        JudgePromptTemplates.response_quality("pergunta", "a" * 3000, token_budget=300)
+
+
+def test_tight_budget_keeps_the_response():
+    report = CompactionReport()
+    prompt = JudgePromptTemplates.response_quality(
+        "q" * 2000, "RESPOSTA" + "a" * 3000, "e" * 3000, {"k": "v" * 500},
+        token_budget=400,
+        report=report
+    )
+    assert "RESPOSTA" in prompt
+    actions = {action["field"]: action["action"] for action in report.actions}
+    assert actions["agent_response"] == "truncated_middle"
+
+
+def test_prompt_budgets_from_config_honours_enabled():
+    config = {"cost_optimization": {"prompt_budget": {"enabled": False, "token_budgets": {"trajectory": 10}}}}
+    assert prompt_budgets_from_config(config) == {}
+    config["cost_optimization"]["prompt_budget"]["enabled"] = True
+    assert prompt_budgets_from_config(config) == {"trajectory": 10}
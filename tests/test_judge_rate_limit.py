@@ -0,0 +1,52 @@
+"""Token bucket assíncrono"""
+
+import asyncio
+
+import pytest
+
+from examples.judge_rate_limit import TokenBucket
+
+
+def test_burst_is_served_without_waiting():
+    bucket = TokenBucket(rate_per_minute=600, burst=5)
+
+    async def run():
+        return [await bucket.acquire() for _ in range(5)]
+
+    assert asyncio.run(run()) == [0.0] * 5
+
+
+def test_waits_for_refill_when_empty():
+    bucket = TokenBucket(rate_per_minute=6000, burst=1)  # 100 tokens/s
+
+    async def run():
+        await bucket.acquire()
+        return await bucket.acquire()
+
+    assert asyncio.run(run()) == pytest.approx(0.01, abs=0.005)
+
+
+def test_oversized_request_leaves_negative_balance():
+    bucket = TokenBucket(rate_per_minute=60, burst=2)
+
+    async def run():
+        return await bucket.acquire(5)
+
+    assert asyncio.run(run()) == 0.0
+    assert bucket.tokens == pytest.approx(-3, abs=0.01)
+
+
+def test_penalize_pauses_the_bucket():
+    bucket = TokenBucket(rate_per_minute=6000, burst=10)
+    bucket.penalize(0.05)
+    assert bucket.tokens == pytest.approx(-5, abs=0.1)
+
+    async def run():
+        return await bucket.acquire()
+
+    assert asyncio.run(run()) == pytest.approx(0.06, abs=0.01)
+
+
+def test_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
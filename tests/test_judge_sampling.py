@@ -0,0 +1,47 @@
+"""Amostragem determinística e reservatório diário"""
+
+from examples.judge_sampling import DailyReservoir, DeterministicSampler
+
+
+def test_sampler_default_rate_is_the_same_from_config():
+    assert DeterministicSampler.from_config({}).sample_rate == DeterministicSampler().sample_rate
+
+
+def test_sampler_decision_is_stable_and_close_to_rate():
+    sampler = DeterministicSampler(sample_rate=0.2, salt="exp")
+    decisions = [sampler.should_evaluate(f"trace-{i}") for i in range(5000)]
+    assert decisions == [sampler.should_evaluate(f"trace-{i}") for i in range(5000)]
+    assert 0.17 < sum(decisions) / len(decisions) < 0.23
+
+
+def test_reservoir_keeps_bottom_k_regardless_of_order():
+    keys = [f"k{i}" for i in range(200)]
+    forward, backward = DailyReservoir(10), DailyReservoir(10)
+    for key in keys:
+        forward.offer(key, key)
+    for key in reversed(keys):
+        backward.offer(key, key)
+    assert sorted(forward.drain()) == sorted(backward.drain())
+
+
+def test_reservoir_repeated_keys_do_not_compare_items():
+    reservoir = DailyReservoir(2)
+    for _ in range(5):
+        reservoir.offer("mesma", {"dict": "não comparável"})
+    assert len(reservoir) == 2
+
+
+def test_reservoir_day_rollover_keeps_previous_sample(monkeypatch):
+    reservoir = DailyReservoir(3)
+    monkeypatch.setattr(reservoir, "_today", lambda: "2026-01-01")
+    for i in range(10):
+        reservoir.offer(f"a{i}", f"a{i}")
+    first_day = sorted(DailyReservoir._selected(reservoir))
+
+    monkeypatch.setattr(reservoir, "_today", lambda: "2026-01-02")
+    reservoir.offer("b0", "b0")
+    assert reservoir.pending_days() == ["2026-01-01"]
+    assert reservoir.seen == 1
+    assert sorted(reservoir.drain("2026-01-01")) == first_day
+    assert reservoir.pending_days() == []
+    assert reservoir.drain() == ["b0"]
@@ -0,0 +1,45 @@
+"""Ordenação externa da saída de um shard"""
+
+import json
+import random
+
+import pytest
+
+from examples import judge_sharding
+from examples.judge_sharding import _sort_shard, merge_shards, shard_index
+
+
+@pytest.mark.parametrize("run_size", [1, 7, 100000])
+def test_sort_shard_orders_by_line_and_keeps_last_record(tmp_path, monkeypatch, run_size):
+    monkeypatch.setattr(judge_sharding, "MERGE_FAN_IN", 4)
+    rng = random.Random(run_size)
+    records = [
+        {"id": f"c{line}", "line": line, "evaluation": {"version": i}}
+        for i, line in enumerate(rng.randint(1, 200) for _ in range(500))
+    ]
+    path = tmp_path / "shard.jsonl"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+    _sort_shard(str(path), f"{path}.sorted", run_size=run_size)
+
+    last = {record["line"]: record for record in records}
+    with open(f"{path}.sorted", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [last[line] for line in sorted(last)]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["shard.jsonl", "shard.jsonl.sorted"]
+
+
+def test_merge_shards_interleaves_in_input_order(tmp_path):
+    paths = []
+    for shard, lines in enumerate([[1, 4, 6], [2, 3], [5]]):
+        path = tmp_path / f"s{shard}.sorted"
+        path.write_text("".join(json.dumps({"id": str(line), "line": line}) + "\n" for line in lines))
+        paths.append(str(path))
+    output = tmp_path / "out.jsonl"
+    assert merge_shards(paths, str(output)) == 6
+    assert [json.loads(line)["line"] for line in output.read_text().splitlines()] == [1, 2, 3, 4, 5, 6]
+
+
+def test_shard_index_is_stable_and_in_range():
+    assignments = [shard_index(f"case-{i}", 4) for i in range(1000)]
+    assert assignments == [shard_index(f"case-{i}", 4) for i in range(1000)]
+    assert set(assignments) == {0, 1, 2, 3}
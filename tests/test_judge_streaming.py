@@ -0,0 +1,126 @@
+"""Journal de progresso, retomada e falhas do `StreamingSuiteEvaluator`"""
+
+import asyncio
+import json
+
+import pytest
+
+from examples.judge_streaming import ProgressJournal, StreamingSuiteEvaluator
+
+
+class StubJudge:
+    """Judge mínimo: avalia pela pergunta e falha nas perguntas em `failing`"""
+
+    def __init__(self, failing=(), unserializable=()):
+        self.failing = set(failing)
+        self.unserializable = set(unserializable)
+        self.calls = []
+
+    async def evaluate_response(self, user_query, agent_response, **kwargs):
+        await asyncio.sleep(0)
+        self.calls.append(user_query)
+        if user_query in self.failing:
+            return self._error_evaluation("falha simulada")
+        if user_query in self.unserializable:
+            return {"score": 1.0, "bad": {1, 2}}
+        return {"score": 1.0}
+
+    evaluate_trajectory = compare_responses = evaluate_response
+
+    def _error_evaluation(self, message):
+        return {"error": True, "error_message": message, "score": 0.0}
+
+
+def _write_cases(path, ids):
+    with open(path, "w", encoding="utf-8") as f:
+        for item_id in ids:
+            f.write(json.dumps({"id": item_id, "user_query": item_id, "agent_response": "r"}) + "\n")
+
+
+def _records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _run(evaluator, input_path, output_path):
+    return asyncio.run(asyncio.wait_for(evaluator.run(str(input_path), str(output_path)), timeout=10))
+
+
+def test_resume_skips_done_and_truncates_partial_line(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_cases(input_path, [f"c{i}" for i in range(10)])
+    judge = StubJudge()
+    _run(StreamingSuiteEvaluator(judge, flush_every=1), input_path, output_path)
+    with open(output_path, "a", encoding="utf-8") as f:
+        f.write('{"id": "parcial", "ev')  # Linha gravada sem entrada no journal
+
+    judge.calls.clear()
+    progress = _run(StreamingSuiteEvaluator(judge, flush_every=1), input_path, output_path)
+    assert progress.skipped == 10
+    assert judge.calls == []
+    assert sorted(record["id"] for record in _records(output_path)) == sorted(f"c{i}" for i in range(10))
+
+
+def test_retry_errors_leaves_one_record_per_id(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    ids = [f"c{i}" for i in range(10)]
+    _write_cases(input_path, ids)
+    first = _run(StreamingSuiteEvaluator(StubJudge(failing={"c3", "c7"})), input_path, output_path)
+    assert first.errors == 2
+
+    judge = StubJudge()
+    second = _run(StreamingSuiteEvaluator(judge, retry_errors=True), input_path, output_path)
+    assert sorted(judge.calls) == ["c3", "c7"]
+    assert second.skipped == 8
+    records = _records(output_path)
+    assert sorted(record["id"] for record in records) == sorted(ids)
+    assert not any("error" in record["evaluation"] for record in records)
+
+    journal = ProgressJournal(f"{output_path}.journal")
+    journal.load()
+    assert journal.done == set(ids)
+    assert journal.output_size == output_path.stat().st_size
+
+
+def test_drop_failed_keeps_last_record_per_id(tmp_path):
+    output_path = tmp_path / "out.jsonl"
+    journal = ProgressJournal(str(tmp_path / "out.jsonl.journal"))
+    journal.open()
+    with open(output_path, "wb") as output:
+        for line, (item_id, status) in enumerate([("a", "error"), ("b", "ok"), ("a", "ok"), ("c", "error")]):
+            evaluation = {"error": True} if status == "error" else {"score": 1.0}
+            record = {"id": item_id, "line": line, "evaluation": evaluation}
+            output.write((json.dumps(record) + "\n").encode("utf-8"))
+            journal.stage(item_id, status, output.tell())
+    journal.commit()
+    journal.close()
+
+    journal = ProgressJournal(journal.path)
+    journal.load()
+    assert journal.drop_failed(str(output_path)) == 2
+    assert [(record["id"], record["line"]) for record in _records(output_path)] == [("b", 1), ("a", 2)]
+    assert journal.failed == set()
+
+    reloaded = ProgressJournal(journal.path)
+    reloaded.load()
+    assert reloaded.done == {"a", "b"}
+    assert reloaded.output_size == output_path.stat().st_size
+
+
+def test_duplicate_ids_are_evaluated_once(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_cases(input_path, ["a", "b", "a", "c", "b"])
+    judge = StubJudge()
+    progress = _run(StreamingSuiteEvaluator(judge), input_path, output_path)
+    assert progress.duplicates == 2
+    assert sorted(judge.calls) == ["a", "b", "c"]
+    assert sorted(record["id"] for record in _records(output_path)) == ["a", "b", "c"]
+
+
+def test_writer_failure_is_raised_instead_of_hanging(tmp_path):
+    """Regressão: um writer morto deixava workers e leitor presos nas filas cheias"""
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_cases(input_path, [f"c{i}" for i in range(50)])
+    evaluator = StreamingSuiteEvaluator(StubJudge(unserializable={"c5"}), queue_size=2, max_concurrency=3)
+    with pytest.raises(TypeError):
+        _run(evaluator, input_path, output_path)
@@ -0,0 +1,25 @@
+"""Forças de Bradley-Terry e escala Elo"""
+
+import pytest
+
+from examples.judge_tournament import bradley_terry, elo_ratings
+
+
+def test_strengths_follow_wins():
+    outcomes = [(0, 1, 1.0), (0, 2, 1.0), (1, 2, 1.0), (0, 1, 1.0)]
+    strengths = bradley_terry(3, outcomes)
+    assert strengths[0] > strengths[1] > strengths[2]
+
+
+def test_ties_give_equal_strengths():
+    strengths = bradley_terry(2, [(0, 1, 0.5), (1, 0, 0.5)])
+    assert strengths == pytest.approx([1.0, 1.0])
+
+
+def test_unbeaten_candidate_stays_finite():
+    strengths = bradley_terry(2, [(0, 1, 1.0)] * 20)
+    assert 1.0 < strengths[0] < float("inf")
+
+
+def test_elo_scale():
+    assert elo_ratings([1.0, 10.0, 0.1]) == pytest.approx([1500.0, 1900.0, 1100.0])
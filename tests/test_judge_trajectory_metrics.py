@@ -0,0 +1,61 @@
+"""Métricas locais de trajetória e avaliação sem modelo"""
+
+import pytest
+
+from examples.judge_trajectory_metrics import (
+    TrajectoryPreScorer,
+    compute_trajectory_metrics,
+    lcs_length
+)
+
+
+def test_lcs_length():
+    assert lcs_length(["a", "b", "c", "d"], ["b", "a", "c", "d"]) == 3
+    assert lcs_length([], ["a"]) == 0
+
+
+def test_metrics_for_reordered_and_extra_steps():
+    metrics = compute_trajectory_metrics(["search", "read", "answer"], ["read", "search", "log", "answer"])
+    assert metrics.completeness == 1.0
+    assert metrics.efficiency == 0.75
+    assert metrics.order_match == pytest.approx(2 / 3)
+    assert metrics.extra_steps == ["log"]
+    assert not metrics.exact_match
+
+
+def test_repeated_steps_count_once_each():
+    metrics = compute_trajectory_metrics(["a", "a"], ["a"])
+    assert metrics.completeness == 0.5
+    assert metrics.missing_steps == ["a"]
+
+
+def test_empty_trajectories_match():
+    metrics = compute_trajectory_metrics([], [])
+    assert metrics.exact_match
+    assert (metrics.order_match, metrics.completeness, metrics.efficiency) == (1.0, 1.0, 1.0)
+
+
+@pytest.mark.parametrize("profile, text_fields", [
+    ("full", {"justification", "strengths", "weaknesses", "recommendations"}),
+    ("scores_reason", {"reason"}),
+    ("scores_only", set())
+])
+def test_local_and_hybrid_follow_output_profile(profile, text_fields):
+    scorer = TrajectoryPreScorer()
+    base = {"score", "order_match", "completeness", "efficiency", "correctness", "source", "trajectory_metrics"}
+
+    exact = scorer.local_evaluation(compute_trajectory_metrics(["a", "b"], ["a", "b"]), profile)
+    assert set(exact) == base | text_fields
+    assert exact["score"] == 1.0
+
+    partial = compute_trajectory_metrics(["a", "b", "c"], ["a", "c", "b"])
+    assert scorer.local_evaluation(partial, profile) is None
+    hybrid = scorer.combine(partial, {"correctness": 0.8}, profile)
+    assert set(hybrid) == base | text_fields
+    assert hybrid["source"] == "hybrid"
+
+
+def test_distant_trajectory_is_a_local_miss():
+    evaluation = TrajectoryPreScorer().local_evaluation(compute_trajectory_metrics(["a", "b", "c"], ["x"]))
+    assert evaluation["correctness"] == 0.0
+    assert evaluation["weaknesses"]